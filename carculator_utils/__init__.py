@@ -11,23 +11,57 @@ Submodules
 
 __all__ = (
     "get_standard_driving_cycle_and_gradient",
+    "DrivingCycle",
     "NoiseEmissionsModel",
     "HotEmissionsModel",
     "Inventory",
     "BackgroundSystemModel",
     "ExportInventory",
     "VehicleInputParameters",
+    "ResultsAccumulator",
 )
 __version__ = (1, 2, 0, "dev5")
 
+import importlib
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 
-from .background_systems import BackgroundSystemModel
-from .driving_cycles import get_standard_driving_cycle_and_gradient
-from .export import ExportInventory
-from .hot_emissions import HotEmissionsModel
-from .inventory import Inventory
-from .noise_emissions import NoiseEmissionsModel
-from .vehicle_input_parameters import VehicleInputParameters
+# the names of `__all__` are imported from their submodule when first
+# accessed (PEP 562), so that importing the package stays cheap
+_SUBMODULES = {
+    "get_standard_driving_cycle_and_gradient": "driving_cycles",
+    "DrivingCycle": "driving_cycles",
+    "NoiseEmissionsModel": "noise_emissions",
+    "HotEmissionsModel": "hot_emissions",
+    "Inventory": "inventory",
+    "BackgroundSystemModel": "background_systems",
+    "ExportInventory": "export",
+    "VehicleInputParameters": "vehicle_input_parameters",
+    "ResultsAccumulator": "accumulator",
+}
+
+if TYPE_CHECKING:
+    from .accumulator import ResultsAccumulator
+    from .background_systems import BackgroundSystemModel
+    from .driving_cycles import DrivingCycle, get_standard_driving_cycle_and_gradient
+    from .export import ExportInventory
+    from .hot_emissions import HotEmissionsModel
+    from .inventory import Inventory
+    from .noise_emissions import NoiseEmissionsModel
+    from .vehicle_input_parameters import VehicleInputParameters
+
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{_SUBMODULES[name]}", __name__), name)
+    # cache it, `__getattr__` is only called for missing attributes
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
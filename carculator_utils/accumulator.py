@@ -0,0 +1,202 @@
+"""
+accumulator.py contains ResultsAccumulator, which summarizes stochastic results
+(:meth:`carculator_utils.inventory.Inventory.calculate_impacts`,
+:meth:`carculator_utils.model.VehicleModel.calculate_cost_impacts`)
+batch after batch, without keeping the individual iterations in memory.
+"""
+
+from typing import Sequence
+
+import numpy as np
+import xarray as xr
+
+# number of samples kept per result by the top level of the quantile sketch
+SKETCH_SIZE = 128
+# ratio of the capacities of two consecutive levels of the quantile sketch
+CAPACITY_RATIO = 2 / 3
+
+
+class ResultsAccumulator:
+    """
+    Running summary statistics of results along the `value` dimension.
+
+    Mean and variance are updated with Welford's algorithm, merged batch by
+    batch. Quantiles are estimated with a KLL sketch (Karnin, Lang and Liberty,
+    2016): samples are kept in levels of sorted arrays, and a level that is full
+    is halved by keeping every other sample, which is promoted to the next level
+    with twice the weight. Every result receives the same number of samples, so
+    the levels have the same length for all results: batches are merged at once
+    along the sample axis. The sketch holds about 3 * `size` samples per result,
+    whatever the number of iterations, and the rank error of the quantiles
+    is of the order of 1 / `size`.
+
+    Usage::
+
+        accumulator = ResultsAccumulator(quantiles=(0.05, 0.5, 0.95))
+        for results in Inventory.stream(...):
+            accumulator.update(results)
+        summary = accumulator.to_dataset()
+
+    :ivar quantiles: quantiles to estimate, between 0 and 1
+    :ivar dim: name of the dimension along which samples are drawn
+    :ivar size: capacity of the top level of the quantile sketch
+    :ivar count: number of samples seen so far
+
+    """
+
+    def __init__(
+        self,
+        quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+        dim="value",
+        size: int = SKETCH_SIZE,
+    ):
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        if ((self.quantiles <= 0) | (self.quantiles >= 1)).any():
+            raise ValueError("The quantiles must be strictly between 0 and 1.")
+
+        self.dim = dim
+        self.size = size
+        self.count = 0
+
+        self._template = None
+        self._mean = self._m2 = self._min = self._max = None
+        # samples of each level of the sketch, of shape (results, samples),
+        # each sample of level h standing for 2**h samples
+        self._levels = []
+        # offset of the next compaction of each level, alternating 0 and 1
+        self._offsets = []
+
+    def update(self, results: xr.DataArray) -> None:
+        """
+        Add a batch of samples.
+
+        :param results: array with the `dim` dimension, whose other
+        dimensions and coordinates are identical from one batch to the next
+        """
+        results = results.transpose(self.dim, ...)
+        samples = results.values.reshape(results.shape[0], -1).astype(np.float64)
+
+        if self._template is None:
+            self._template = results.isel({self.dim: 0}, drop=True)
+            self._mean = np.zeros(samples.shape[1])
+            self._m2 = np.zeros(samples.shape[1])
+            self._min = np.full(samples.shape[1], np.inf)
+            self._max = np.full(samples.shape[1], -np.inf)
+            self._levels = [np.zeros((samples.shape[1], 0))]
+            self._offsets = [0]
+        elif results.shape[1:] != self._template.shape:
+            raise ValueError("The results do not have the same shape as before.")
+
+        if len(samples) == 0:
+            return
+
+        # merge the moments of the batch (Chan et al.)
+        batch_count = len(samples)
+        batch_mean = samples.mean(axis=0)
+        batch_m2 = ((samples - batch_mean) ** 2).sum(axis=0)
+
+        total = self.count + batch_count
+        delta = batch_mean - self._mean
+        self._mean += delta * batch_count / total
+        self._m2 += batch_m2 + delta**2 * self.count * batch_count / total
+        self._min = np.minimum(self._min, samples.min(axis=0))
+        self._max = np.maximum(self._max, samples.max(axis=0))
+        self.count = total
+
+        self._levels[0] = np.concatenate((self._levels[0], samples.T), axis=1)
+        self._compact()
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(2, int(np.ceil(self.size * CAPACITY_RATIO**depth)))
+
+    def _compact(self) -> None:
+        """Halve the levels of the sketch that exceed their capacity."""
+        level = 0
+        while level < len(self._levels):
+            samples = self._levels[level]
+            if samples.shape[1] <= self._capacity(level):
+                level += 1
+                continue
+
+            if level + 1 == len(self._levels):
+                self._levels.append(np.zeros((samples.shape[0], 0)))
+                self._offsets.append(0)
+
+            # an even number of samples is halved, the largest one
+            # is kept in the level if their number is odd
+            samples = np.sort(samples, axis=1)
+            even = samples.shape[1] - samples.shape[1] % 2
+            offset = self._offsets[level]
+            self._offsets[level] = 1 - offset
+
+            self._levels[level] = samples[:, even:]
+            self._levels[level + 1] = np.concatenate(
+                (self._levels[level + 1], samples[:, offset:even:2]), axis=1
+            )
+            level += 1
+
+    def _get_quantiles(self) -> np.ndarray:
+        if len(self._levels) == 1:
+            # no sample was discarded: exact quantiles
+            return np.quantile(self._levels[0], self.quantiles, axis=1)
+
+        samples = np.concatenate(self._levels, axis=1)
+        weights = np.concatenate(
+            [np.full(s.shape[1], 2.0**h) for h, s in enumerate(self._levels)]
+        )
+
+        order = np.argsort(samples, axis=1)
+        samples = np.take_along_axis(samples, order, axis=1)
+        weights = weights[order]
+
+        # rank of the middle of each sample, interpolated in between
+        ranks = np.cumsum(weights, axis=1) - weights / 2
+        quantiles = []
+        for quantile in self.quantiles:
+            rank = quantile * self.count
+            upper = np.clip((ranks < rank).sum(axis=1), 1, samples.shape[1] - 1)[
+                :, None
+            ]
+            r_0, r_1 = (
+                np.take_along_axis(ranks, i, axis=1) for i in (upper - 1, upper)
+            )
+            q_0, q_1 = (
+                np.take_along_axis(samples, i, axis=1) for i in (upper - 1, upper)
+            )
+            weight = np.clip((rank - r_0) / (r_1 - r_0), 0, 1)
+            quantiles.append((q_0 + (q_1 - q_0) * weight)[:, 0])
+
+        return np.stack(quantiles)
+
+    def to_dataset(self) -> xr.Dataset:
+        """
+        Return the summary statistics of the samples seen so far.
+
+        :return: dataset with the `mean`, `std` (population standard
+        deviation), `min`, `max` and `quantiles` variables, with the
+        dimensions of the results except `dim`. `quantiles` has an
+        additional `quantile` dimension.
+        """
+        if self.count == 0:
+            raise ValueError("No results were added.")
+
+        template = self._template
+
+        def _(arr):
+            return template.copy(data=arr.reshape(template.shape))
+
+        quantiles = self._get_quantiles()
+
+        return xr.Dataset(
+            {
+                "mean": _(self._mean),
+                "std": _(np.sqrt(self._m2 / self.count)),
+                "min": _(self._min),
+                "max": _(self._max),
+                "quantiles": xr.concat(
+                    [_(quantile) for quantile in quantiles], dim="quantile"
+                ).assign_coords(quantile=self.quantiles),
+            },
+            attrs={"iterations": self.count},
+        )
@@ -0,0 +1,188 @@
+"""
+assets.py contains the loaders of the package data, the files in
+:data:`carculator_utils.DATA_DIR`. Each file is parsed once per process.
+
+Parsed files can also be persisted in a binary cache directory, so that
+other processes do not parse them again (see :func:`set_cache_dir`).
+Cached files are keyed by the hash of the file they were parsed from, in
+a directory specific to the version of the package: an edited data file
+or a new version of the package never reads a stale cache.
+"""
+
+import csv
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+from scipy import sparse
+
+from . import __version__
+
+# to increase when the content of the cached files changes
+CACHE_VERSION = 1
+
+# directory of the binary cache, None to parse files in each process
+_cache_dir = os.environ.get("CARCULATOR_UTILS_CACHE_DIR")
+
+
+def set_cache_dir(path: Union[str, Path, None]) -> None:
+    """
+    Set the directory where parsed files are persisted, or None to
+    disable the binary cache. Defaults to the `CARCULATOR_UTILS_CACHE_DIR`
+    environment variable, if set.
+
+    :param path: cache directory
+    """
+    global _cache_dir
+    _cache_dir = path
+
+
+def get_cache_dir() -> Union[Path, None]:
+    """
+    Return the directory of the binary cache for this version
+    of the package, or None if the binary cache is disabled.
+    """
+    if _cache_dir is None:
+        return None
+
+    version = ".".join(str(v) for v in __version__)
+    return Path(_cache_dir) / f"v{CACHE_VERSION}-{version}"
+
+
+def clear_caches() -> None:
+    """
+    Forget the files parsed in this process. The binary cache is left untouched.
+    """
+    for loader in (
+        load_yaml,
+        read_csv,
+        read_dataframe,
+        load_array,
+        load_sparse_matrix,
+    ):
+        loader.cache_clear()
+
+
+def parse(filepath: Path, parser: Callable, *args) -> Any:
+    """
+    Parse a file, or read it from the binary cache if
+    it was already parsed by the same parser.
+
+    :param filepath: path to the file
+    :param parser: function parsing the file, called with `filepath` and `args`
+    :param args: additional arguments of `parser`
+    :return: content of the file
+    """
+    directory = get_cache_dir()
+
+    if directory is None:
+        return parser(filepath, *args)
+
+    digest = hashlib.sha256(Path(filepath).read_bytes())
+    digest.update(repr((parser.__name__, args)).encode())
+    cached = directory / f"{Path(filepath).stem}-{digest.hexdigest()[:32]}.pickle"
+
+    if cached.exists():
+        with open(cached, "rb") as f:
+            return pickle.load(f)
+
+    content = parser(filepath, *args)
+
+    # write to a temporary file first, for processes
+    # reading the cache at the same time
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = cached.with_suffix(f".{os.getpid()}.tmp")
+    with open(temporary, "wb") as f:
+        pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, cached)
+
+    return content
+
+
+def _parse_yaml(filepath: Path) -> Any:
+    with open(filepath, "r", encoding="utf-8") as stream:
+        return yaml.safe_load(stream)
+
+
+def _parse_csv(filepath: Path, delimiter: str) -> tuple:
+    with open(filepath, encoding="utf-8") as f:
+        return tuple(tuple(row) for row in csv.reader(f, delimiter=delimiter))
+
+
+def _parse_dataframe(filepath: Path, sep: str) -> pd.DataFrame:
+    return pd.read_csv(filepath, sep=sep)
+
+
+def _parse_array(filepath: Path, delimiter: str) -> np.ndarray:
+    return np.genfromtxt(filepath, delimiter=delimiter)
+
+
+@lru_cache
+def load_yaml(filepath: Path) -> Any:
+    """
+    Load a YAML file. The content is read once per process:
+    it must not be modified by the caller.
+
+    :param filepath: path to the YAML file
+    :return: content of the file
+    """
+    return parse(filepath, _parse_yaml)
+
+
+@lru_cache
+def read_csv(filepath: Path, delimiter: str = ";") -> tuple:
+    """
+    Read the rows of a CSV file. The file is read once per process.
+
+    :param filepath: path to the CSV file
+    :param delimiter: column delimiter
+    :return: tuple of rows, each a tuple of strings
+    """
+    return parse(filepath, _parse_csv, delimiter)
+
+
+@lru_cache
+def read_dataframe(filepath: Path, sep: str = ",") -> pd.DataFrame:
+    """
+    Read a CSV file as a pandas DataFrame. The file is read once
+    per process: the DataFrame must not be modified in place by the caller.
+
+    :param filepath: path to the CSV file
+    :param sep: column delimiter
+    :return: DataFrame
+    """
+    return parse(filepath, _parse_dataframe, sep)
+
+
+@lru_cache
+def load_array(filepath: Path, delimiter: str = ";") -> np.ndarray:
+    """
+    Read a numeric CSV file as an array, with NaN for the cells
+    that are not numbers (e.g., headers). The file is read once per process.
+    The array is read-only.
+
+    :param filepath: path to the CSV file
+    :param delimiter: column delimiter
+    :return: array
+    """
+    arr = parse(filepath, _parse_array, delimiter)
+    arr.setflags(write=False)
+    return arr
+
+
+@lru_cache
+def load_sparse_matrix(filepath: Path) -> sparse.csr_matrix:
+    """
+    Load a sparse matrix stored as `.npz`. The matrix is read once
+    per process: it must not be modified in place by the caller.
+
+    :param filepath: path to the `.npz` file
+    :return: sparse matrix
+    """
+    return sparse.csr_matrix(sparse.load_npz(filepath))
@@ -7,11 +7,10 @@ countries over time.
 from typing import Dict, List
 
 import numpy as np
-import pandas as pd
 import xarray as xr
-import yaml
 
 from . import DATA_DIR
+from .assets import load_yaml, read_csv, read_dataframe
 
 
 def data_to_dict(csv_list: list) -> dict:
@@ -45,8 +44,7 @@ def get_electricity_losses() -> Dict[str, float]:
         raise FileNotFoundError(
             "The CSV file that contains electricity " "mixes could not be found."
         )
-    with open(filepath, encoding="utf-8") as file:
-        csv_list = [[val.strip() for val in r.split(";")] for r in file.readlines()]
+    csv_list = [[val.strip() for val in r] for r in read_csv(filepath)]
 
     return data_to_dict(csv_list)
 
@@ -70,8 +68,7 @@ def get_electricity_mix() -> xr.DataArray:
             "The CSV file that contains " "electricity mixes could not " "be found."
         )
 
-    dataframe = pd.read_csv(filepath, sep=";", index_col=["country", "year"])
-    dataframe = dataframe.reset_index()
+    dataframe = read_dataframe(filepath, sep=";")
 
     array = (
         dataframe.melt(id_vars=["country", "year"], value_name="value")
@@ -96,7 +93,7 @@ def get_biofuel_share(filepath) -> xr.DataArray:
         raise FileNotFoundError(
             "The CSV file that contains biofuel shares " "shares could not be found."
         )
-    dataframe = pd.read_csv(filepath, sep=";")
+    dataframe = read_dataframe(filepath, sep=";")
 
     return dataframe.groupby(["country", "year"]).sum().to_xarray().to_array()
 
@@ -127,7 +124,7 @@ def get_sulfur_content_in_fuel() -> xr.DataArray:
         raise FileNotFoundError(
             "The CSV file that contains sulfur concentration values could not be found."
         )
-    dataframe = pd.read_csv(filepath, sep=";")
+    dataframe = read_dataframe(filepath, sep=";")
     dataframe = dataframe.groupby(["country", "year"]).sum().unstack()
     dataframe.loc[:, ("diesel", 1990)] = dataframe["diesel"].max(1)
     dataframe.loc[:, ("petrol", 1990)] = dataframe["petrol"].max(1)
@@ -154,10 +151,7 @@ def get_default_fuels() -> dict:
         raise FileNotFoundError(
             "The YAML file that contains default fuels could not be found."
         )
-    with open(filepath, "r") as file:
-        default_fuels = yaml.safe_load(file)
-
-    return default_fuels
+    return load_yaml(filepath)
 
 
 def get_fuels_specs() -> dict:
@@ -165,10 +159,7 @@ def get_fuels_specs() -> dict:
     Import fuel specifications from `fuel_specs.yaml`
     Contains names, LHV, CO2 emission factors.
     """
-    with open(DATA_DIR / "fuel" / "fuel_specs.yaml", "r", encoding="utf-8") as stream:
-        fuel_specs = yaml.safe_load(stream)
-
-    return fuel_specs
+    return load_yaml(DATA_DIR / "fuel" / "fuel_specs.yaml")
 
 
 class BackgroundSystemModel:
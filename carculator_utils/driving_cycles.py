@@ -7,13 +7,14 @@ second of driving.
 """
 
 import sys
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, List, Tuple
 
 import numpy as np
-import yaml
 
 from . import DATA_DIR
+from .assets import load_yaml
 
 FILEPATH_DC_SPECS = DATA_DIR / "driving_cycles" / "dc_specs.yaml"
 
@@ -35,15 +36,15 @@ def detect_vehicle_type(vehicle_sizes: List[str]) -> str:
 
 
 def get_driving_cycle_specs() -> dict:
-    """Get driving_cycles specifications.
+    """Get driving_cycles specifications. The file is read once per process:
+    the dictionary must not be modified by the caller.
 
     :returns: A dictionary with driving_cycles specifications.
     :rtype: dict
 
     """
 
-    with open(FILEPATH_DC_SPECS, "r") as f:
-        return yaml.safe_load(f)
+    return load_yaml(FILEPATH_DC_SPECS)
 
 
 def get_dc_column_number(
@@ -83,14 +84,67 @@ def get_dc_column_number(
     return [dc_specs["columns"][vehicle_type][dc_name][s] for s in vehicle_size]
 
 
+@lru_cache
+def load_table(filepath: Path) -> np.ndarray:
+    """
+    Load a table of driving cycles or gradients, one column per
+    driving cycle and size class, without its header. The table is read
+    once per process, from the `.npy` file next to the CSV file if it
+    exists and is up to date (see :func:`convert_tables`), or from the
+    CSV file otherwise. The array is read-only.
+
+    :param filepath: path to the CSV file
+    :return: array of shape (seconds, columns)
+    """
+    binary = filepath.with_suffix(".npy")
+
+    if binary.exists() and binary.stat().st_mtime >= filepath.stat().st_mtime:
+        return np.load(binary, mmap_mode="r")
+
+    arr = read_table(filepath)
+    arr.setflags(write=False)
+    return arr
+
+
+def read_table(filepath: Path) -> np.ndarray:
+    """
+    Parse a CSV table of driving cycles or gradients, without its header.
+
+    :param filepath: path to the CSV file
+    :return: array of shape (seconds, columns)
+    """
+    # we skip the headers
+    return np.genfromtxt(filepath, delimiter=";")[1:]
+
+
+def convert_tables(vehicle_types: List[str] = None) -> List[Path]:
+    """
+    Write the driving cycle and gradient tables as `.npy` files,
+    next to the CSV files, so that :func:`load_table` memory-maps them
+    instead of parsing the CSV files.
+
+    :param vehicle_types: vehicle types to convert. All by default.
+    :return: paths of the files written
+    """
+    vehicle_types = vehicle_types or list(get_driving_cycle_specs()["columns"])
+    written = []
+
+    for vehicle_type in vehicle_types:
+        for folder in ("driving_cycles", "gradient"):
+            filepath = DATA_DIR / folder / f"{vehicle_type}.csv"
+            np.save(filepath.with_suffix(".npy"), read_table(filepath))
+            written.append(filepath.with_suffix(".npy"))
+
+    load_table.cache_clear()
+    return written
+
+
 def get_data(
     filepath: Path, vehicle_type: str, vehicle_sizes: List[str], name: str
 ) -> np.ndarray:
     try:
         col = get_dc_column_number(vehicle_type, vehicle_sizes, name)
-        arr = np.genfromtxt(filepath, delimiter=";")
-        # we skip the headers
-        dc = arr[1:, col]
+        dc = load_table(filepath)[:, col]
         return dc
 
     except KeyError as err:
@@ -125,3 +179,98 @@ def get_standard_driving_cycle_and_gradient(
         get_data(filepath_dc, vehicle_type, vehicle_sizes, name),
         get_data(filepath_gradient, vehicle_type, vehicle_sizes, name),
     )
+
+
+class DrivingCycle:
+    """
+    Summary of a driving cycle, shared by :class:`EnergyConsumptionModel`
+    and the emission models, so that a cycle is analysed once per run.
+    Attributes are calculated when first accessed.
+
+    Speed bins are the air compartments of the emission models:
+
+        * *urban*: up to 50 km/h
+        * *suburban*: above 50 km/h and up to 80 km/h
+        * *rural*: above 80 km/h
+
+    :param velocity: speed of each second, in m/s, of shape (second, ...)
+    :param idle_seconds: number of idle seconds trimmed from the end of the cycle
+    """
+
+    def __init__(self, velocity: np.ndarray, idle_seconds: int = 0) -> None:
+        self.velocity = np.asarray(velocity)
+        self.idle_seconds = idle_seconds
+
+    def __len__(self) -> int:
+        return len(self.velocity)
+
+    @classmethod
+    def from_velocity(cls, velocity: Any) -> "DrivingCycle":
+        """
+        Analyse a velocity array, such as the `velocity` channel returned by
+        :meth:`EnergyConsumptionModel.motive_energy_per_km`. The number of
+        idle seconds is read from its `idle seconds` attribute, if any.
+
+        :param velocity: speed of each second, in m/s, as a DataArray
+            or an array of shape (second, ...)
+        :return: summary of the driving cycle
+        """
+        attrs = getattr(velocity, "attrs", {})
+        return cls(np.asarray(velocity), attrs.get("idle seconds", 0))
+
+    @cached_property
+    def speed(self) -> np.ndarray:
+        """Speed of each second, in km/h."""
+        return self.velocity / 1000 * 3600
+
+    @cached_property
+    def acceleration(self) -> np.ndarray:
+        """
+        Acceleration of each second, in m/s2, as the difference between
+        velocity at t_2 and velocity at t_0, divided by 2. Zero at the first
+        and last seconds.
+        """
+        acceleration = np.zeros_like(self.velocity)
+        acceleration[1:-1] = (self.velocity[2:, ...] - self.velocity[:-2, ...]) / 2
+        return acceleration
+
+    @cached_property
+    def driving_time(self) -> np.ndarray:
+        """
+        1 for the seconds before the last second with a positive speed,
+        along the last axis, 0 after.
+        """
+        driving_time = np.zeros_like(self.velocity)
+
+        for i in range(self.velocity.shape[-1]):
+            last_index = np.where(self.velocity[..., i] > 0)[0][-1]
+            driving_time[:last_index, ..., i] = 1
+
+        return driving_time
+
+    @cached_property
+    def moving(self) -> np.ndarray:
+        """Seconds with a positive speed."""
+        return self.velocity > 0
+
+    @cached_property
+    def distance(self) -> np.ndarray:
+        """Distance driven, in km."""
+        return self.speed.sum(axis=0) / 3600
+
+    @cached_property
+    def masks(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Seconds in the urban, suburban and rural speed bins."""
+        return (
+            self.speed <= 50,
+            (self.speed > 50) & (self.speed <= 80),
+            self.speed > 80,
+        )
+
+    @cached_property
+    def shares(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Shares of the distance driven in the urban, suburban and rural speed bins."""
+        total = self.speed.sum(axis=0)
+        return tuple(
+            np.where(mask, self.speed, 0).sum(axis=0) / total for mask in self.masks
+        )
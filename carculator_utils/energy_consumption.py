@@ -6,25 +6,90 @@ and another one for calculating the motive
 energy needs.
 """
 
-import csv
+from functools import lru_cache
 from typing import Any, List, Tuple, Union
 
 import numexpr as ne
 import numpy as np
 import pandas as pd
 import xarray as xr
-import yaml
 from numpy import ndarray
 from xarray import DataArray
 
 from . import DATA_DIR
+from .array import get_precision
+from .assets import load_yaml, read_csv
 from .driving_cycles import (
+    DrivingCycle,
     get_driving_cycle_specs,
     get_standard_driving_cycle_and_gradient,
 )
 
 MONTHLY_AVG_TEMP = "monthly_avg_temp.csv"
 
+# fuel of the efficiency coefficients used for each powertrain
+MAP_PWT = {
+    "ICEV-p": "gasoline",
+    "ICEV-d": "diesel",
+    "HEV-p": "gasoline",
+    "HEV-d": "diesel",
+    "ICEV-g": "compressed gas",
+    "PHEV-c-p": "gasoline",
+    "PHEV-c-d": "diesel",
+    "BEV": "electric",
+    "BEV-depot": "electric",
+    "BEV-opp": "electric",
+    "BEV-motion": "electric",
+    "PHEV-e": "electric",
+    "FCEV": "electric",
+}
+
+# engine load of idling vehicles, also the minimum load
+# at which the auxiliaries are powered
+IDLE_ENGINE_LOAD = 0.05
+
+# per-second results of `EnergyConsumptionModel.motive_energy_per_km`
+ENERGY_CHANNELS = [
+    "rolling resistance",
+    "air resistance",
+    "gradient resistance",
+    "kinetic energy",
+    "motive energy at wheels",
+    "motive energy",
+    "negative motive energy",
+    "recuperated energy",
+    "auxiliary energy",
+    "cooling energy",
+    "heating energy",
+    "battery cooling energy",
+    "battery heating energy",
+    "power load",
+    "transmission efficiency",
+    "engine efficiency",
+    "velocity",
+]
+
+# channels computed per metre, converted to per second
+PER_METRE_CHANNELS = {
+    "rolling resistance",
+    "air resistance",
+    "gradient resistance",
+    "kinetic energy",
+    "motive energy at wheels",
+    "motive energy",
+    "negative motive energy",
+    "recuperated energy",
+}
+
+# channels computed in J, converted to kJ
+ENERGY_CHANNELS_KJ = PER_METRE_CHANNELS | {
+    "auxiliary energy",
+    "cooling energy",
+    "heating energy",
+    "battery cooling energy",
+    "battery heating energy",
+}
+
 
 def _(obj: Union[np.ndarray, xr.DataArray]) -> Union[np.ndarray, xr.DataArray]:
     """Add a trailing dimension to make input arrays broadcast correctly"""
@@ -54,10 +119,89 @@ def get_efficiency_coefficients(vehicle_type: str) -> [Any, None]:
     if not (DATA_DIR / "efficiency" / f"{vehicle_type}.yaml").exists():
         return None
 
-    with open(DATA_DIR / "efficiency" / f"{vehicle_type}.yaml") as f:
-        efficiency_coefficients = yaml.load(f, Loader=yaml.FullLoader)
+    return load_yaml(DATA_DIR / "efficiency" / f"{vehicle_type}.yaml")
+
+
+@lru_cache
+def get_efficiency_tables(
+    vehicle_type: str,
+) -> Union[None, Tuple[list, np.ndarray, dict]]:
+    """
+    Return the efficiency coefficients of a vehicle type as lookup tables:
+    a grid of engine loads common to all fuels and efficiency types, and
+    for each efficiency type ("engine", "transmission"), the efficiency
+    of each fuel at each point of the grid. The grid is the union of
+    the loads of all coefficients, so that linear interpolation gives the
+    same efficiencies as the coefficients themselves.
+
+    :param vehicle_type: "car", "truck", "bus", etc.
+    :return: list of fuels, the grid, and a dictionary {efficiency type: table},
+    or None if there are no efficiency coefficients for the vehicle type
+    """
+    coefficients = get_efficiency_coefficients(vehicle_type)
+
+    if coefficients is None:
+        return None
+
+    fuels = list(coefficients.keys())
+    efficiency_types = ("engine", "transmission")
+
+    loads = {
+        (fuel, efficiency_type): np.fromiter(
+            coefficients[fuel][efficiency_type].keys(), dtype=float
+        )
+        for fuel in fuels
+        for efficiency_type in efficiency_types
+    }
+    grid = np.unique(np.concatenate([[0, 1], *loads.values()]))
+    grid.setflags(write=False)
+
+    tables = {}
+    for efficiency_type in efficiency_types:
+        table = np.stack(
+            [
+                np.interp(
+                    grid,
+                    loads[(fuel, efficiency_type)],
+                    np.fromiter(
+                        coefficients[fuel][efficiency_type].values(), dtype=float
+                    ),
+                )
+                for fuel in fuels
+            ]
+        )
+        table.setflags(write=False)
+        tables[efficiency_type] = table
+
+    return fuels, grid, tables
 
-    return efficiency_coefficients
+
+def interpolate_efficiency(
+    load: np.ndarray,
+    grid: np.ndarray,
+    table: np.ndarray,
+    rows: np.ndarray,
+    segment: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Interpolate efficiencies for several fuels at once. Equivalent to
+    `np.interp(load, grid, table[rows])` for each element, clipped between 0 and 1.
+
+    :param load: engine loads
+    :param grid: engine loads of the lookup table
+    :param table: efficiencies, of shape (..., fuels, len(grid))
+    :param rows: index of the fuel of each element, broadcast against `load`
+    :param segment: index of the point of the grid below each load, if known
+    :return: efficiencies, of shape (..., *load.shape)
+    """
+    if segment is None:
+        segment = np.searchsorted(grid, load, side="right") - 1
+    i = np.clip(segment, 0, len(grid) - 2)
+    weight = np.clip((load - grid[i]) / (grid[i + 1] - grid[i]), 0, 1)
+
+    return np.clip(
+        table[..., rows, i] * (1 - weight) + table[..., rows, i + 1] * weight, 0, 1
+    )
 
 
 def get_country_temperature(country):
@@ -67,27 +211,24 @@ def get_country_temperature(country):
     :return:
     """
 
-    with open(DATA_DIR / MONTHLY_AVG_TEMP) as f:
-        reader = csv.reader(f, delimiter=";")
-        for row in reader:
-            if row[2] == country:
-                return np.array([float(i) for i in row[3:]])
+    for row in read_csv(DATA_DIR / MONTHLY_AVG_TEMP):
+        if row[2] == country:
+            return np.array([float(i) for i in row[3:]])
 
     print(
         f"Could not find monthly average temperature series for {country}. "
         f"Uses those for CH instead."
     )
 
-    with open(DATA_DIR / MONTHLY_AVG_TEMP) as f:
-        reader = csv.reader(f, delimiter=";")
-        for row in reader:
-            if row[2] == "CH":
-                return np.array([int(i) for i in row[3:]])
+    for row in read_csv(DATA_DIR / MONTHLY_AVG_TEMP):
+        if row[2] == "CH":
+            return np.array([int(i) for i in row[3:]])
 
 
-def convert_to_xr(data):
+def convert_to_xr(data, idle_seconds=0, channels=None):
     return xr.DataArray(
         data,
+        attrs={"idle seconds": idle_seconds},
         dims=["second", "value", "year", "powertrain", "size", "parameter"],
         coords={
             "second": range(0, data.shape[0]),
@@ -95,25 +236,7 @@ def convert_to_xr(data):
             "year": range(0, data.shape[2]),
             "powertrain": range(0, data.shape[3]),
             "size": range(0, data.shape[4]),
-            "parameter": [
-                "rolling resistance",
-                "air resistance",
-                "gradient resistance",
-                "kinetic energy",
-                "motive energy at wheels",
-                "motive energy",
-                "negative motive energy",
-                "recuperated energy",
-                "auxiliary energy",
-                "cooling energy",
-                "heating energy",
-                "battery cooling energy",
-                "battery heating energy",
-                "power load",
-                "transmission efficiency",
-                "engine efficiency",
-                "velocity",
-            ],
+            "parameter": list(channels or ENERGY_CHANNELS),
         },
     )
 
@@ -198,18 +321,43 @@ class EnergyConsumptionModel:
             self.gradient
         ), "The length of the driving_cycles and the gradient must be the same."
 
+        # cycles are padded to the length of the longest cycle of the file:
+        # only keep the seconds up to the end of the longest selected cycle,
+        # plus the deceleration to a stop and a last idle second.
+        # The number of idle seconds trimmed is kept for the emission models.
+        self.idle_seconds = 0
+        driving = (np.nan_to_num(self.cycle) > 0).any(axis=1)
+        if driving.any():
+            duration = min(len(self.cycle), np.nonzero(driving)[0][-1] + 3)
+            self.idle_seconds = len(self.cycle) - duration
+            self.cycle = self.cycle[:duration]
+            self.gradient = self.gradient[:duration]
+
         # Unit conversion km/h to m/s
         self.velocity = np.where(np.isnan(self.cycle), 0, (self.cycle * 1000) / 3600)
         self.velocity = self.velocity[:, None, None, None, :]
-        self.driving_time = self.find_last_driving_second()
+
+        # follow the precision policy, if any, to avoid up-casts
+        if get_precision() is not None:
+            self.velocity = self.velocity.astype(get_precision())
+            self.gradient = np.asarray(self.gradient, dtype=get_precision())
+
+        # the cycle is analysed once, and its summary
+        # is passed on to the emission models
+        self.driving_cycle = DrivingCycle(self.velocity, self.idle_seconds)
+        self.driving_time = self.driving_cycle.driving_time
 
         # Model acceleration as difference in velocity between
         # time steps (1 second)
         # Zero at first value
-        self.acceleration = np.zeros_like(self.velocity)
-        self.acceleration[1:-1] = (self.velocity[2:, ...] - self.velocity[:-2, ...]) / 2
+        self.acceleration = self.driving_cycle.acceleration
 
         self.efficiency_coefficients = get_efficiency_coefficients(vehicle_type)
+        self.efficiency_tables = get_efficiency_tables(vehicle_type)
+        # number of iterations of the engine load solver, per vehicle
+        self.solver_iterations = None
+        # sums over the cycle of the last results of `motive_energy_per_km`
+        self.energy_totals = None
 
         self.ambient_temperature = ambient_temperature
         self.indoor_temperature = indoor_temperature
@@ -298,17 +446,7 @@ class EnergyConsumptionModel:
         Find the last second of the driving_cycles that is not zero.
         """
 
-        # find last index where velocity is greater than 0
-        # along the last axis of self.velocity
-        # let's iterate through the last axis of self.velocity
-        # and find the last index where velocity is greater than 0
-        driving_time = np.zeros_like(self.velocity)
-
-        for i in range(self.velocity.shape[-1]):
-            last_index = np.where(self.velocity[..., i] > 0)[0][-1]
-            driving_time[:last_index, ..., i] = 1
-
-        return driving_time
+        return self.driving_cycle.driving_time
 
     def aux_energy_per_km(
         self,
@@ -378,56 +516,239 @@ class EnergyConsumptionModel:
 
         return auxiliary_energy
 
+    def get_efficiency_rows(self) -> ndarray:
+        """
+        Return, for each powertrain, the row of its fuel
+        in the efficiency lookup tables, or -1 if there is none.
+        """
+        fuels = self.efficiency_tables[0] if self.efficiency_tables else []
+
+        return np.array(
+            [
+                fuels.index(MAP_PWT[pwt]) if MAP_PWT.get(pwt) in fuels else -1
+                for pwt in self.powertrains
+            ]
+        )
+
     def calculate_efficiency(
         self,
         efficiency: xr.DataArray,
         engine_load: xr.DataArray,
         efficiency_type: str,
     ) -> xr.DataArray:
-        if self.efficiency_coefficients is None:
+        if self.efficiency_tables is None:
             return xr.where(efficiency == 0, 1, efficiency)
 
-        # Calculate efficiency based on engine load
-        pwts = {
-            "ICEV-p": "gasoline",
-            "ICEV-d": "diesel",
-            "HEV-p": "gasoline",
-            "HEV-d": "diesel",
-            "ICEV-g": "compressed gas",
-            "PHEV-c-p": "gasoline",
-            "PHEV-c-d": "diesel",
-            "BEV": "electric",
-            "BEV-depot": "electric",
-            "BEV-opp": "electric",
-            "BEV-motion": "electric",
-            "PHEV-e": "electric",
-            "FCEV": "electric",
-        }
+        # Calculate efficiency based on engine load,
+        # for all powertrains at once
+        _, grid, tables = self.efficiency_tables
+        table = tables[efficiency_type]
+        rows = self.get_efficiency_rows()
+        mapped = rows >= 0
+
+        efficiency[:, :, :, mapped] = interpolate_efficiency(
+            engine_load[:, :, :, mapped],
+            grid,
+            table,
+            rows[mapped][:, None],
+        )
 
-        # Calculate efficiency based on engine load
-        for p, pwt in enumerate(self.powertrains):
-            if pwt not in pwts:
-                continue
+        return efficiency
 
-            efficiency[:, :, :, p] = np.clip(
-                np.interp(
-                    engine_load[:, :, :, p],
-                    np.fromiter(
-                        self.efficiency_coefficients[pwts[pwt]][efficiency_type].keys(),
-                        dtype=float,
-                    ),
-                    np.fromiter(
-                        self.efficiency_coefficients[pwts[pwt]][
-                            efficiency_type
-                        ].values(),
-                        dtype=float,
-                    ),
-                ),
-                0.00,
-                1.0,
+    def solve_engine_load(
+        self,
+        motive_energy_at_wheels: ndarray,
+        engine_power: Union[xr.DataArray, np.array],
+        engine_efficiency: Union[xr.DataArray, np.array],
+        transmission_efficiency: Union[xr.DataArray, np.array],
+        tolerance: float = 1e-6,
+        max_iterations: int = 50,
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """
+        Find, for each second and each vehicle, the engine load consistent
+        with the engine and transmission efficiencies at that load:
+
+        .. math::
+
+            L = \\min\\left(\\frac{E v}{P \\eta_{engine}(L) \\eta_{transmission}(L)}, 1\\right)
+
+        where :math:`E` is the motive energy at the wheels (divided by the fuel
+        cell system efficiency), :math:`v` the velocity and :math:`P` the engine
+        power. The engine load is 5% when the vehicle idles, and 0 after
+        the last driving second.
+
+        The root is first bracketed between two consecutive points of
+        the efficiency lookup tables, where the efficiencies are linear in
+        the engine load, and then found with Newton's method, falling back on
+        bisection when a step leaves the bracket. Each element stops
+        iterating once a step is smaller than `tolerance`. The number of
+        iterations used by each vehicle is stored in `self.solver_iterations`.
+
+        :param motive_energy_at_wheels: array of shape (seconds, value, year, powertrain, size)
+        :param engine_power: engine power, in kW
+        :param engine_efficiency: engine efficiency, used for powertrains
+        without efficiency coefficients
+        :param transmission_efficiency: transmission efficiency, used for
+        powertrains without efficiency coefficients
+        :param tolerance: tolerance on the engine load
+        :param max_iterations: maximum number of iterations
+        :return: engine load, engine efficiency and transmission efficiency,
+        of the shape of `motive_energy_at_wheels`
+        """
+
+        _c = lambda x: x.values if isinstance(x, xr.DataArray) else x
+        _o = lambda x: np.where(x == 0, 1, x)
+        _t = lambda x: (
+            x.T if np.shape(x)[-4:] != motive_energy_at_wheels.shape[-4:] else x
+        )
+
+        shape = motive_energy_at_wheels.shape
+        engine_efficiency = _t(_c(engine_efficiency))
+        transmission_efficiency = _t(_c(transmission_efficiency))
+
+        if self.efficiency_tables is None:
+            engine_efficiency = _o(engine_efficiency)
+            transmission_efficiency = _o(transmission_efficiency)
+
+        # engine load at an efficiency of 1
+        load = np.clip(
+            motive_energy_at_wheels / (_o(_c(engine_power)).T * 1000) * self.velocity,
+            0,
+            None,
+        )
+
+        rows = np.broadcast_to(self.get_efficiency_rows()[:, None], shape[-2:])
+        mapped = np.broadcast_to(rows >= 0, shape)
+
+        # without efficiency coefficients, the efficiencies
+        # do not depend on the engine load
+        engine_load = np.ascontiguousarray(
+            np.minimum(load / (_o(engine_efficiency) * _o(transmission_efficiency)), 1)
+        )
+
+        solve = np.flatnonzero(mapped & (self.velocity > 0) & (self.driving_time > 0))
+        iterations = np.zeros(shape, dtype=int)
+
+        if len(solve) > 0:
+            # engine and transmission efficiencies are linear
+            # between two consecutive points of the grid
+            _, grid, tables = self.efficiency_tables
+            engine_table, transmission_table = (
+                tables["engine"],
+                tables["transmission"],
+            )
+            efficiency = _o(np.clip(engine_table, 0, 1)) * _o(
+                np.clip(transmission_table, 0, 1)
             )
 
-        return efficiency
+            k = load.ravel()[solve]
+            fuel = rows.ravel()[solve % rows.size]
+
+            # locate the first point of the grid where the residual is
+            # positive, i.e., where L * efficiency(L) >= K. The running maximum
+            # makes the search valid for non-monotonic efficiencies
+            power = np.maximum.accumulate(grid * efficiency, axis=1)
+            point = np.searchsorted(
+                (power + 2 * np.arange(len(power))[:, None]).ravel(),
+                k + 2 * fuel,
+            ) - fuel * len(grid)
+
+            # the root is at a point of the grid
+            root = grid[np.clip(point, 0, len(grid) - 1)]
+            count = np.zeros(len(solve), dtype=int)
+
+            # otherwise, it is bracketed between the previous point and this one,
+            # where L * efficiency(L) - K is a polynomial: solve it with
+            # Newton's method, falling back on bisection outside the bracket
+            segment = np.clip(point - 1, 0, len(grid) - 2)
+            active = np.flatnonzero((point > 0) & (point < len(grid)))
+            i, k, row = segment[active], k[active], fuel[active]
+
+            a, b = grid[i], grid[i + 1]
+            f_a = a * efficiency[row, i] - k
+            f_b = b * efficiency[row, i + 1] - k
+
+            # efficiencies at the lower bound, and their slopes
+            e_0, t_0 = engine_table[row, i], transmission_table[row, i]
+            e_1 = (engine_table[row, i + 1] - e_0) / (b - a)
+            t_1 = (transmission_table[row, i + 1] - t_0) / (b - a)
+            lower = a.copy()
+
+            x = a - f_a * (b - a) / (f_b - f_a)
+
+            for _ in range(max_iterations):
+                if len(active) == 0:
+                    break
+
+                count[active] += 1
+
+                e = np.clip(e_0 + e_1 * (x - lower), 0, 1)
+                t = np.clip(t_0 + t_1 * (x - lower), 0, 1)
+                de = np.where((e > 0) & (e < 1), e_1, 0)
+                dt = np.where((t > 0) & (t < 1), t_1, 0)
+                e, t = _o(e), _o(t)
+                f = x * e * t - k
+                df = e * t + x * (de * t + e * dt)
+
+                a = np.where(f < 0, x, a)
+                b = np.where(f > 0, x, b)
+
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    step = x - f / df
+                step = np.where(
+                    (step > a) & (step < b) & (f != 0),
+                    step,
+                    np.where(f == 0, x, (a + b) / 2),
+                )
+                done = np.abs(step - x) <= tolerance
+                x = step
+
+                if done.any():
+                    root[active[done]] = x[done]
+                    keep = ~done
+                    active, x, a, b, k, e_0, e_1, t_0, t_1, lower = (
+                        y[keep] for y in (active, x, a, b, k, e_0, e_1, t_0, t_1, lower)
+                    )
+
+            root[active] = x
+            engine_load.reshape(-1)[solve] = root
+            iterations.reshape(-1)[solve] = count
+
+        # add a minimum 5% engine load when the vehicle is idling
+        engine_load = np.where(self.velocity == 0, IDLE_ENGINE_LOAD, engine_load)
+        engine_load *= self.driving_time
+
+        self.solver_iterations = iterations.max(axis=0)
+
+        if self.efficiency_tables is not None:
+            _, grid, tables = self.efficiency_tables
+            table = np.stack([tables["engine"], tables["transmission"]])
+
+            # efficiencies of idling and stopped vehicles
+            idle = interpolate_efficiency(
+                np.array([0, IDLE_ENGINE_LOAD]).reshape(2, *[1] * rows.ndim),
+                grid,
+                table,
+                rows,
+            ).reshape(2, 2, *[1] * (len(shape) - rows.ndim), *rows.shape)
+            efficiencies = np.where(engine_load > 0, idle[:, 1], idle[:, 0])
+
+            # and of driving vehicles, whose grid segment is known
+            if len(solve) > 0:
+                efficiencies.reshape(2, -1)[:, solve] = interpolate_efficiency(
+                    root, grid, table, fuel, segment
+                )
+
+            engine_efficiency = np.where(mapped, efficiencies[0], engine_efficiency)
+            transmission_efficiency = np.where(
+                mapped, efficiencies[1], transmission_efficiency
+            )
+
+        return (
+            engine_load,
+            np.broadcast_to(engine_efficiency, shape),
+            np.broadcast_to(transmission_efficiency, shape),
+        )
 
     def motive_energy_per_km(
         self,
@@ -451,6 +772,9 @@ class EnergyConsumptionModel:
         heat_pump_cop_heating: Union[xr.DataArray, np.array] = None,
         cooling_consumption: Union[xr.DataArray, np.array] = None,
         heating_consumption: Union[xr.DataArray, np.array] = None,
+        tolerance: float = 1e-6,
+        max_iterations: int = 50,
+        channels: List[str] = None,
     ) -> DataArray:
         """
         Calculate energy used and recuperated for a given vehicle per km driven.
@@ -461,6 +785,11 @@ class EnergyConsumptionModel:
         :param frontal_area: Frontal area of vehicle (m2)
         :param sizes: size classes of the vehicles
         :param electric_motor_power: Electric motor power (watts). Optional.
+        :param tolerance: tolerance on the engine load, see :meth:`solve_engine_load`
+        :param max_iterations: maximum number of iterations of the engine load solver
+        :param channels: channels to return, among :data:`ENERGY_CHANNELS`. All of them by default.
+        Channels not requested are not computed. The sums over the cycle of the channels
+        returned are stored in `self.energy_totals`.
         :returns: net motive energy (in kJ/km)
 
         Power to overcome rolling resistance is calculated by:
@@ -485,7 +814,7 @@ class EnergyConsumptionModel:
         """
 
         _c = lambda x: x.values if isinstance(x, xr.DataArray) else x
-        _o = lambda x: np.where((x == 0) | (x == np.nan), 1, x)
+        _o = lambda x: np.where(x == 0, 1, x)
 
         # Calculate the energy used for each second of the drive cycle
         ones = np.ones_like(self.velocity)
@@ -515,95 +844,73 @@ class EnergyConsumptionModel:
         motive_energy = np.zeros_like(motive_energy_at_wheels)
 
         # determining efficiencies
-        engine_load = np.ones_like(motive_energy_at_wheels)
-
         if engine_efficiency is None:
             engine_efficiency = np.ones_like(motive_energy_at_wheels)
 
         if transmission_efficiency is None:
             transmission_efficiency = np.ones_like(motive_energy_at_wheels)
 
-        engine_load_iterations = [0, engine_load.mean()]
-
-        # we loop while the last three iterations are roughly equal
-        # or while len(engine_load_iterations) < 10
-
-        while len(engine_load_iterations) < 10:
-            engine_efficiency = self.calculate_efficiency(
-                engine_efficiency, engine_load, "engine"
-            )
+        recuperation_efficiency = xr.where(
+            recuperation_efficiency == 0, 1, recuperation_efficiency
+        )
 
-            transmission_efficiency = self.calculate_efficiency(
-                transmission_efficiency, engine_load, "transmission"
-            )
+        if fuel_cell_system_efficiency is None:
+            fuel_cell_system_efficiency = np.ones_like(motive_energy_at_wheels)
 
-            recuperation_efficiency = xr.where(
-                recuperation_efficiency == 0, 1, recuperation_efficiency
-            )
+        fuel_cell_system_efficiency = xr.where(
+            fuel_cell_system_efficiency == 0, 1, fuel_cell_system_efficiency
+        )
 
-            if fuel_cell_system_efficiency is None:
-                fuel_cell_system_efficiency = np.ones_like(engine_efficiency)
+        _t = lambda x: (
+            x.T if x.shape[-4:] != motive_energy_at_wheels.shape[-4:] else x
+        )
+        fuel_cell_system_efficiency = _t(_o(_c(fuel_cell_system_efficiency)))
+
+        # engine load, and engine and transmission efficiencies at that load
+        (
+            engine_load,
+            engine_efficiency,
+            transmission_efficiency,
+        ) = self.solve_engine_load(
+            np.asarray(motive_energy_at_wheels) / fuel_cell_system_efficiency,
+            engine_power,
+            engine_efficiency,
+            transmission_efficiency,
+            tolerance=tolerance,
+            max_iterations=max_iterations,
+        )
 
-            fuel_cell_system_efficiency = xr.where(
-                fuel_cell_system_efficiency == 0, 1, fuel_cell_system_efficiency
-            )
+        motive_energy = motive_energy_at_wheels / (
+            _o(engine_efficiency)
+            * _o(transmission_efficiency)
+            * fuel_cell_system_efficiency
+        )
 
-            _t = lambda x: (
-                x.T if x.shape[-4:] != motive_energy_at_wheels.shape[-4:] else x
-            )
+        @lru_cache
+        def negative_motive_energy():
+            return xr.where(total_resistance > 0, 0, total_resistance)
 
-            motive_energy = motive_energy_at_wheels / (
-                _t(_o(_c(engine_efficiency)))
-                * _t(_o(_c(transmission_efficiency)))
-                * _t(_o(_c(fuel_cell_system_efficiency)))
+        def recuperated_energy():
+            return (
+                negative_motive_energy()
+                * _c(recuperation_efficiency).T[None, ...]
+                * _c(battery_charge_eff).T[None, ...]
+                * _c(battery_discharge_eff).T[None, ...]
+                * (_c(electric_motor_power).T[None, ...] > 0)
             )
 
-            engine_load = np.clip(
-                (motive_energy / (_o(_c(engine_power)).T * 1000)) * self.velocity, 0, 1
+        @lru_cache
+        def auxiliary_energy():
+            # the auxiliaries are powered at no less than the idle engine load:
+            # below it, efficiencies tend to 0 and the energy would diverge
+            auxiliary_efficiency = self.calculate_efficiency(
+                np.array(engine_efficiency),
+                np.maximum(engine_load, IDLE_ENGINE_LOAD),
+                "engine",
             )
-
-            # add a minimum 5% engine load when the vehicle is idling
-            engine_load = np.where(self.velocity == 0, 0.05, engine_load)
-            engine_load *= self.driving_time
-            engine_load_iterations.append(engine_load.mean())
-
-        negative_motive_energy = xr.where(total_resistance > 0, 0, total_resistance)
-        recuperated_energy = (
-            negative_motive_energy
-            * _c(recuperation_efficiency).T[None, ...]
-            * _c(battery_charge_eff).T[None, ...]
-            * _c(battery_discharge_eff).T[None, ...]
-            * (_c(electric_motor_power).T[None, ...] > 0)
-        )
-
-        if hvac_power is None:
-            auxiliary_energy = self.aux_energy_per_km(
+            energy = self.aux_energy_per_km(
                 aux_power,
-                engine_efficiency,
-                hvac_power,
-                battery_cooling_unit,
-                battery_heating_unit,
-                heat_pump_cop_cooling,
-                heat_pump_cop_heating,
-                cooling_consumption,
-                heating_consumption,
-            )
-            cooling_energy, heating_energy, battery_cooling, battery_heating = (
-                np.zeros_like(auxiliary_energy),
-                np.zeros_like(auxiliary_energy),
-                np.zeros_like(auxiliary_energy),
-                np.zeros_like(auxiliary_energy),
-            )
-        else:
-            (
-                auxiliary_energy,
-                cooling_energy,
-                heating_energy,
-                battery_cooling,
-                battery_heating,
-            ) = self.aux_energy_per_km(
-                aux_power,
-                engine_efficiency,
+                auxiliary_efficiency,
                 hvac_power,
                 battery_cooling_unit,
                 battery_heating_unit,
@@ -612,62 +919,78 @@ class EnergyConsumptionModel:
                 cooling_consumption,
                 heating_consumption,
             )
+            if hvac_power is None:
+                energy = (energy, *[np.zeros_like(energy)] * 4)
 
-        auxiliary_energy = np.where(self.velocity > 0, auxiliary_energy, 0)
+            energy = (np.where(self.velocity > 0, energy[0], 0), *energy[1:])
 
-        # if first dimension is 1, resize it to the length of the driving_cycles
-        if auxiliary_energy.shape[0] == 1:
-            auxiliary_energy = np.resize(
-                auxiliary_energy, (self.velocity.shape[0], *auxiliary_energy.shape[1:])
-            )
-        if transmission_efficiency.shape[0] != self.velocity.shape[0]:
-            transmission_efficiency = transmission_efficiency.T.values[None, ...]
-            transmission_efficiency = np.resize(
-                transmission_efficiency,
-                (self.velocity.shape[0], *transmission_efficiency.shape[1:]),
-            )
-        if engine_efficiency.shape[0] != self.velocity.shape[0]:
-            engine_efficiency = engine_efficiency.T.values[None, ...]
-            engine_efficiency = np.resize(
-                engine_efficiency,
-                (self.velocity.shape[0], *engine_efficiency.shape[1:]),
-            )
-
-        all_arrays = np.concatenate(
-            [
-                _(rolling_resistance),
-                _(air_resistance),
-                _(gradient_resistance),
-                _(inertia),
-                _(motive_energy_at_wheels),
-                _(motive_energy),
-                _(negative_motive_energy),
-                _(recuperated_energy),
-                _(auxiliary_energy),
-                _(cooling_energy),
-                _(heating_energy),
-                _(battery_cooling),
-                _(battery_heating),
-                _(engine_load),
-                _(transmission_efficiency),
-                _(engine_efficiency),
-                _(self.velocity * np.ones_like(motive_energy)),
-            ],
-            axis=-1,
-        )
-
-        all_arrays[..., :-4] /= 1000
-        all_arrays[..., :-9] *= _(self.velocity)
+            # if first dimension is 1, resize it to the length of the driving_cycles
+            if energy[0].shape[0] == 1:
+                energy = (
+                    np.resize(
+                        energy[0], (self.velocity.shape[0], *energy[0].shape[1:])
+                    ),
+                    *energy[1:],
+                )
+
+            return energy
+
+        # each channel is only computed if requested
+        results = {
+            "rolling resistance": lambda: rolling_resistance,
+            "air resistance": lambda: air_resistance,
+            "gradient resistance": lambda: gradient_resistance,
+            "kinetic energy": lambda: inertia,
+            "motive energy at wheels": lambda: motive_energy_at_wheels,
+            "motive energy": lambda: motive_energy,
+            "negative motive energy": negative_motive_energy,
+            "recuperated energy": recuperated_energy,
+            "auxiliary energy": lambda: auxiliary_energy()[0],
+            "cooling energy": lambda: auxiliary_energy()[1],
+            "heating energy": lambda: auxiliary_energy()[2],
+            "battery cooling energy": lambda: auxiliary_energy()[3],
+            "battery heating energy": lambda: auxiliary_energy()[4],
+            "power load": lambda: engine_load,
+            "transmission efficiency": lambda: transmission_efficiency,
+            "engine efficiency": lambda: engine_efficiency,
+            "velocity": lambda: self.velocity,
+        }
 
-        all_arrays[..., 5] = np.where(
-            all_arrays[..., 5] > _(engine_power).T * 1,
-            _(engine_power).T * 1,
-            all_arrays[..., 5],
-        )
-        all_arrays[..., 7] = np.where(
-            all_arrays[..., 7] < _(electric_motor_power).T * -1,
-            _(electric_motor_power).T * -1,
-            all_arrays[..., 7],
-        )
+        channels = list(channels or ENERGY_CHANNELS)
+        if set(channels) - set(ENERGY_CHANNELS):
+            raise ValueError(
+                f"Unknown channels: {sorted(set(channels) - set(ENERGY_CHANNELS))}."
+            )
 
-        return convert_to_xr(all_arrays).fillna(0)
+        energy = np.empty((*np.shape(motive_energy), len(channels)), get_precision())
+
+        for c, channel in enumerate(channels):
+            energy[..., c] = results[channel]()
+
+            # energy channels, from J to kJ
+            if channel in ENERGY_CHANNELS_KJ:
+                energy[..., c] /= 1000
+            # and from per meter to per second
+            if channel in PER_METRE_CHANNELS:
+                energy[..., c] *= self.velocity
+
+            if channel == "motive energy":
+                energy[..., c] = np.where(
+                    energy[..., c] > _(engine_power).T * 1,
+                    _(engine_power).T * 1,
+                    energy[..., c],
+                )
+            if channel == "recuperated energy":
+                energy[..., c] = np.where(
+                    energy[..., c] < _(electric_motor_power).T * -1,
+                    _(electric_motor_power).T * -1,
+                    energy[..., c],
+                )
+
+        energy[np.isnan(energy)] = 0
+        energy = convert_to_xr(energy, self.idle_seconds, channels)
+
+        # sums over the cycle, for consumers that do not need every second
+        self.energy_totals = energy.sum(dim="second", skipna=False)
+
+        return energy
@@ -9,16 +9,19 @@ import io
 import json
 import os
 import uuid
-from typing import Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
 
-import bw2io
 import numpy as np
 import pyprind
 import xarray as xr
-import yaml
-from bw2io.export.excel import create_valid_worksheet_name, safe_filename, xlsxwriter
 
 from . import DATA_DIR, __version__
+from .assets import load_yaml, read_csv
+
+# bw2io (and xlsxwriter, through it) takes seconds to import:
+# it is imported when an inventory is exported, not with the package
+if TYPE_CHECKING:
+    import bw2io
 
 
 def load_inventories() -> list[dict]:
@@ -28,6 +31,9 @@ def load_inventories() -> list[dict]:
     filepath = DATA_DIR / "lci" / "lci-premise_carculator_db.xlsx"
     if not filepath.is_file():
         raise FileNotFoundError("The database of inventories could not be found.")
+
+    import bw2io
+
     lci = bw2io.ExcelImporter(filepath)
     references = {
         lci.data[i]["name"]: {
@@ -53,8 +59,7 @@ def load_mapping(
         raise FileNotFoundError(
             "The dictionary of activities flows match " "could not be found."
         )
-    with open(filepath, encoding="utf-8") as f:
-        csv_list = [[val.strip() for val in r.split(";")] for r in f.readlines()]
+    csv_list = [[val.strip() for val in r] for r in read_csv(filepath)]
     (_, _, *header), *data = csv_list
 
     dict_map = {}
@@ -122,14 +127,7 @@ def get_simapro_subcompartments() -> Dict[str, str]:
             "between ecoinvent and Simapro could not be found."
         )
 
-    # read YAML file
-    with open(filepath, "r") as stream:
-        try:
-            data = yaml.safe_load(stream)
-        except yaml.YAMLError as exc:
-            print(exc)
-
-    return data
+    return load_yaml(filepath)
 
 
 def get_simapro_biosphere() -> Dict[str, str]:
@@ -157,8 +155,7 @@ def get_simapro_technosphere() -> Dict[Tuple[str, str], str]:
 
     filename = "simapro-technosphere-3.5.csv"
     filepath = DATA_DIR / "export" / filename
-    with open(filepath, encoding="utf-8") as f:
-        csv_list = [[val.strip() for val in r.split(";")] for r in f.readlines()]
+    csv_list = [[val.strip() for val in r] for r in read_csv(filepath)]
     (_, _, *header), *data = csv_list
 
     dict_tech = {}
@@ -174,10 +171,7 @@ def rename_mapping(filename: str) -> Dict[str, str]:
     """
     Load the file rename_powertrains.yaml and return a dictionary
     """
-    with open(DATA_DIR / "export" / filename, encoding="utf-8") as f:
-        rename_map = yaml.safe_load(f)
-
-    return rename_map
+    return load_yaml(DATA_DIR / "export" / filename)
 
 
 class ExportInventory:
@@ -243,8 +237,11 @@ class ExportInventory:
 
         list_act = []
 
+        # products x activities matrix for the year considered
+        matrix = self.array[0, :, :, idx_year]
+
         # List of coordinates for non-zero values
-        non_zeroes = np.nonzero(self.array[0, :, :, idx_year])
+        non_zeroes = np.nonzero(matrix)
         # List of coordinates where activities present more than once
         # (to filter out "empty" activities, that is,
         # activities with only one reference product exchange)
@@ -272,9 +269,9 @@ class ExportInventory:
                 if tuple_output[0] in blacklist.get(ecoinvent_version, []):
                     continue
 
-                if len(self.array[:, row, col, idx_year]) == 1:
+                if self.array.shape[0] == 1:
                     # No uncertainty, only one value
-                    amount = self.array[0, row, col, idx_year] * mult_factor
+                    amount = matrix[row, col] * mult_factor
 
                 else:
                     raise ValueError(
@@ -464,16 +461,10 @@ class ExportInventory:
     ) -> List[List]:
         # not all biosphere flows exist in simapro
         # load list from `simapro_blacklist.yaml`
-        with open(
-            DATA_DIR / "export" / "simapro_blacklist.yaml", "r", encoding="utf-8"
-        ) as f:
-            blacklist = yaml.safe_load(f)
+        blacklist = load_yaml(DATA_DIR / "export" / "simapro_blacklist.yaml")
 
         # load fields list from `simapro_fields.yaml`
-        with open(
-            DATA_DIR / "export" / "simapro_fields.yaml", "r", encoding="utf-8"
-        ) as f:
-            fields = yaml.safe_load(f)
+        fields = load_yaml(DATA_DIR / "export" / "simapro_fields.yaml")
 
         dict_tech = get_simapro_technosphere()
         dict_bio = get_simapro_biosphere()
@@ -988,6 +979,8 @@ class ExportInventory:
         filename: str = None,
         export_format: str = "file",
     ):
+        from bw2io.export.excel import safe_filename
+
         for year in self.vm.array.coords["year"].values:
             filename = filename or safe_filename(
                 f"carculator_export_{datetime.date.today()}"
@@ -1034,7 +1027,7 @@ class ExportInventory:
         directory: str = None,
         filename: str = None,
         export_format: str = "file",
-    ) -> Union[bytes, str, bw2io.importers.base_lci.LCIImporter]:
+    ) -> Union[bytes, str, "bw2io.importers.base_lci.LCIImporter"]:
         """
         Export a file that can be consumed by the software defined in
         `software_compatibility`.
@@ -1056,6 +1049,13 @@ class ExportInventory:
         :rtype: str
         """
 
+        import bw2io
+        from bw2io.export.excel import (
+            create_valid_worksheet_name,
+            safe_filename,
+            xlsxwriter,
+        )
+
         importers = []
 
         for year in self.vm.array.coords["year"].values:
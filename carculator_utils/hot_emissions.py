@@ -3,16 +3,17 @@ hot_emissions.py contains HotEmissionModel
 which calculates fuel-related exhaust emissions.
 """
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List, Union
+from typing import Any, List, Tuple, Union
 
 import numpy as np
-import pandas as pd
 import xarray as xr
-import yaml
 from xarray import DataArray
 
 from . import DATA_DIR
+from .assets import load_yaml, read_dataframe
+from .driving_cycles import DrivingCycle
 
 FILEPATH_DC_SPECS = DATA_DIR / "driving_cycles" / "dc_specs.yaml"
 
@@ -36,6 +37,15 @@ MAP_PWT = {
 }
 
 
+# manual calibration of N2O and NH3 emissions, which
+# do not correlate with fuel consumption, per vehicle type
+CALIBRATION = {
+    "car": (np.multiply, {"Dinitrogen oxide": 0.5, "Ammonia": 0.5}),
+    "truck": (np.multiply, {"Dinitrogen oxide": 10, "Ammonia": 10}),
+    "bus": (np.divide, {"Dinitrogen oxide": 15, "Ammonia": 12}),
+}
+
+
 def _(obj: Union[np.ndarray, xr.DataArray]) -> Union[np.ndarray, xr.DataArray]:
     """Add a trailing dimension to make input arrays broadcast correctly"""
     if isinstance(obj, (np.ndarray, xr.DataArray)):
@@ -43,13 +53,16 @@ def _(obj: Union[np.ndarray, xr.DataArray]) -> Union[np.ndarray, xr.DataArray]:
     return obj
 
 
+@lru_cache
 def get_emission_factors(filepath) -> [Any, None]:
     """Hot emissions factors extracted for passenger cars from HBEFA 4.1
     detailed by size, powertrain and EURO class for each substance.
+    The factors are read once per process: they must not be modified
+    in place by the caller.
     """
 
     try:
-        df = pd.read_csv(filepath, sep=",")
+        df = read_dataframe(filepath, sep=",")
         cols = ["powertrain", "component"]
 
         if "euro_class" in df.columns:
@@ -68,6 +81,68 @@ def get_emission_factors(filepath) -> [Any, None]:
     return ef.fillna(0.0)
 
 
+def _select(
+    ef: xr.DataArray,
+    powertrains: List[str],
+    sizes: Tuple[str, ...],
+    dims: Tuple[str, ...],
+    **indexers,
+) -> np.ndarray:
+    """
+    Select emission factors for the powertrains, sizes and other `indexers`
+    given, and return them as an array of dimensions `dims`. Factors that
+    do not depend on the size are repeated for each size.
+    """
+    ef = ef.sel(powertrain=powertrains, **indexers)
+    ef = ef.assign_coords({"powertrain": np.arange(len(powertrains))})
+
+    if "size" in ef.dims:
+        ef = ef.sel(size=list(sizes))
+    else:
+        ef = ef.expand_dims({"size": len(sizes)})
+
+    return ef.transpose(*dims).values
+
+
+@lru_cache
+def get_degradation_table(
+    vehicle_type: str, euro_class: Tuple[float, ...], powertrains: Tuple[str, ...]
+) -> [Tuple[np.ndarray, List[str], List[str]], None]:
+    """
+    Mileage degradation factors of CO, HC and NOx from HBEFA 4.1,
+    of dimensions (euro_class, powertrain, component). Only the powertrains
+    with degradation factors are included.
+    The table is built once per process for each combination of arguments:
+    the array must not be modified by the caller.
+
+    :return: factors, powertrains and components of the table, or None
+        if the vehicle type has no degradation factors.
+    """
+
+    corr = get_emission_factors(
+        filepath=DATA_DIR / "emission_factors" / vehicle_type / f"degradation_EF.csv",
+    )
+
+    if corr is None:
+        return None
+
+    corr = corr.fillna(1.0)
+
+    corr = corr.sel(
+        powertrain=[p for p in powertrains if p in corr.powertrain.values],
+        euro_class=list(euro_class),
+    )
+
+    corr = corr.transpose("euro_class", "powertrain", "component")
+
+    # the same factors apply from 0 km to the maximum mileage
+    # of the vehicle type, and factors are at least 1
+    factors = np.where(corr < 1, 1.0, corr)
+    factors.setflags(write=False)
+
+    return factors, list(corr.powertrain.values), list(corr.component.values)
+
+
 def get_mileage_degradation_factor(
     lifetime_km: xr.DataArray,
     euro_class: List[int],
@@ -81,49 +156,149 @@ def get_mileage_degradation_factor(
     :return:
     """
 
-    corr = get_emission_factors(
-        filepath=DATA_DIR / "emission_factors" / vehicle_type / f"degradation_EF.csv",
+    table = get_degradation_table(
+        vehicle_type,
+        tuple(euro_class),
+        tuple(str(p) for p in lifetime_km.powertrain.values),
     )
 
-    if corr is None:
+    if table is None:
         return None
 
-    corr = corr.fillna(1.0)
-    corr = corr.expand_dims({"km": 2}).copy()
-
-    if vehicle_type == "car":
-        max_km = 200000
-    elif vehicle_type in ["bus", "truck"]:
-        max_km = 890000
-    else:
-        max_km = 200000
+    factors, corr_powertrains, components = table
+    sizes = lifetime_km.coords["size"].values
+
+    return xr.DataArray(
+        np.broadcast_to(
+            factors[:, :, None, :],
+            (len(euro_class), len(corr_powertrains), len(sizes), len(components)),
+        ),
+        coords={
+            "euro_class": list(euro_class),
+            "powertrain": corr_powertrains,
+            "size": sizes,
+            "component": components,
+        },
+        dims=["euro_class", "powertrain", "size", "component"],
+    )
 
-    corr = corr.assign_coords({"km": np.array([0, max_km])})
 
-    corr = corr.sel(
-        powertrain=[
-            p for p in lifetime_km.powertrain.values if p in corr.powertrain.values
-        ],
-        euro_class=euro_class,
-    )
+@lru_cache
+def get_emission_factor_tables(
+    vehicle_type: str,
+    euro_class: Tuple[float, ...],
+    powertrains: Tuple[str, ...],
+    sizes: Tuple[str, ...],
+) -> dict:
+    """
+    Emission factors of a vehicle type, as arrays of dimensions
+    (euro_class, powertrain, size, component) for the EURO classes,
+    powertrains and sizes given. Components are sorted.
+    The tables are built once per process for each combination
+    of arguments: arrays must not be modified by the caller.
+
+    :param vehicle_type: "car", "truck", "bus" or "two-wheeler"
+    :param euro_class: EURO class of each year
+    :param powertrains: powertrains
+    :param sizes: sizes
+    :return: dictionary of factors, and of the position of their components
+    """
 
-    corr = corr.expand_dims({"size": len(lifetime_km.coords["size"])})
-    corr = corr.assign_coords({"size": lifetime_km.coords["size"].values})
+    directory = DATA_DIR / "emission_factors" / vehicle_type
+    exhaust = get_emission_factors(directory / "EF_HBEFA42_exhaust.csv")
+    non_exhaust = get_emission_factors(directory / "EF_HBEFA42_non_exhaust.csv")
+    nmhc_species = get_emission_factors(directory / "NMHC_species.csv")
+    engine_wear = get_emission_factors(directory / "engine_wear.csv")
 
-    corr = corr.transpose("euro_class", "powertrain", "size", "component", "km")
+    def mapped(ef):
+        return [
+            MAP_PWT[pt] if MAP_PWT[pt] in ef.powertrain.values else "BEV"
+            for pt in powertrains
+        ]
 
-    corr = corr.interp(
-        km=lifetime_km.max(), method="linear", kwargs={"fill_value": "extrapolate"}
+    components = sorted(exhaust.coords["component"].values)
+    position = {c: i for i, c in enumerate(components)}
+
+    tables = {
+        "components": components,
+        "hot": _select(
+            exhaust,
+            mapped(exhaust),
+            sizes,
+            ("euro_class", "powertrain", "size", "component"),
+            euro_class=list(euro_class),
+            component=components,
+        ),
+        "non exhaust": None,
+    }
+
+    if non_exhaust is not None:
+        non_exhaust_components = [
+            c for c in components if c in non_exhaust.component.values
+        ]
+        tables["non exhaust"] = _select(
+            non_exhaust,
+            mapped(non_exhaust),
+            sizes,
+            ("type", "euro_class", "powertrain", "size", "component"),
+            euro_class=list(euro_class),
+            component=non_exhaust_components,
+            type=["cold start", "soak", "diurnal", "running losses"],
+        )
+        tables["non exhaust index"] = [position[c] for c in non_exhaust_components]
+
+    # Add additional species derived from NMHC emissions
+    # Toluene, Xylene, Formaldehyde, Acetaldehyde, etc.
+    # Also heavy metals
+    tables["nmhc"] = _select(
+        nmhc_species,
+        [
+            MAP_PWT[pt] if pt in nmhc_species.powertrain.values else "BEV"
+            for pt in powertrains
+        ],
+        sizes,
+        ("powertrain", "size", "component"),
+    )
+    tables["nmhc total"] = tables["nmhc"].sum(axis=-1)
+    tables["nmhc index"] = [position[c] for c in nmhc_species.component.values]
+    tables["nmhc position"] = position["Non-methane hydrocarbon"]
+
+    # Heavy metals emissions are dependent of fuel consumption
+    # given in grams of emission per kj
+    tables["engine wear"] = _select(
+        engine_wear,
+        mapped(engine_wear),
+        sizes,
+        ("powertrain", "size", "component"),
     )
+    tables["engine wear index"] = [position[c] for c in engine_wear.component.values]
+
+    # apply a mileage degradation factor for CO, HC and NOx,
+    # 1 for the other components and powertrains
+    degradation = get_degradation_table(vehicle_type, euro_class, powertrains)
+    tables["degradation"] = None
+    if degradation is not None:
+        factors, corr_powertrains, corr_components = degradation
+        table = np.ones((len(euro_class), len(powertrains), 1, len(components)))
+        table[
+            np.ix_(
+                np.arange(len(euro_class)),
+                [powertrains.index(p) for p in corr_powertrains],
+                [0],
+                [position[c] for c in corr_components],
+            )
+        ] = factors[:, :, None, :]
+        tables["degradation"] = table
 
-    corr.values = np.where(corr < 1, 1.0, corr)
+    for table in tables.values():
+        if isinstance(table, np.ndarray):
+            table.setflags(write=False)
 
-    return corr
+    return tables
 
 
 def get_driving_cycle_compartments(cycle_name, vehicle_type) -> dict:
-    with open(FILEPATH_DC_SPECS, "r") as f:
-        return yaml.safe_load(f)["environments"][vehicle_type][cycle_name]
+    return load_yaml(FILEPATH_DC_SPECS)["environments"][vehicle_type][cycle_name]
 
 
 class HotEmissionsModel:
@@ -135,6 +310,8 @@ class HotEmissionsModel:
         of cycle e.g., "WLTC","WLTC 3.1","WLTC 3.2","WLTC 3.3","WLTC 3.4","CADC Urban","CADC Road",
         "CADC Motorway","CADC Motorway 130","CADC","NEDC".
     :type cycle: pandas.Series
+    :param driving_cycle: summary of the driving cycle of `velocity`, as computed
+        by :class:`EnergyConsumptionModel`. Analysed from `velocity` if None.
 
     """
 
@@ -145,30 +322,20 @@ class HotEmissionsModel:
         velocity: np.ndarray,
         cycle_name: str,
         vehicle_type: str,
+        driving_cycle: DrivingCycle = None,
     ) -> None:
         self.powertrains = powertrains
         self.sizes = sizes
         self.velocity = velocity / 1000 * 3600  # m/s to km/h
+        self.driving_cycle = (
+            DrivingCycle.from_velocity(velocity)
+            if driving_cycle is None
+            else driving_cycle
+        )
+        # idle seconds trimmed from the end of the driving cycle
+        self.idle_seconds = self.driving_cycle.idle_seconds
         self.cycle_name = cycle_name
         self.vehicle_type = vehicle_type
-        self.exhaust = get_emission_factors(
-            filepath=DATA_DIR
-            / "emission_factors"
-            / vehicle_type
-            / f"EF_HBEFA42_exhaust.csv"
-        )
-        self.non_exhaust = get_emission_factors(
-            filepath=DATA_DIR
-            / "emission_factors"
-            / vehicle_type
-            / f"EF_HBEFA42_non_exhaust.csv"
-        )
-        self.nmhc_species = get_emission_factors(
-            filepath=DATA_DIR / "emission_factors" / vehicle_type / f"NMHC_species.csv"
-        )
-        self.engine_wear = get_emission_factors(
-            filepath=DATA_DIR / "emission_factors" / vehicle_type / f"engine_wear.csv"
-        )
 
     def get_hot_emissions(
         self,
@@ -199,33 +366,28 @@ class HotEmissionsModel:
         :return: Pollutants emission per km driven, per air compartment.
         """
 
-        hot_emissions = self.exhaust.sel(
-            powertrain=[
-                MAP_PWT[pt] if MAP_PWT[pt] in self.exhaust.powertrain.values else "BEV"
-                for pt in lifetime_km.coords["powertrain"].values
-            ],
-            euro_class=euro_class,
-        )
-
-        if "size" not in hot_emissions.dims:
-            hot_emissions = hot_emissions.expand_dims(
-                {"size": len(lifetime_km.coords["size"])}
-            )
-            hot_emissions.coords["size"] = lifetime_km.coords["size"]
-
-        hot_emissions = hot_emissions.transpose(
-            "euro_class", "powertrain", "size", "component"
-        )
-
-        hot_emissions = hot_emissions.sel(size=lifetime_km.coords["size"].values)
-
         energy_consumption = energy_consumption.sel(
             size=lifetime_km.coords["size"].values,
             powertrain=lifetime_km.coords["powertrain"].values,
             year=lifetime_km.coords["year"].values,
         )
 
-        distance = self.velocity.sum(dim="second") / 3600
+        # emission factors, with sorted components, for the EURO classes,
+        # powertrains and sizes of the vehicles
+        tables = get_emission_factor_tables(
+            self.vehicle_type,
+            tuple(euro_class),
+            tuple(str(p) for p in energy_consumption.coords["powertrain"].values),
+            tuple(str(s) for s in energy_consumption.coords["size"].values),
+        )
+        components = tables["components"]
+
+        distance = self.driving_cycle.distance
+
+        # number of seconds of the driving cycle, including the trimmed idle
+        # seconds, over which diurnal emissions and running losses are spread
+        seconds = energy_consumption.sizes["second"] + self.idle_seconds
+        driving_seconds = energy_consumption.sizes["second"]
 
         # Emissions for each second of the driving_cycles equal:
         # a * energy consumption
@@ -237,79 +399,14 @@ class HotEmissionsModel:
         # energy consumption is given in kj for each second
         # emissions are in grams per MJ
 
-        emissions = xr.DataArray(
-            hot_emissions.values * _(energy_consumption / 1000),
-            dims=["second", "value", "year", "powertrain", "size", "component"],
-            coords={
-                "second": energy_consumption.coords["second"],
-                "value": energy_consumption.coords["value"],
-                "year": energy_consumption.coords["year"],
-                "powertrain": energy_consumption.coords["powertrain"],
-                "size": energy_consumption.coords["size"],
-                "component": hot_emissions.coords["component"],
-            },
-        )
-
         # a bit of a manual calibration for N2O and NH3
         # as they do not correlate with fuel consumption
+        operation, calibration = CALIBRATION.get(self.vehicle_type, (None, {}))
+        calibration = {components.index(c): factor for c, factor in calibration.items()}
 
-        if self.vehicle_type == "car":
-            emissions.loc[dict(component="Dinitrogen oxide")] *= 0.5
-            emissions.loc[dict(component="Ammonia")] *= 0.5
-        elif self.vehicle_type == "truck":
-            emissions.loc[dict(component="Dinitrogen oxide")] *= 10
-            emissions.loc[dict(component="Ammonia")] *= 10
-        elif self.vehicle_type == "bus":
-            emissions.loc[dict(component="Dinitrogen oxide")] /= 15
-            emissions.loc[dict(component="Ammonia")] /= 12
-        else:
-            pass
-
-        # apply a mileage degradation factor for CO, HC and NOx
-        degradation_correction = get_mileage_degradation_factor(
-            lifetime_km=lifetime_km,
-            euro_class=euro_class,
-            powertrains=emissions.powertrain.values,
-            vehicle_type=self.vehicle_type,
-        )
-
-        if degradation_correction is not None:
-            emissions.loc[
-                dict(
-                    powertrain=degradation_correction.powertrain.values,
-                    component=degradation_correction.component.values,
-                )
-            ] *= degradation_correction.values
-
-        if self.non_exhaust is not None:
-            non_exhaust = self.non_exhaust.sel(
-                powertrain=[
-                    (
-                        MAP_PWT[pt]
-                        if MAP_PWT[pt] in self.non_exhaust.powertrain.values
-                        else "BEV"
-                    )
-                    for pt in emissions.powertrain.values
-                ],
-                euro_class=euro_class,
-                component=[
-                    c
-                    for c in emissions.component.values
-                    if c in self.non_exhaust.component.values
-                ],
-            )
-
-            if "size" not in non_exhaust.dims:
-                non_exhaust = non_exhaust.expand_dims(
-                    {"size": len(energy_consumption.coords["size"])}
-                )
-                non_exhaust.coords["size"] = energy_consumption.coords["size"]
-
-            non_exhaust = non_exhaust.transpose(
-                "euro_class", "powertrain", "size", "component", "type"
-            )
-
-            non_exhaust = non_exhaust.sel(size=lifetime_km.coords["size"].values)
+        offsets = []
+        if tables["non exhaust"] is not None:
+            cold_start, soak, diurnal, running_losses = tables["non exhaust"]
 
             start_per_day = 2.3  # source for
 
@@ -318,166 +415,83 @@ class HotEmissionsModel:
             # And add cold start emissions to the first second of the driving_cycles
 
             yearly_km = yearly_km.transpose("value", "year", "powertrain", "size")
-
-            emissions.loc[
-                dict(
-                    second=emissions.second.values[0],
-                    component=non_exhaust.component.values,
-                )
-            ] += (
-                _(distance / yearly_km * start_per_day * 365)
-                * non_exhaust.sel(type="cold start").values
-            )
-
-            # And add soak emissions to the last second of the driving_cycles
-            emissions.loc[
-                dict(
-                    second=emissions.second.values[-1],
-                    component=non_exhaust.component.values,
-                )
-            ] += (
-                _(distance / yearly_km * start_per_day * 365)
-                * non_exhaust.loc[dict(type="soak")].values
-            )
+            starts = _(distance / yearly_km * start_per_day * 365)
 
             # Diurnal emissions are defined in g/day
             # And need to be evenly distributed
             # throughout the driving_cycles
 
-            daily_km_to_year = distance / (yearly_km / 365)
-
-            emissions.loc[dict(component=non_exhaust.component.values)] += (
-                _(daily_km_to_year)
-                * non_exhaust.sel(type="diurnal").values
-                / emissions.shape[0]
-            )
+            daily_km_to_year = _(distance / (yearly_km / 365))
 
             # Running losses are in g/km (no conversion needed)
             # And need to be evenly distributed throughout the driving_cycles
 
-            emissions.loc[dict(component=non_exhaust.component.values)] += (
-                _(distance)
-                * non_exhaust.sel(type="running losses").values
-                / emissions.shape[0]
-            )
-
-        # Add additional species derived from NMHC emissions
-        # Toluene, Xylene, Formaldehyde, Acetaldehyde, etc.
-        # Also heavy metals
-        # And add them to the emissions array
-
-        nmhc = self.nmhc_species.sel(
-            powertrain=[
-                MAP_PWT[pt] if pt in self.nmhc_species.powertrain.values else "BEV"
-                for pt in emissions.powertrain.values
-            ]
-        )
-        nmhc = nmhc.assign_coords({"powertrain": emissions.powertrain.values})
-
-        if "size" not in nmhc.dims:
-            nmhc = nmhc.expand_dims({"size": len(energy_consumption.coords["size"])})
-            nmhc.coords["size"] = energy_consumption.coords["size"]
-
-        if "year" not in nmhc.dims:
-            nmhc = nmhc.expand_dims({"year": len(energy_consumption.coords["year"])})
-            nmhc.coords["year"] = energy_consumption.coords["year"]
-
-        nmhc = nmhc.transpose(
-            "year",
-            "powertrain",
-            "size",
-            "component",
-        )
-        nmhc = nmhc.sel(size=energy_consumption.coords["size"].values)
-
-        emissions.loc[dict(component=nmhc.coords["component"].values)] = (
-            nmhc.values * emissions.sel(component=["Non-methane hydrocarbon"]).values
-        )
-
-        emissions.loc[dict(component="Non-methane hydrocarbon")] *= nmhc.sum(
-            dim="component"
-        ).values
-
-        # Heavy metals emissions are dependent of fuel consumption
-        # given in grams of emission per kj
-
-        engine_wear = self.engine_wear.sel(
-            powertrain=[
-                (
-                    MAP_PWT[pt]
-                    if MAP_PWT[pt] in self.engine_wear.powertrain.values
-                    else "BEV"
-                )
-                for pt in emissions.powertrain.values
+            # (second, offset), None for every second
+            offsets = [
+                (0, starts * cold_start),
+                # And add soak emissions to the last second of the driving_cycles
+                (driving_seconds - 1, starts * soak),
+                (None, daily_km_to_year * diurnal / seconds),
+                (None, _(distance) * running_losses / seconds),
             ]
-        )
-        engine_wear = engine_wear.assign_coords(
-            {"powertrain": emissions.powertrain.values}
-        )
 
-        if "size" not in engine_wear.dims:
-            engine_wear = engine_wear.expand_dims(
-                {"size": len(energy_consumption.coords["size"])}
+        # urban emissions are the sum of emissions
+        # along the ``second`` dimension
+        # where velocity is below 50 km/h,
+        # suburban emissions where velocity is between 50 km/h
+        # and 80 km/h, and rural emissions where velocity is above 80 km/h
+
+        # emissions are linear in the energy consumption of each second:
+        # the energy consumption and the number of seconds are summed
+        # per speed bin first, and emission factors are applied to the sums.
+        # Seconds with no energy consumption value have no emissions.
+        energy = energy_consumption.values
+        valid = ~np.isnan(energy)
+        # sums in the precision of the emission factors
+        dtype = np.result_type(energy, tables["hot"].dtype)
+
+        speed_bins = [mask[:driving_seconds] for mask in self.driving_cycle.masks]
+
+        sums = []
+        for i, in_bin in enumerate(speed_bins):
+            in_bin = in_bin & valid
+            energy_in_bin = np.where(in_bin, energy, 0).sum(axis=0, dtype=dtype)
+            seconds_in_bin = in_bin.sum(axis=0)
+            if i == 0:
+                # the trimmed idle seconds are urban, with no energy consumption
+                seconds_in_bin = seconds_in_bin + self.idle_seconds
+
+            emissions = tables["hot"] * _(energy_in_bin / 1000)
+
+            for component, factor in calibration.items():
+                emissions[..., component] = operation(emissions[..., component], factor)
+
+            if tables["degradation"] is not None:
+                emissions *= tables["degradation"]
+
+            for second, offset in offsets:
+                count = seconds_in_bin if second is None else in_bin[second]
+                emissions[..., tables["non exhaust index"]] += _(count) * offset
+
+            nmhc_position = tables["nmhc position"]
+            emissions[..., tables["nmhc index"]] = (
+                tables["nmhc"] * emissions[..., [nmhc_position]]
             )
-            engine_wear.coords["size"] = energy_consumption.coords["size"]
+            emissions[..., nmhc_position] *= tables["nmhc total"]
 
-        if "year" not in engine_wear.dims:
-            engine_wear = engine_wear.expand_dims(
-                {"year": len(energy_consumption.coords["year"])}
+            emissions[..., tables["engine wear index"]] += (
+                _(energy_in_bin) * tables["engine wear"]
             )
-            engine_wear.coords["year"] = energy_consumption.coords["year"]
-
-        engine_wear = engine_wear.transpose(
-            "year",
-            "powertrain",
-            "size",
-            "component",
-        )
-
-        emissions.loc[dict(component=engine_wear.coords["component"].values)] += (
-            energy_consumption * engine_wear
-        ).values
 
-        # reorder the component coordinates by alphabetical order
-        emissions = emissions.reindex(component=sorted(emissions.component.values))
+            emissions[np.isnan(emissions)] = 0
+            sums.append(emissions)
 
-        # urban emissions are the sum of emissions
-        # along the ``second`` dimension
-        # where velocity is below 50 km/h
-        # converted to kg/km
-        emissions = emissions.fillna(0)
-
-        urban_emissions = (
-            np.where(_(self.velocity) <= 50, emissions, 0).sum(axis=0)
-            / _(distance)
-            / 1000
-        )
-
-        # rural emissions are the sum of emissions
-        # along the ``second`` dimension
-        # where velocity is between 50 km/h
-        # and 80 km/h
-        rural_emissions = (
-            np.where(
-                (_(self.velocity) > 50) & (_(self.velocity) <= 80), emissions, 0
-            ).sum(axis=0)
-            / _(distance)
-            / 1000
-        )
-
-        # highway emissions are the sum of emissions
-        # along the ``second`` dimension
-        # where velocity is above 80 km/h
-        highway_emissions = (
-            np.where(_(self.velocity) > 80, emissions, 0).sum(axis=0)
-            / _(distance)
-            / 1000
-        )
+        urban_emissions = sums[0] / _(distance) / 1000
+        rural_emissions = sums[1] / _(distance) / 1000
+        highway_emissions = sums[2] / _(distance) / 1000
 
         list_direct_emissions = [
-            e + f", {c}"
-            for c in ["urban", "suburban", "rural"]
-            for e in emissions.coords["component"].values
+            e + f", {c}" for c in ["urban", "suburban", "rural"] for e in components
         ]
 
         res = xr.DataArray(
@@ -485,10 +499,10 @@ class HotEmissionsModel:
                 (urban_emissions, rural_emissions, highway_emissions), axis=-1
             ),
             coords=[
-                emissions.coords["value"],
-                emissions.coords["year"],
-                emissions.coords["powertrain"],
-                emissions.coords["size"],
+                energy_consumption.coords["value"],
+                energy_consumption.coords["year"],
+                energy_consumption.coords["powertrain"],
+                energy_consumption.coords["size"],
                 list_direct_emissions,
             ],
             dims=["value", "year", "powertrain", "size", "component"],
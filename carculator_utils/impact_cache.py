@@ -0,0 +1,216 @@
+"""
+impact_cache.py contains ImpactCache, an on-disk or in-memory cache of the characterized
+impacts per unit of background activity, computed in
+:meth:`carculator_utils.inventory.Inventory.calculate_impacts`.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# default maximum size of the cache directory, in bytes
+DEFAULT_CACHE_SIZE = 2**30
+
+
+class ImpactCache:
+    """
+    Persistent cache of characterized impact vectors.
+
+    Each entry holds, for a given scenario, impact assessment method,
+    indicator, year and background technosphere, the impacts per unit of the
+    activities already solved for. Entries are stored as `.npz` files, one per
+    call to :meth:`store`, which are merged when the entry is next loaded. The
+    least recently used files are deleted once the directory exceeds `max_size`.
+    Without a directory, entries are kept in memory.
+
+    The size of the cache is tracked as entries are stored, and only checked
+    against the directory, which other processes may write to, when evicting.
+
+    :ivar directory: directory where the entries are stored, or None
+    :ivar max_size: maximum size of the cache, in bytes
+
+    """
+
+    def __init__(
+        self,
+        directory: Union[None, str, Path] = None,
+        max_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_size = max_size
+        # in-memory entries, from the least to the most recently used
+        self._entries = OrderedDict()
+        # size of the cache, in bytes
+        self._size = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._size = sum(size for _, size, _ in self._files())
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Return the key of an entry, from its scenario, method,
+        indicator, year, and content hashes.
+        """
+        return hashlib.blake2b(
+            "|".join(str(p) for p in parts).encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _files(self, pattern: str = "*.npz") -> list:
+        """Return the modification time, size and path of the files of the cache."""
+        files = []
+        for path in self.directory.glob(pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _write(self, key: str, rows: np.ndarray, impacts: np.ndarray) -> int:
+        """Write a new file of the entry `key`, and return its size."""
+        # write to a temporary file first, so that
+        # concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as stream:
+            np.savez(stream, rows=rows, impacts=impacts)
+        path = Path(tmp).with_suffix(".npz")
+        os.replace(tmp, path)
+        return path.stat().st_size
+
+    def _read(self, key: str) -> Union[None, tuple]:
+        if self.directory is None:
+            return self._entries.get(key)
+
+        entries, files = [], []
+        for file in sorted(self._files(f"{key}*.npz"), key=lambda x: x[0]):
+            try:
+                with np.load(file[2]) as data:
+                    entries.append((data["rows"], data["impacts"]))
+            except (FileNotFoundError, OSError, KeyError, ValueError):
+                continue
+            files.append(file)
+
+        if not entries:
+            return None
+        if len(entries) == 1:
+            return entries[0]
+
+        # merge the files of the entry, keeping the most recent ones
+        # if the number of impact categories has changed
+        rows, impacts = merge_entries(entries)
+
+        self._size += self._write(key, rows, impacts)
+        for _, size, path in files:
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+        return rows, impacts
+
+    def load(self, key: str, rows: np.ndarray) -> Union[None, np.ndarray]:
+        """
+        Return the cached impacts of the activities `rows`.
+
+        :param key: key of the entry
+        :param rows: indices of the activities
+        :return: array of shape (impact categories, len(rows)),
+        or None if any of the activities is missing from the entry
+        """
+        entry = self._read(key)
+        if entry is None:
+            return None
+
+        cached_rows, impacts = entry
+        positions = np.searchsorted(cached_rows, rows)
+        positions = np.clip(positions, 0, max(len(cached_rows) - 1, 0))
+        if len(cached_rows) == 0 or not np.array_equal(cached_rows[positions], rows):
+            return None
+
+        # mark the entry as recently used
+        if self.directory is None:
+            self._entries.move_to_end(key)
+        else:
+            for path in self.directory.glob(f"{key}*.npz"):
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass
+
+        return impacts[:, positions]
+
+    def store(self, key: str, rows: np.ndarray, impacts: np.ndarray) -> None:
+        """
+        Add the impacts of the activities `rows` to an entry.
+
+        :param key: key of the entry
+        :param rows: indices of the activities
+        :param impacts: array of shape (impact categories, len(rows))
+        """
+        rows, index = np.unique(rows, return_index=True)
+        impacts = impacts[:, index]
+
+        if self.directory is None:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[0].nbytes + entry[1].nbytes
+                rows, impacts = merge_entries([entry, (rows, impacts)])
+            self._entries[key] = (rows, impacts)
+            self._size += rows.nbytes + impacts.nbytes
+        else:
+            # the new activities are written to their own file,
+            # rather than rewriting the whole entry
+            self._size += self._write(key, rows, impacts)
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits `max_size`."""
+        if self.directory is None:
+            while self._size > self.max_size and self._entries:
+                rows, impacts = self._entries.popitem(last=False)[1]
+                self._size -= rows.nbytes + impacts.nbytes
+            return
+
+        files = self._files()
+        self._size = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files, key=lambda x: x[0]):
+            if self._size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+    def clear(self) -> None:
+        """Delete all the entries."""
+        self._entries.clear()
+        self._size = 0
+        if self.directory is None:
+            return
+        for path in self.directory.glob("*.npz"):
+            path.unlink(missing_ok=True)
+
+
+def merge_entries(entries: list) -> tuple:
+    """
+    Merge the rows and impacts of several parts of an entry.
+
+    Parts with another number of impact categories than the last
+    one are outdated, and dropped. Activities found in several
+    parts keep the impacts of the first one.
+
+    :param entries: list of (rows, impacts) tuples, from the oldest to the newest
+    :return: sorted unique rows, and their impacts
+    """
+    categories = entries[-1][1].shape[0]
+    entries = [e for e in entries if e[1].shape[0] == categories]
+
+    rows, index = np.unique(np.concatenate([e[0] for e in entries]), return_index=True)
+    impacts = np.concatenate([e[1] for e in entries], axis=1)[:, index]
+
+    return rows, impacts
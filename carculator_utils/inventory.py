@@ -2,26 +2,33 @@
 inventory.py contains InventoryCalculation which provides all methods to solve inventories.
 """
 
-import csv
+import copy
+import functools
+import hashlib
 import itertools
 import re
+import tempfile
 import warnings
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Union
 
 import numpy as np
 import pyprind
 import xarray as xr
-import yaml
 from numpy import dtype, ndarray
 from scipy import sparse
 
 from . import DATA_DIR
+from .array import fill_xarray_from_input_parameters, get_precision
+from .assets import load_sparse_matrix, load_yaml, read_csv
 from .background_systems import BackgroundSystemModel
 from .export import ExportInventory
+from .impact_cache import ImpactCache
+from .technosphere import SparseTechnosphere
 
 warnings.filterwarnings("ignore", category=np.VisibleDeprecationWarning)
 
@@ -72,12 +79,9 @@ def get_noise_emission_flows() -> dict:
 
 
 def get_exhaust_emission_flows() -> dict:
-    with open(
-        DATA_DIR / "emission_factors" / "exhaust_and_noise_flows.yaml",
-        "r",
-        encoding="utf-8",
-    ) as stream:
-        flows = yaml.safe_load(stream)["exhaust"]
+    flows = load_yaml(DATA_DIR / "emission_factors" / "exhaust_and_noise_flows.yaml")[
+        "exhaust"
+    ]
 
     d_comp = {
         "urban": "urban air close to ground",
@@ -109,18 +113,16 @@ def get_dict_impact_categories(method, indicator) -> dict:
 
     csv_dict = {}
 
-    with open(filepath, encoding="utf-8") as f:
-        input_dict = csv.reader(f, delimiter=";")
-        for row in input_dict:
-            if row[0] == method and row[3] == indicator:
-                csv_dict[row[2]] = {
-                    "method": row[1],
-                    "category": row[2],
-                    "type": row[3],
-                    "abbreviation": row[4],
-                    "unit": row[5],
-                    "source": row[6],
-                }
+    for row in read_csv(filepath):
+        if row[0] == method and row[3] == indicator:
+            csv_dict[row[2]] = {
+                "method": row[1],
+                "category": row[2],
+                "type": row[3],
+                "abbreviation": row[4],
+                "unit": row[5],
+                "source": row[6],
+            }
 
     return csv_dict
 
@@ -140,15 +142,9 @@ def get_dict_input() -> dict:
     if not filepath.is_file():
         raise FileNotFoundError("The dictionary of activity labels could not be found.")
 
-    with open(filepath, encoding="utf-8") as f:
-        reader = csv.reader(f, delimiter=";")
-        raw = list(reader)
-        for _r, r in enumerate(raw):
-            if len(r) == 3:
-                r[1] = eval(r[1])
-            raw[_r] = tuple(r)
+    raw = [(r[0], eval(r[1]), r[2]) if len(r) == 3 else r for r in read_csv(filepath)]
 
-        return {j: i for i, j in enumerate(list(raw))}
+    return {j: i for i, j in enumerate(raw)}
 
 
 def format_array(array):
@@ -196,6 +192,227 @@ def format_array(array):
     return reshaped_dataarray
 
 
+def get_demand_vectors(size: int, rows: ndarray, dtype="float64") -> ndarray:
+    """
+    Return one demand vector per product in `rows`,
+    each demanding one unit of the product.
+
+    :param size: number of products
+    :param rows: indices of the products
+    :param dtype: floating-point type of the vectors
+    :return: array of shape (size, len(rows))
+    """
+    f_vectors = np.zeros((size, len(rows)), dtype=dtype)
+    f_vectors[rows, np.arange(len(rows))] = 1
+    return f_vectors
+
+
+# matrices memory-mapped by a worker process, see `attach_matrices`
+_attached = {}
+
+
+def attach_matrices(technosphere: dict, characterization: str) -> None:
+    """
+    Initializer of the worker processes: memory-map the matrices written
+    by the parent process, once per process, so that the factorizations
+    of the technosphere matrix are kept from one task to the next.
+
+    :param technosphere: handle returned by :meth:`SparseTechnosphere.share`
+    :param characterization: path to the `.npy` file of the B matrix,
+    of shape (years, impact categories, products)
+    """
+    _attached["technosphere"] = SparseTechnosphere.attach(technosphere)
+    _attached["characterization"] = np.load(characterization, mmap_mode="r")
+
+
+def characterize_supply(
+    iterations: list,
+    year: int,
+    rows: ndarray,
+    reference: int = None,
+    exclude: list = None,
+) -> ndarray:
+    """
+    Solve the technosphere matrix of several iterations of one year for one
+    unit of each of the products `rows`, and characterize the supply.
+    Used by the worker processes, on the matrices attached
+    by :func:`attach_matrices`.
+
+    :param iterations: indices along the `value` dimension
+    :param year: index along the `year` dimension
+    :param rows: indices of the products to supply
+    :param reference: passed to :meth:`SparseTechnosphere.solve`
+    :param exclude: passed to :meth:`SparseTechnosphere.solve`
+    :return: array of shape (len(iterations), impact categories, len(rows))
+    """
+    A = _attached["technosphere"]
+    B = np.asarray(_attached["characterization"][year])
+    demand = get_demand_vectors(A.shape[1], rows, A.dtype)
+
+    return np.stack(
+        [
+            B @ A.solve(demand, iteration, year, reference=reference, exclude=exclude)
+            for iteration in iterations
+        ]
+    )
+
+
+class InputIndex(dict):
+    """
+    Dictionary of the inputs of the A matrix, mapping
+    (name, location, unit, reference product) to a row/column index.
+
+    It keeps an index of the names, used to find the inputs whose name
+    contains given strings. The index and the results of previous searches
+    are invalidated whenever the dictionary is modified.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._names = None
+        self._indices = None
+        self._searches = {}
+
+    def _invalidate(self) -> None:
+        self._names = None
+        self._indices = None
+        self._searches.clear()
+
+    def __setitem__(self, key, value) -> None:
+        self._invalidate()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        self._invalidate()
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs) -> None:
+        self._invalidate()
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self._invalidate()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._invalidate()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._invalidate()
+        return super().popitem()
+
+    def clear(self) -> None:
+        self._invalidate()
+        super().clear()
+
+    def find(self, contains: tuple, excludes: tuple = ()) -> list:
+        """
+        Return the indices of the inputs whose name contains all the strings
+        in `contains` and none of the strings in `excludes`, in ascending order.
+
+        :param contains: tuple of strings
+        :param excludes: tuple of strings
+        :return: list of indices
+        """
+        search = (contains, excludes)
+
+        if search not in self._searches:
+            if self._names is None:
+                indices = np.fromiter(self.values(), dtype=int, count=len(self))
+                order = np.argsort(indices, kind="stable")
+                self._indices = indices[order]
+                self._names = np.array([k[0] for k in self], dtype=str)[order]
+
+            mask = np.ones(len(self._names), dtype=bool)
+            for c in contains:
+                mask &= np.char.find(self._names, c) >= 0
+            for e in excludes:
+                mask &= np.char.find(self._names, e) < 0
+
+            self._searches[search] = self._indices[mask].tolist()
+
+        return list(self._searches[search])
+
+
+class RecordingArray:
+    """
+    Wrapper of a parameters array that records the names of the parameters
+    read through it, with `sel` or `loc`. Reading the whole array, e.g.
+    with `values`, records all the parameters.
+    """
+
+    def __init__(self, array: xr.DataArray, read: set) -> None:
+        self.array = array
+        self.read = read
+
+    def sel(self, indexers: dict = None, **kwargs) -> xr.DataArray:
+        indexers = dict(indexers or {}, **kwargs)
+        if "parameter" in indexers:
+            self.read.update(np.atleast_1d(indexers["parameter"]).tolist())
+        else:
+            self.read.update(self.array.parameter.values.tolist())
+        return self.array.sel(indexers)
+
+    @property
+    def loc(self):
+        return _RecordingLocIndexer(self)
+
+    def __getitem__(self, key) -> xr.DataArray:
+        self.read.update(self.array.parameter.values.tolist())
+        return self.array[key]
+
+    def __getattr__(self, name: str):
+        if name in ("values", "data", "to_numpy"):
+            self.read.update(self.array.parameter.values.tolist())
+        return getattr(self.array, name)
+
+
+class _RecordingLocIndexer:
+    def __init__(self, array: RecordingArray) -> None:
+        self.array = array
+
+    def __getitem__(self, key):
+        if isinstance(key, dict):
+            return self.array.sel(key)
+        self.array.read.update(self.array.array.parameter.values.tolist())
+        return self.array.array.loc[key]
+
+
+def tracked(method):
+    """
+    Record the calls to a method of :class:`Inventory` writing in the A
+    matrix, with the parameters it reads and the exchanges it writes, so that
+    :meth:`Inventory.update` can call it again alone. Calls made from
+    a tracked method are recorded with the outer one.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        calls = getattr(self, "_calls", None)
+        if calls is None:
+            return method(self, *args, **kwargs)
+
+        start, read = len(self.A.journal), self.array.read
+        self._calls, self.array.read = None, set()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            calls.append(
+                (
+                    method.__name__,
+                    args,
+                    kwargs,
+                    self.array.read,
+                    start,
+                    len(self.A.journal),
+                )
+            )
+            self._calls, self.array.read = calls, read
+
+    return wrapper
+
+
 class Inventory:
     """
     Build and solve the inventory for results characterization and inventory export
@@ -208,6 +425,8 @@ class Inventory:
         "SSP2-PkBudg500": limits temperature increase by 2100 to 1.5 degrees Celsius,
         "static": no forward-looking modification of the background inventories).
         "SSP2-NPi" selected by default.)
+    :ivar cache_dir: directory where the impacts of the background activities are cached.
+        Cached in memory only if None.
 
     """
 
@@ -219,7 +438,31 @@ class Inventory:
         method: str = "recipe",
         indicator: str = "midpoint",
         functional_unit: str = "vkm",
+        cache_dir: Union[str, Path] = None,
     ) -> None:
+        self.scenario = check_scenario(scenario)
+        self.func_unit = check_func_unit(functional_unit)
+
+        self.method = method
+        self.indicator = indicator if method == "recipe" else "midpoint"
+
+        # floating-point type of the A and B matrices and of the results
+        self.dtype = get_precision("float64")
+
+        self.background_configuration = {}
+        self.background_configuration.update(background_configuration or {})
+
+        # cache of the background impacts, on disk if a directory is given
+        self.cache = ImpactCache(cache_dir)
+
+        self._build(vm)
+
+    def _build(self, vm) -> None:
+        """
+        Build the A and B matrices for the vehicle model `vm`.
+
+        :param vm: object from the VehicleModel class
+        """
         self.vm = vm
 
         self.scope = {
@@ -227,40 +470,37 @@ class Inventory:
             "powertrain": vm.array.coords["powertrain"].values.tolist(),
             "year": vm.array.coords["year"].values.tolist(),
         }
-        self.scenario = check_scenario(scenario)
-        self.func_unit = check_func_unit(functional_unit)
-
-        self.method = method
-        self.indicator = indicator if method == "recipe" else "midpoint"
 
         self.array = format_array(vm.array)
         self.iterations = len(vm.array.value.values)
 
         self.number_of_vehicles = (self.vm["TtW energy"] > 0).sum().values
 
-        self.background_configuration = {}
-        self.background_configuration.update(background_configuration or {})
-
         self.inputs = get_dict_input()
 
-        self.bs = BackgroundSystemModel()
+        # reuse the background data already loaded by the vehicle model
+        self.bs = getattr(vm, "bs", None) or BackgroundSystemModel()
         self.add_additional_activities()
         self.rev_inputs = {v: k for k, v in self.inputs.items()}
 
-        with open(
-            DATA_DIR / "electricity" / "elec_tech_map.yaml", "r", encoding="utf-8"
-        ) as stream:
-            self.elec_map = yaml.safe_load(stream)
-            self.elec_map = {k: tuple(v) for k, v in self.elec_map.items()}
+        self.elec_map = {
+            k: tuple(v)
+            for k, v in load_yaml(
+                DATA_DIR / "electricity" / "elec_tech_map.yaml"
+            ).items()
+        }
 
         self.electricity_technologies = list(self.elec_map.keys())
 
         self.A = self.get_A_matrix()
+        self._background_snapshot = self.A.snapshot()
+        # exchanges written by the tracked methods, see `update`
+        self._journals = {}
         # Create electricity and fuel market datasets
-        self.mix = self.define_electricity_mix_for_fuel_prep()
-        self.create_electricity_mix_for_fuel_prep()
-        self.rev_inputs = {v: k for k, v in self.inputs.items()}
-        self.create_fuel_markets()
+        with self._record("markets"):
+            self.create_electricity_mix_for_fuel_prep()
+            self.rev_inputs = {v: k for k, v in self.inputs.items()}
+            self.create_fuel_markets()
 
         self.exhaust_emissions = get_exhaust_emission_flows()
         self.noise_emissions = get_noise_emission_flows()
@@ -275,9 +515,304 @@ class Inventory:
         self.B = self.get_B_matrix()
         self.rev_inputs = {v: k for k, v in self.inputs.items()}
 
-        self.fill_in_A_matrix()
+        # exchanges written afterwards depend on the vehicle parameters
+        self._structure = self._get_structure(vm)
+        self._foreground_snapshot = self.A.snapshot()
+        with self._record("vehicles"):
+            self.fill_in_A_matrix()
         self.remove_non_compliant_vehicles()
 
+    @contextmanager
+    def _record(self, stage: str):
+        """
+        Journal the parameters read and the exchanges written in the A matrix,
+        by each call to the methods decorated with :func:`tracked` and by
+        the other methods.
+
+        :param stage: name under which the journal is stored in `self._journals`
+        """
+        array, untracked_read = self.array, set()
+        self.array = RecordingArray(array, untracked_read)
+        self.A.journal, self._calls = [], []
+        try:
+            yield
+        finally:
+            journal, calls = self.A.journal, self._calls
+            self.A.journal, self._calls = None, None
+            self.array = array
+
+        def merge(entries):
+            if not entries:
+                return np.zeros(0, dtype=np.int64), None
+            keys, index = np.unique(
+                np.concatenate([k for k, _ in entries]), return_index=True
+            )
+            # the first value recorded is the one before the stage
+            return keys, np.concatenate([v for _, v in entries])[index]
+
+        records, untracked = [], np.ones(len(journal), dtype=bool)
+        for name, args, kwargs, read, start, end in calls:
+            untracked[start:end] = False
+            records.append((name, args, kwargs, read, *merge(journal[start:end])))
+
+        untracked_keys, _ = merge([e for e, u in zip(journal, untracked) if u])
+        self._journals[stage] = (records, untracked_read, untracked_keys)
+
+    def _get_tracked_calls(self, changed: set) -> Union[None, list]:
+        """
+        Return the tracked calls reading the parameters `changed`, or None
+        if these calls cannot be made again alone: if the parameters are
+        read by other methods, or if the exchanges of the calls are also
+        written by other calls or methods.
+
+        :param changed: names of the parameters that changed
+        :return: list of (name, args, kwargs, read, keys, values) tuples
+        """
+        if any(changed & read for _, read, _ in self._journals.values()):
+            return None
+
+        records = [r for records, _, _ in self._journals.values() for r in records]
+
+        written, counts = np.unique(
+            np.concatenate(
+                [r[4] for r in records] + [k for _, _, k in self._journals.values()]
+            ),
+            return_counts=True,
+        )
+        shared = written[counts > 1]
+
+        calls = [r for r in records if r[3] & changed]
+        if any(np.isin(r[4], shared).any() for r in calls):
+            return None
+
+        return calls
+
+    def _call_again(self, calls: list) -> None:
+        """
+        Revert the exchanges written by tracked `calls`, and make them again.
+
+        :param calls: list returned by :meth:`_get_tracked_calls`
+        """
+        for _, _, _, _, keys, values in calls:
+            self.A.write(keys, values)
+        for name, args, kwargs, *_ in calls:
+            getattr(self, name)(*args, **kwargs)
+
+    def update(self, vm) -> None:
+        """
+        Update the inventory after the parameters of the vehicle model changed.
+
+        The parameters read and the exchanges written by each call to the
+        methods marked with :func:`tracked` are recorded. If the parameters
+        that changed are only read by such calls, and the exchanges of these
+        calls are not written by others, only these calls are made again.
+
+        Otherwise, the vehicle (foreground) exchanges are written again: the
+        A matrix is reverted to its state before :meth:`fill_in_A_matrix`,
+        which is then run with the new parameters. The electricity and fuel
+        markets are rebuilt only if they read parameters that changed.
+
+        The impacts of the background activities already solved for
+        are reused by :meth:`calculate_impacts`.
+
+        If the scope, country, fuel blends, battery chemistries or number of
+        iterations changed, the inventory is rebuilt entirely.
+
+        :param vm: object from the VehicleModel class
+        """
+        if self._get_structure(vm) != self._structure:
+            self._build(vm)
+            return
+
+        array = format_array(vm.array)
+        if np.array_equal(array.parameter.values, self.array.parameter.values):
+            new, old = array.values, self.array.values
+            changed = array.parameter.values[
+                ((new != old) & ~(np.isnan(new) & np.isnan(old))).any(axis=(0, 2, 3))
+            ].tolist()
+        else:
+            changed = array.parameter.values.tolist()
+
+        self.vm = vm
+        self.array = array
+        self.number_of_vehicles = (self.vm["TtW energy"] > 0).sum().values
+
+        changed = set(changed)
+        if not changed:
+            return
+
+        calls = self._get_tracked_calls(changed)
+
+        if calls is not None:
+            markets = [c for c in calls if c in self._journals["markets"][0]]
+            if markets:
+                # the markets are also updated in the matrix
+                # the vehicle exchanges are reverted to
+                current = self.A.snapshot()
+                self.A.restore(self._foreground_snapshot)
+                self._call_again(markets)
+                self._foreground_snapshot = self.A.snapshot()
+                self.A.restore(current)
+
+            self._call_again(calls)
+
+        else:
+            records, read, _ = self._journals["markets"]
+            if changed & read.union(*(r[3] for r in records)):
+                self.A.restore(self._background_snapshot)
+                with self._record("markets"):
+                    self.create_electricity_mix_for_fuel_prep()
+                    self.create_fuel_markets()
+                self._foreground_snapshot = self.A.snapshot()
+            else:
+                self.A.restore(self._foreground_snapshot)
+
+            with self._record("vehicles"):
+                self.fill_in_A_matrix()
+
+        self.remove_non_compliant_vehicles()
+
+    def _get_structure(self, vm) -> tuple:
+        """
+        Return what determines the labels of the inputs
+        and the background markets, for a given vehicle model.
+        """
+        return (
+            vm.vehicle_type,
+            vm.country,
+            tuple(vm.array.coords["size"].values.tolist()),
+            tuple(vm.array.coords["powertrain"].values.tolist()),
+            tuple(vm.array.coords["year"].values.tolist()),
+            len(vm.array.value.values),
+            repr(vm.fuel_blend),
+            # the battery chemistry is part of the name of the transport activities
+            tuple(
+                sorted(
+                    (k, v)
+                    for k, v in vm.energy_storage.get("electric", {}).items()
+                    if k[0].startswith("BEV")
+                )
+            ),
+        )
+
+    @classmethod
+    def batch(
+        cls,
+        model,
+        array: xr.DataArray,
+        countries: list,
+        scenarios: list = None,
+        model_kwargs: dict = None,
+        sensitivity: bool = False,
+        n_jobs: int = 1,
+        **kwargs,
+    ) -> xr.DataArray:
+        """
+        Calculate the impacts of a vehicle fleet for several countries
+        of use and several background scenarios, in one process.
+
+        The country changes the vehicles (fuel blends, ambient temperature),
+        so a vehicle model is built from `array` and set for each country.
+        Data files are read once and shared between the inventories.
+        The inventory of each country is built once: the scenarios only
+        change the B matrix, so the factorizations of the technosphere
+        matrix are reused from one scenario to the next.
+
+        :param model: VehicleModel class (or subclass) to instantiate
+        :param array: parameters array, as returned by
+        :func:`fill_xarray_from_input_parameters`. It is not modified.
+        :param countries: list of country codes
+        :param scenarios: list of IAM scenarios. "SSP2-NPi" if None.
+        :param model_kwargs: other arguments passed to `model`
+        :param sensitivity: passed to :meth:`calculate_impacts`
+        :param n_jobs: passed to :meth:`calculate_impacts`
+        :param kwargs: other arguments passed to :class:`Inventory`
+        :return: results, with additional `country` and `scenario` dimensions
+        """
+        scenarios = [check_scenario(s) for s in (scenarios or ["SSP2-NPi"])]
+
+        results = []
+        for country in countries:
+            # `set_all` modifies the array in place
+            vm = model(array.copy(), country=country, **(model_kwargs or {}))
+            vm.set_all()
+
+            inventory = cls(vm, scenario=scenarios[0], **kwargs)
+
+            country_results = []
+            for scenario in scenarios:
+                if scenario != inventory.scenario:
+                    inventory.scenario = scenario
+                    inventory.B = inventory.get_B_matrix()
+
+                country_results.append(
+                    inventory.calculate_impacts(sensitivity=sensitivity, n_jobs=n_jobs)
+                )
+
+            results.append(xr.concat(country_results, dim="scenario"))
+
+        return xr.concat(results, dim="country").assign_coords(
+            country=countries, scenario=scenarios
+        )
+
+    @classmethod
+    def stream(
+        cls,
+        model,
+        input_parameters,
+        iterations: int,
+        chunk_size: int = 100,
+        scope: dict = None,
+        model_kwargs: dict = None,
+        n_jobs: int = 1,
+        **kwargs,
+    ) -> Iterator[xr.DataArray]:
+        """
+        Run a Monte Carlo analysis in chunks of `chunk_size` iterations,
+        and yield the results of each chunk as soon as they are calculated.
+
+        For each chunk, the input parameters are sampled, the vehicle model
+        is built and the inventory is updated (see :meth:`update`). Only one
+        chunk is held in memory at a time, whatever the number of iterations.
+        The `value` coordinates of the results run from 0 to `iterations` - 1.
+
+        The parameters are sampled with `input_parameters.stochastic()`:
+        the values previously sampled on `input_parameters` are overwritten.
+
+        :param model: VehicleModel class (or subclass) to instantiate
+        :param input_parameters: object from the VehicleInputParameters class
+        :param iterations: total number of iterations
+        :param chunk_size: number of iterations per chunk
+        :param scope: passed to :func:`fill_xarray_from_input_parameters`
+        :param model_kwargs: other arguments passed to `model`
+        :param n_jobs: passed to :meth:`calculate_impacts`
+        :param kwargs: other arguments passed to :class:`Inventory`
+        :return: iterator over the results of each chunk
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be a positive integer.")
+
+        inventory = None
+
+        for start in range(0, iterations, chunk_size):
+            size = min(chunk_size, iterations - start)
+
+            input_parameters.stochastic(size)
+            _, array = fill_xarray_from_input_parameters(
+                input_parameters, scope=copy.deepcopy(scope)
+            )
+            vm = model(array, **(model_kwargs or {}))
+            vm.set_all()
+
+            if inventory is None:
+                inventory = cls(vm, **kwargs)
+            else:
+                inventory.update(vm)
+
+            results = inventory.calculate_impacts(n_jobs=n_jobs)
+
+            yield results.assign_coords(value=np.arange(start, start + size))
+
     def get_results_table(self, sensitivity: bool = False) -> xr.DataArray:
         """
         Format a xarray.DataArray array to receive the results.
@@ -297,7 +832,8 @@ class Inventory:
                     len(self.scope["year"]),
                     len(self.list_cat),
                     self.iterations,
-                )
+                ),
+                dtype=self.dtype,
             ),
             coords=[
                 list(self.impact_categories.keys()),
@@ -331,10 +867,7 @@ class Inventory:
         :rtype: list
         """
         # read `impact_source_categories.yaml` file
-        with open(
-            DATA_DIR / "lcia" / "impact_source_categories.yaml", "r", encoding="utf-8"
-        ) as stream:
-            source_cats = yaml.safe_load(stream)
+        source_cats = load_yaml(DATA_DIR / "lcia" / "impact_source_categories.yaml")
 
         idx_cats = defaultdict(list)
 
@@ -411,32 +944,163 @@ class Inventory:
 
         return load_factor
 
-    def calculate_impacts(self, sensitivity=False):
+    def solve_iterations(
+        self,
+        problems: list,
+        characterization: ndarray,
+        exclude: list = None,
+        n_jobs: int = 1,
+        reference: int = None,
+    ) -> list:
+        """
+        Solve the technosphere matrix of several iterations and years,
+        and characterize the supply of one unit of each of the products
+        demanded. Impacts found in the cache are not solved for again.
+
+        Each problem is a tuple (iterations, year, rows): the indices along
+        the `value` dimension, the index along the `year` dimension and
+        the indices of the products to supply.
+
+        With `n_jobs` > 1, the solves are spread across a process pool:
+        the iterations of each year are split in one chunk per process.
+        The A and B matrices are shared with the workers through
+        memory-mapped files, attached once per process, so that each process
+        factorizes the reference iteration once. The results are identical
+        to the serial ones.
+
+        :param problems: list of (iterations, year, rows) tuples
+        :param characterization: B matrix, of shape (years, impact categories, products)
+        :param exclude: indices of the foreground activities,
+        which do not supply any of the products demanded
+        :param n_jobs: number of processes to use. Serial if 1.
+        :param reference: iteration whose factorization is reused for the
+        iterations that differ from it by a few activities
+        (see :meth:`SparseTechnosphere.solve`)
+        :return: one array of shape (len(iterations), impact categories, len(rows))
+        per problem
+        """
+        impacts = [
+            np.zeros(
+                (len(iterations), characterization.shape[1], len(rows)),
+                dtype=self.dtype,
+            )
+            for iterations, _, rows in problems
+        ]
+        keys = {}
+        tasks = []
+
+        for p, (iterations, year, rows) in enumerate(problems):
+            characterization_hash = hashlib.blake2b(
+                np.ascontiguousarray(characterization[year]).tobytes(),
+                digest_size=16,
+            ).hexdigest()
+
+            for g, i in enumerate(iterations):
+                keys[p, g] = self.cache.key(
+                    self.scenario,
+                    self.method,
+                    self.indicator,
+                    self.scope["year"][year],
+                    self.A.fingerprint(i, year, exclude=exclude),
+                    characterization_hash,
+                )
+                cached = self.cache.load(keys[p, g], rows)
+                if cached is not None:
+                    impacts[p][g] = cached
+                    continue
+
+                tasks.append((p, g))
+
+        # use pyprind to display a progress bar
+        bar = pyprind.ProgBar(max(len(tasks), 1), stream=1, title="Calculating impacts")
+
+        if n_jobs > 1 and len(tasks) > 1:
+            # the iterations of a year are split in one chunk per process
+            pending = defaultdict(list)
+            for p, g in tasks:
+                pending[p].append(g)
+            chunks = [
+                (p, chunk.tolist())
+                for p, groups in pending.items()
+                for chunk in np.array_split(groups, min(n_jobs, len(groups)))
+            ]
+
+            with tempfile.TemporaryDirectory() as directory:
+                technosphere = self.A.share(directory)
+                characterization_path = str(Path(directory) / "B.npy")
+                np.save(characterization_path, characterization)
+
+                with ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    initializer=attach_matrices,
+                    initargs=(technosphere, characterization_path),
+                ) as executor:
+                    solved = executor.map(
+                        characterize_supply,
+                        [problems[p][0][chunk] for p, chunk in chunks],
+                        [problems[p][1] for p, _ in chunks],
+                        [problems[p][2] for p, _ in chunks],
+                        itertools.repeat(reference),
+                        itertools.repeat(exclude),
+                    )
+                    for (p, chunk), arr in zip(chunks, solved):
+                        bar.update(len(chunk))
+                        impacts[p][chunk] = arr
+        else:
+            for p, g in tasks:
+                bar.update()
+                iterations, year, rows = problems[p]
+                impacts[p][g] = characterization[year] @ self.A.solve(
+                    get_demand_vectors(self.A.shape[1], rows, self.dtype),
+                    iterations[g],
+                    year,
+                    reference=reference,
+                    exclude=exclude,
+                )
+
+        for p, g in tasks:
+            self.cache.store(keys[p, g], problems[p][2], impacts[p][g])
+
+        return impacts
+
+    def calculate_impacts(self, sensitivity=False, n_jobs: int = 1):
+        """
+        Calculate the impacts of the vehicles, for each iteration.
+
+        The technosphere matrix is solved for each iteration, so that
+        the background supply chains reflect the sampled values.
+        Iterations with identical background exchanges are solved only once.
+
+        In a sensitivity analysis, each iteration differs from the reference
+        by one parameter: the factorization of the reference is reused for
+        the iterations whose background differs from it by a few activities.
+
+        :param sensitivity: if True, results are normalized by the reference iteration
+        :param n_jobs: number of processes used to solve the distinct iterations
+        """
         if self.scenario != "static":
+            # the interpolation returns float64 values
             B = self.B.interp(
                 year=self.scope["year"], kwargs={"fill_value": "extrapolate"}
-            ).values
+            ).values.astype(self.dtype, copy=False)
         else:
             B = self.B.values
 
         # Prepare an array to store the results
         results = self.get_results_table(sensitivity=sensitivity)
 
-        new_arr = np.zeros((self.A.shape[1], self.B.shape[1], self.A.shape[-1]))
-
-        f_vector = np.zeros((np.shape(self.A)[1]))
-
         # Collect indices of activities contributing to the first level
         idx_car_trspt = self.find_input_indices(
             (f"transport, {self.vm.vehicle_type}, ",)
         )
         idx_cars = self.find_input_indices((f"{self.vm.vehicle_type.capitalize()}, ",))
 
-        idx_others = [
-            i
-            for i in self.inputs.values()
-            if not any(i in x for x in [idx_car_trspt, idx_cars])
-        ]
+        # only the products exchanged with the vehicles
+        # or the transport activities are needed
+        idx_rows = self.A.nonzero_rows(idx_cars + idx_car_trspt)
+        row_position = {r: i for i, r in enumerate(idx_rows)}
+
+        idx_others = [i for i in idx_rows if i not in idx_cars + idx_car_trspt]
 
         arr = (
             self.A[
@@ -451,76 +1115,105 @@ class Inventory:
         )
 
         nonzero_idx = np.argwhere(arr)
+        # convert positions in `idx_others` to row indices
+        nonzero_idx[:, 0] = np.array(idx_others)[nonzero_idx[:, 0]]
+        positions = np.array([row_position[i] for i in nonzero_idx[:, 0]], dtype=int)
 
-        # use pyprind to display a progress bar
-        bar = pyprind.ProgBar(len(nonzero_idx), stream=1, title="Calculating impacts")
+        is_biosphere = np.array(
+            [isinstance(self.rev_inputs[i][1], tuple) for i in nonzero_idx[:, 0]],
+            dtype=bool,
+        )
 
-        for a in nonzero_idx:
-            bar.update()
+        # impacts per unit of each row, for each iteration
+        new_arr = np.zeros(
+            (
+                self.iterations,
+                self.B.shape[1],
+                len(idx_rows),
+                self.A.shape[-1],
+            ),
+            dtype=self.dtype,
+        )
 
-            if isinstance(self.rev_inputs[a[0]][1], tuple):
-                # it's a biosphere flow, hence no need to calculate LCA
-                new_arr[a[0], :, a[1]] = B[a[1], :, a[0]]
+        # biosphere flows, hence no need to calculate LCA
+        years = nonzero_idx[is_biosphere, 1]
+        new_arr[:, :, positions[is_biosphere], years] = B[
+            years, :, nonzero_idx[is_biosphere, 0]
+        ].T
 
-            else:
-                f_vector[:] = 0
-                f_vector[a[0]] = 1
-                X = sparse.linalg.spsolve(
-                    sparse.csr_matrix(self.A[0, ..., a[1]]), f_vector.T
-                )
-                _X = (X * B[a[1]]).sum(axis=-1).T
-                new_arr[a[0], :, a[1]] = _X
+        # technosphere flows: iterations that share the same background
+        # matrix share one factorization, and all the demand vectors
+        # of a year are solved at once
+        problems, selections, groups = [], [], []
+        for y in range(len(self.scope["year"])):
+            sel = ~is_biosphere & (nonzero_idx[:, 1] == y)
 
-        new_arr = new_arr.transpose(1, 0, 2)
+            if not sel.any():
+                continue
 
-        arr = (
-            self.A[:, :, idx_car_trspt].reshape(
-                self.iterations,
-                -1,
-                len(self.scope["size"]),
-                len(self.scope["powertrain"]),
-                len(self.scope["year"]),
+            unique_iterations, inverse = self.A.unique_iterations(
+                y, exclude=idx_cars + idx_car_trspt
             )
-            * new_arr[:, None, :, None, None, :]
-            * -1
+            problems.append((unique_iterations, y, nonzero_idx[sel, 0]))
+            selections.append(sel)
+            groups.append(inverse)
+
+        impacts = self.solve_iterations(
+            problems,
+            B,
+            exclude=idx_cars + idx_car_trspt,
+            n_jobs=n_jobs,
+            reference=(
+                results.indexes["value"].get_loc("reference") if sensitivity else None
+            ),
         )
 
-        arr += (
-            self.A[:, :, idx_cars].reshape(
-                self.iterations,
-                -1,
-                len(self.scope["size"]),
-                len(self.scope["powertrain"]),
-                len(self.scope["year"]),
-            )
-            * new_arr[:, None, :, None, None, :]
-            * self.A[:, idx_cars, idx_car_trspt].reshape(
-                self.iterations,
-                -1,
-                len(self.scope["size"]),
-                len(self.scope["powertrain"]),
-                len(self.scope["year"]),
-            )
+        for (_, y, _), sel, inverse, arr in zip(problems, selections, groups, impacts):
+            new_arr[:, :, positions[sel], y] = arr[inverse]
+
+        iterations = np.arange(self.iterations)
+
+        # direct inputs of the transport activities
+        inputs = self.A[np.ix_(iterations, idx_rows, idx_car_trspt)] * -1
+
+        # inputs of the vehicles, scaled by the vehicle use per km
+        inputs += (
+            self.A[np.ix_(iterations, idx_rows, idx_cars)]
+            * self.A[:, idx_cars, idx_car_trspt][:, None]
         )
 
-        arr = arr[:, :, self.split_indices].sum(axis=3)
+        # number of times each row is counted in each category
+        split_counts = np.zeros(
+            (len(self.split_indices), len(idx_rows)), dtype=self.dtype
+        )
+        for c, cat in enumerate(self.split_indices):
+            for i in cat:
+                if i in row_position:
+                    split_counts[c, row_position[i]] += 1
+
+        arr = np.einsum(
+            "sr,icry,irky->ckysi",
+            split_counts,
+            new_arr,
+            inputs,
+            optimize=True,
+        ).reshape(
+            len(self.impact_categories),
+            len(self.scope["size"]),
+            len(self.scope["powertrain"]),
+            len(self.scope["year"]),
+            len(self.split_indices),
+            self.iterations,
+        )
 
-        # fetch indices not contained in self.split_indices
-        # to see if there are other flows unaccounted for
-        idx = [
-            i
-            for i in range(self.B.shape[-1])
-            if i not in list(itertools.chain.from_iterable(self.split_indices))
-        ]
         # check if any of the first items of nonzero_idx
-        # are in idx
+        # are not contained in self.split_indices,
+        # to see if there are other flows unaccounted for
+        accounted_for = set(itertools.chain.from_iterable(self.split_indices))
         for i in nonzero_idx:
-            if i[0] in idx:
+            if i[0] not in accounted_for:
                 print(f"The flow {self.rev_inputs[i[0]][0]} is not accounted for.")
 
-        # reshape the array to match the dimensions of the results table
-        arr = arr.transpose(0, 3, 4, 5, 2, 1)
-
         if sensitivity:
             results[...] = arr.sum(axis=-2)
             results /= results.sel(value="reference")
@@ -578,8 +1271,9 @@ class Inventory:
                 )
             ] = maximum
 
-        with open(DATA_DIR / "emission_factors" / "euro_classes.yaml", "r") as stream:
-            euro_classes = yaml.safe_load(stream)[self.vm.vehicle_type]
+        euro_classes = load_yaml(DATA_DIR / "emission_factors" / "euro_classes.yaml")[
+            self.vm.vehicle_type
+        ]
 
         list_years = np.clip(
             self.scope["year"],
@@ -642,14 +1336,14 @@ class Inventory:
                         maximum += 1
                         self.inputs[key] = maximum
 
-    def get_A_matrix(self):
+    def get_A_matrix(self) -> SparseTechnosphere:
         """
         Load the A matrix. The matrix contains exchanges of products (rows)
         between activities (columns).
 
-        :return: A matrix with three dimensions of shape (number of values,
-        number of products, number of activities).
-        :rtype: numpy.ndarray
+        :return: A matrix with four dimensions of shape (number of values,
+        number of products, number of activities, number of years).
+        :rtype: SparseTechnosphere
 
         """
 
@@ -659,26 +1353,25 @@ class Inventory:
             raise FileNotFoundError("The IAM files could not be found.")
 
         # load matrix A
-        initial_A = sparse.load_npz(filepath).toarray()
+        initial_A = load_sparse_matrix(filepath)
 
-        new_A = np.identity(len(self.inputs))
-        new_A[0 : np.shape(initial_A)[0], 0 : np.shape(initial_A)[0]] = initial_A
-
-        # Resize the matrix to fit the number of `value` in `self.array`
-        new_A = np.resize(
-            new_A,
+        # pad with an identity block for the activities
+        # added in `add_additional_activities`
+        new_A = sparse.block_diag(
             (
-                self.iterations,
-                len(self.inputs),
-                len(self.inputs),
+                initial_A,
+                sparse.identity(len(self.inputs) - initial_A.shape[0]),
             ),
+            format="csr",
         )
 
-        # add a `year`dimension, with length equal to the number of years
-        # in the scope
-        new_A = np.repeat(new_A[:, :, :, None], len(self.scope["year"]), axis=-1)
-
-        return new_A
+        # the background matrix is shared across iterations and years
+        return SparseTechnosphere(
+            new_A,
+            iterations=self.iterations,
+            years=len(self.scope["year"]),
+            dtype=self.dtype,
+        )
 
     def get_B_matrix(self) -> xr.DataArray:
         """
@@ -702,31 +1395,35 @@ class Inventory:
         ]
 
         if self.scenario != "static":
-            filepaths = sorted(filepaths, key=lambda x: int(x[-8:-4]))
-
-        B = np.zeros((len(filepaths), len(self.impact_categories), len(self.inputs)))
+            filepaths = {int(fp[-8:-4]): fp for fp in filepaths}
+            years = sorted(filepaths)
+
+            # only load the years needed to interpolate
+            # (or extrapolate) the years in scope
+            if len(years) > 1:
+                idx = np.clip(
+                    np.searchsorted(years, self.scope["year"]), 1, len(years) - 1
+                )
+                years = sorted({years[i] for i in np.concatenate((idx - 1, idx))})
 
-        for f, filepath in enumerate(filepaths):
-            initial_B = sparse.load_npz(filepath).toarray()
+            filepaths = [filepaths[year] for year in years]
+        else:
+            years = [2020]
 
-            new_B = np.zeros(
-                (
-                    initial_B.shape[0],
-                    len(self.inputs),
-                )
-            )
+        B = np.zeros(
+            (len(filepaths), len(self.impact_categories), len(self.inputs)),
+            dtype=self.dtype,
+        )
 
-            new_B[0 : initial_B.shape[0], 0 : initial_B.shape[1]] = initial_B
-            B[f, :, :] = new_B
+        for f, filepath in enumerate(filepaths):
+            # the matrices are stored sparse: only write the non-zero values
+            initial_B = load_sparse_matrix(filepath).tocoo()
+            B[f, initial_B.row, initial_B.col] = initial_B.data
 
         return xr.DataArray(
             B,
             coords=[
-                (
-                    [2005, 2010, 2020, 2030, 2040, 2050]
-                    if self.scenario != "static"
-                    else [2020]
-                ),
+                years,
                 np.asarray(list(self.impact_categories.keys()), dtype="object"),
                 np.asarray(list(self.inputs.keys()), dtype="object"),
             ],
@@ -872,7 +1569,14 @@ class Inventory:
 
         return rates
 
-    # @lru_cache
+    @property
+    def inputs(self) -> InputIndex:
+        return self._inputs
+
+    @inputs.setter
+    def inputs(self, inputs: dict) -> None:
+        self._inputs = inputs if isinstance(inputs, InputIndex) else InputIndex(inputs)
+
     def find_input_indices(self, contains: [tuple, str], excludes: tuple = ()) -> list:
         """
         This function finds the indices of the inputs in the A matrix
@@ -882,7 +1586,6 @@ class Inventory:
         :param excludes: list of strings
         :return: list of indices
         """
-        indices = []
 
         if not isinstance(contains, tuple):
             contains = tuple(contains)
@@ -890,13 +1593,7 @@ class Inventory:
         if not isinstance(excludes, tuple):
             excludes = tuple(excludes)
 
-        for i, input in enumerate(self.inputs):
-            if all([c in input[0] for c in contains]) and not any(
-                [e in input[0] for e in excludes]
-            ):
-                indices.append(i)
-
-        return indices
+        return self.inputs.find(contains, excludes)
 
     def add_electricity_infrastructure(self, dataset, losses):
         # Add transmission network for high and medium voltage
@@ -933,12 +1630,14 @@ class Inventory:
                 )
             ] = input[2]
 
+    @tracked
     def create_electricity_mix_for_fuel_prep(self):
         """
         This function fills the electricity market that
         supplies battery charging operations
         and hydrogen production through electrolysis.
         """
+        self.mix = self.define_electricity_mix_for_fuel_prep()
 
         try:
             losses_to_low = float(self.bs.losses[self.vm.country]["LV"])
@@ -999,6 +1698,7 @@ class Inventory:
 
         return sulfur_concentration
 
+    @tracked
     def create_fuel_markets(self):
         """
         This function creates markets for fuel, considering a given blend,
@@ -1084,8 +1784,8 @@ class Inventory:
         :param find_input_by: can be 'name' or 'unit'
         :param value_in: value to look for
         :param value_out: functional unit output
-        :return: indices of all inputs to FU, indices of inputs of interest
-        :rtype: tuple
+        :return: amount of the inputs of interest supplied, per iteration
+        :rtype: np.ndarray
         """
 
         if isinstance(value_out, str):
@@ -1096,9 +1796,11 @@ class Inventory:
         f_vector = np.zeros((np.shape(self.A)[1]))
         f_vector[index_output] = 1
 
-        X = sparse.linalg.spsolve(sparse.csr_matrix(self.A[0, ..., 0]), f_vector.T)
+        # solve each distinct iteration once
+        unique_iterations, groups = self.A.unique_iterations(0)
+        X = np.stack([self.A.solve(f_vector, i, 0) for i in unique_iterations])[groups]
 
-        ind_inputs = np.nonzero(X)[0]
+        ind_inputs = np.nonzero(X.any(axis=0))[0]
 
         if find_input_by == "name":
             ins = [
@@ -1141,7 +1843,7 @@ class Inventory:
 
             return
 
-        sum_supplied = X[ins].sum()
+        sum_supplied = X[:, ins].sum(axis=1)
 
         if zero_out_input:
             # zero out initial inputs
@@ -1187,6 +1889,7 @@ class Inventory:
 
         pass
 
+    @tracked
     def add_fuel_cell_stack(self):
         self.A[
             :,
@@ -1217,6 +1920,7 @@ class Inventory:
             * -1
         )
 
+    @tracked
     def add_hydrogen_tank(self):
         hydro_tank_type = self.vm.energy_storage.get(
             "hydrogen", {"tank type": "carbon fiber"}
@@ -1238,6 +1942,7 @@ class Inventory:
             * -1
         )
 
+    @tracked
     def add_battery(self):
         # Start of printout
         print(
@@ -1337,6 +2042,7 @@ class Inventory:
             1 + self.array.sel(parameter="battery lifetime replacements")
         )
 
+    @tracked
     def add_cng_tank(self):
         self.A[
             :,
@@ -1356,6 +2062,7 @@ class Inventory:
             * -1
         )
 
+    @tracked
     def add_vehicle_to_transport_dataset(self):
         self.A[
             :,
@@ -1363,6 +2070,7 @@ class Inventory:
             self.find_input_indices((f"transport, {self.vm.vehicle_type}, ",)),
         ] = -1 / self.array.sel(parameter="lifetime kilometers")
 
+    @tracked
     def display_renewable_rate_in_mix(self):
         sum_renew = self.define_renewable_rate_in_mix()
 
@@ -1386,6 +2094,7 @@ class Inventory:
                 f"nuclear: {int(sum_renew[2][y] * 100)}.",
             )
 
+    @tracked
     def add_electricity_to_electric_vehicles(self) -> None:
         electric_powertrains = [
             "BEV",
@@ -1411,6 +2120,7 @@ class Inventory:
                 self.array.sel(parameter=["electricity consumption"]) * -1
             )
 
+    @tracked
     def add_hydrogen_to_fuel_cell_vehicles(self) -> None:
         if "FCEV" in self.scope["powertrain"]:
             print(
@@ -1465,6 +2175,7 @@ class Inventory:
                 end=end_str,
             )
 
+    @tracked
     def add_carbon_dioxide_emissions(
         self, powertrain_short, fossil_co2, biogenic_co2
     ) -> None:
@@ -1522,6 +2233,7 @@ class Inventory:
             * -1
         )
 
+    @tracked
     def add_sulphur_emissions(self, fuel, powertrain_short, powertrains) -> None:
         # Fuel-based SO2 emissions
         # Sulfur concentration value for a given country, a given year, as concentration ratio
@@ -1562,6 +2274,7 @@ class Inventory:
                 * (64 / 32)  # molar mass of SO2/molar mass of O2
             )
 
+    @tracked
     def add_fuel_to_vehicles(self, fuel, powertrains, powertrains_short) -> None:
         if [i for i in self.scope["powertrain"] if i in powertrains]:
             (
@@ -1613,6 +2326,7 @@ class Inventory:
 
             self.add_sulphur_emissions(fuel, powertrains_short, powertrains)
 
+    @tracked
     def add_road_maintenance(self) -> None:
         # Infrastructure maintenance
         self.A[
@@ -1623,6 +2337,7 @@ class Inventory:
             1.29e-3 * -1
         )
 
+    @tracked
     def add_road_construction(self) -> None:
         # Infrastructure
         self.A[
@@ -1635,6 +2350,7 @@ class Inventory:
             5.37e-7 * self.array.sel(parameter="driving mass") * -1
         )
 
+    @tracked
     def add_exhaust_emissions(self) -> None:
         # Exhaust emissions
         # Non-fuel based emissions
@@ -1650,6 +2366,7 @@ class Inventory:
             "value", "parameter", "combined_dim", "year"
         )
 
+    @tracked
     def add_noise_emissions(self) -> None:
         # Noise emissions
         self.A[
@@ -1664,6 +2381,7 @@ class Inventory:
             "value", "parameter", "combined_dim", "year"
         )
 
+    @tracked
     def add_refrigerant_emissions(self) -> None:
         # Emissions of air conditioner refrigerant r134a
         # Leakage assumed to amount to 53g according to
@@ -1711,6 +2429,7 @@ class Inventory:
             * (np.array(self.scope["year"]) < 2022)
         )
 
+    @tracked
     def add_abrasion_emissions(self) -> None:
         # Non-exhaust emissions
 
@@ -1777,23 +2496,16 @@ class Inventory:
         Remove vehicles from self.A that do not have a TtW energy superior to 0.
         """
         # Get the indices of the vehicles that are not compliant
-        self.A = np.nan_to_num(self.A)
+        self.A.nan_to_num()
         idx = self.find_input_indices((f"{self.vm.vehicle_type.capitalize()}, ",))
+        compliant = (self.array.sel(parameter="TtW energy") > 0).values
 
-        self.A[
-            :,
-            :,
-            idx,
-        ] *= (self.array.sel(parameter=["TtW energy"]) > 0).values
+        self.A.scale(None, idx, compliant)
         self.A[:, idx, idx] = 1
 
         idx = self.find_input_indices((f"transport, {self.vm.vehicle_type}, ",))
 
-        self.A[
-            :,
-            :,
-            idx,
-        ] *= (self.array.sel(parameter=["TtW energy"]) > 0).values
+        self.A.scale(None, idx, compliant)
         self.A[:, idx, idx] = 1
 
     def change_functional_unit(self) -> None:
@@ -1801,14 +2513,13 @@ class Inventory:
         idx_cars = self.find_input_indices((f"transport, {self.vm.vehicle_type}, ",))
         idx_others = [i for i in range(self.A.shape[1]) if i not in idx_cars]
 
-        self.A[
-            np.ix_(
-                np.arange(self.iterations),
-                idx_others,
-                idx_cars,
-            )
-        ] *= 1 / np.squeeze(load_factor).reshape(
-            -1, len(idx_cars), len(self.scope["year"])
+        self.A.scale(
+            idx_others,
+            idx_cars,
+            1
+            / np.squeeze(load_factor).reshape(
+                -1, len(idx_cars), len(self.scope["year"])
+            ),
         )
 
         # iterate through self.inputs and change the unit
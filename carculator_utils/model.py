@@ -7,8 +7,9 @@ import numpy as np
 import xarray as xr
 import yaml
 
+from .assets import load_yaml
 from .background_systems import BackgroundSystemModel
-from .driving_cycles import detect_vehicle_type
+from .driving_cycles import DrivingCycle, detect_vehicle_type
 from .energy_consumption import get_default_driving_cycle_name
 from .hot_emissions import HotEmissionsModel
 from .noise_emissions import NoiseEmissionsModel
@@ -171,6 +172,14 @@ class VehicleModel:
     def __setitem__(self, key, value):
         self.array.loc[{"parameter": key}] = value
 
+    @property
+    def driving_cycle(self) -> Union[None, DrivingCycle]:
+        """
+        Summary of the driving cycle analysed by the energy consumption
+        model, passed on to the emission models. None before :meth:`set_all`.
+        """
+        return getattr(getattr(self, "ecm", None), "driving_cycle", None)
+
     def set_all(self):
         pass
 
@@ -408,6 +417,9 @@ class VehicleModel:
                         / distance
                     ).T
 
+            # keep the sums over the cycle in line with the overridden energy
+            self.ecm.energy_totals = self.energy.sum(dim="second")
+
     def calculate_ttw_energy(self) -> None:
         """
         This method calculates the energy required to operate auxiliary
@@ -711,9 +723,11 @@ class VehicleModel:
 
         _ = lambda x: np.where(x == 0, 1, x)
 
+        totals = self.ecm.energy_totals
+
         self["share recuperated energy"] = (
-            self.energy.sel(parameter="recuperated energy").sum(dim="second")
-            / _(self.energy.sel(parameter="negative motive energy").sum(dim="second"))
+            totals.sel(parameter="recuperated energy")
+            / _(totals.sel(parameter="negative motive energy"))
         ).values.T
         self["share recuperated energy"] *= self["combustion power share"] < 1
 
@@ -1255,16 +1269,16 @@ class VehicleModel:
             + self["fuel cell cost"] * self["fuel cell lifetime replacements"]
         )
 
-        with open(self.DATA_DIR / "purchase_cost_params.yaml", "r") as stream:
-            to_markup = yaml.safe_load(stream)["markup"]
+        to_markup = load_yaml(self.DATA_DIR / "purchase_cost_params.yaml")["markup"]
 
         self[to_markup] *= self["markup factor"]
 
         # calculate costs per km:
         self["lifetime"] = self["lifetime kilometers"] / self["kilometers per year"]
 
-        with open(self.DATA_DIR / "purchase_cost_params.yaml", "r") as stream:
-            purchase_cost_params = yaml.safe_load(stream)["purchase"]
+        purchase_cost_params = load_yaml(self.DATA_DIR / "purchase_cost_params.yaml")[
+            "purchase"
+        ]
 
         self["purchase cost"] = self[purchase_cost_params].sum(axis=2)
         # per km
@@ -1347,12 +1361,12 @@ class VehicleModel:
             vehicle_type=self.vehicle_type,
             powertrains=self.array.coords["powertrain"].values,
             sizes=self.array.coords["size"].values,
+            driving_cycle=self.driving_cycle,
         )
 
-        with open(
-            self.DATA_DIR / "emission_factors" / "exhaust_flows.yaml", "r"
-        ) as stream:
-            list_direct_emissions = sorted(yaml.safe_load(stream))
+        list_direct_emissions = sorted(
+            load_yaml(self.DATA_DIR / "emission_factors" / "exhaust_flows.yaml")
+        )
 
         list_direct_emissions = [
             e + f", {c}"
@@ -1360,10 +1374,9 @@ class VehicleModel:
             for e in list_direct_emissions
         ]
 
-        with open(
-            self.DATA_DIR / "emission_factors" / "euro_classes.yaml", "r"
-        ) as stream:
-            euro_classes = yaml.safe_load(stream)[self.vehicle_type]
+        euro_classes = load_yaml(
+            self.DATA_DIR / "emission_factors" / "euro_classes.yaml"
+        )[self.vehicle_type]
 
         list_years = np.clip(
             self.array.coords["year"].values,
@@ -1435,6 +1448,7 @@ class VehicleModel:
         pem = ParticulatesEmissionsModel(
             velocity=self.energy.sel(parameter="velocity"),
             mass=self["driving mass"],
+            driving_cycle=self.driving_cycle,
         )
 
         self[list_param] = pem.get_abrasion_emissions()
@@ -1458,12 +1472,15 @@ class VehicleModel:
         :return: Does not return anything. Modifies ``self.array`` in place.
         """
         velocity = self.energy.sel(parameter="velocity")
-        nem = NoiseEmissionsModel(velocity, vehicle_type=self.vehicle_type)
+        nem = NoiseEmissionsModel(
+            velocity,
+            vehicle_type=self.vehicle_type,
+            driving_cycle=self.driving_cycle,
+        )
 
-        with open(
-            self.DATA_DIR / "emission_factors" / "noise_flows.yaml", "r"
-        ) as stream:
-            list_noise_emissions = yaml.safe_load(stream)
+        list_noise_emissions = load_yaml(
+            self.DATA_DIR / "emission_factors" / "noise_flows.yaml"
+        )
 
         self.array.loc[dict(parameter=list_noise_emissions)] = (
             nem.get_sound_power_per_compartment()
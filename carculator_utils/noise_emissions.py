@@ -3,12 +3,17 @@ noise_emissions.py contains NoiseEmissionsModel which calculates noise emissions
 given a driving_cycles and a powertrain type.
 """
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from typing import Tuple, Union
 
 import numpy as np
-import pandas as pd
 import xarray as xr
+from scipy import sparse
+
+from . import DATA_DIR
+from .assets import read_dataframe
+from .driving_cycles import DrivingCycle
 
 MAP_PWT = {
     "ICEV-p": "ICEV",
@@ -63,9 +68,12 @@ def _(obj: Union[np.ndarray, xr.DataArray]) -> Union[np.ndarray, xr.DataArray]:
     return obj
 
 
+@lru_cache
 def get_noise_coefficients(filepath: Path) -> Union[None, xr.DataArray]:
     """Noise coefficients extracted for vehicles from CNOSSOS-EU 2018
     detailed by size, powertrain and EURO class for each octave.
+    The coefficients are read once per process: they must not be
+    modified in place by the caller.
 
     :param filepath: Path to the noise coefficients file.
     :type filepath: Path
@@ -74,7 +82,7 @@ def get_noise_coefficients(filepath: Path) -> Union[None, xr.DataArray]:
     """
 
     try:
-        df = pd.read_csv(filepath, sep=",")
+        df = read_dataframe(filepath, sep=",")
         cols = ["octave", "coefficient"]
 
         if "powertrain" in df.columns:
@@ -91,6 +99,76 @@ def get_noise_coefficients(filepath: Path) -> Union[None, xr.DataArray]:
     return ef
 
 
+@lru_cache
+def get_noise_coefficient_tables(
+    vehicle_type: str, powertrains: Tuple[str, ...], sizes: Tuple[str, ...]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Coefficients `a` and `b` of the rolling and propulsion noise, in dB,
+    of dimensions (powertrain, size, octave).
+    Rolling noise is given by a * log10(v / 70) + b above 70 km/h, and by b below.
+    Propulsion noise is given by a * log10((v - 70) / 70) + b above 140 km/h,
+    and by b below. The correction of electric vehicles is included in `b`.
+    The tables are built once per process for each combination of arguments:
+    arrays must not be modified by the caller.
+
+    :param vehicle_type: "car", "truck", "bus" or "two-wheeler"
+    :param powertrains: powertrains
+    :param sizes: sizes
+    :return: `a` and `b` of the rolling noise, `a` and `b` of the propulsion noise
+    :rtype: tuple
+    """
+
+    directory = DATA_DIR / "emission_factors" / vehicle_type
+    rolling_coefficients = get_noise_coefficients(
+        directory / "rolling_noise_coefficients.csv"
+    )
+    propulsion_coefficients = get_noise_coefficients(
+        directory / "propulsion_noise_coefficients.csv"
+    )
+
+    shape = (len(powertrains), len(sizes), 8)
+    tables = [np.zeros(shape) for _ in range(4)]
+
+    if rolling_coefficients is not None:
+        if "size" in rolling_coefficients.dims:
+            rolling_coefficients = rolling_coefficients.sel(
+                size=[MAP_SIZES[s] for s in sizes]
+            )
+
+        for i, coefficient in enumerate(("a", "b")):
+            tables[i][:] = rolling_coefficients.sel(coefficient=coefficient).T.values
+
+    if propulsion_coefficients is not None:
+        propulsion_coefficients = propulsion_coefficients.sel(
+            powertrain=[MAP_PWT[p] for p in powertrains]
+        )
+
+        if "size" in propulsion_coefficients.dims:
+            propulsion_coefficients = propulsion_coefficients.sel(
+                size=[MAP_SIZES[s] for s in sizes]
+            )
+        else:
+            propulsion_coefficients = propulsion_coefficients.expand_dims({"size": 1})
+
+        for i, coefficient in enumerate(("a", "b"), start=2):
+            tables[i][:] = (
+                propulsion_coefficients.sel(coefficient=coefficient)
+                .transpose("powertrain", "size", "octave")
+                .values
+            )
+
+        # For electric cars, special coefficients are applied from
+        # (`Pallas et al. 2016 <https://www.sciencedirect.com/science/article/pii/S0003682X16301608>`_ )
+        tables[3][[MAP_PWT[p] == "BEV" for p in powertrains]] -= np.array(
+            (0, 1.7, 4.2, 15, 15, 15, 13.8, 0)
+        )
+
+    for table in tables:
+        table.setflags(write=False)
+
+    return tuple(tables)
+
+
 class NoiseEmissionsModel:
     """
     Calculate propulsion and rolling noise emissions for combustion, hybrid and electric vehicles,
@@ -100,26 +178,55 @@ class NoiseEmissionsModel:
         of cycle e.g., "WLTC","WLTC 3.1","WLTC 3.2","WLTC 3.3","WLTC 3.4","CADC Urban","CADC Road",
         "CADC Motorway","CADC Motorway 130","CADC","NEDC".
     :type velocity: pandas.Series
+    :param driving_cycle: summary of the driving cycle of `velocity`, as computed
+        by :class:`EnergyConsumptionModel`. Analysed from `velocity` if None.
 
     """
 
-    def __init__(self, velocity: xr.DataArray, vehicle_type: str) -> None:
+    def __init__(
+        self,
+        velocity: xr.DataArray,
+        vehicle_type: str,
+        driving_cycle: DrivingCycle = None,
+    ) -> None:
         self.velocity = velocity / 1000 * 3600  # km/h to m/s
+        self.driving_cycle = (
+            DrivingCycle.from_velocity(velocity)
+            if driving_cycle is None
+            else driving_cycle
+        )
+        # idle seconds trimmed from the end of the driving cycle
+        self.idle_seconds = self.driving_cycle.idle_seconds
+        self.vehicle_type = vehicle_type
         self.rolling_coefficients = get_noise_coefficients(
-            Path(__file__).parent
-            / "data"
+            DATA_DIR
             / "emission_factors"
             / vehicle_type
             / "rolling_noise_coefficients.csv"
         )
         self.propulsion_coefficients = get_noise_coefficients(
-            Path(__file__).parent
-            / "data"
+            DATA_DIR
             / "emission_factors"
             / vehicle_type
             / "propulsion_noise_coefficients.csv"
         )
 
+    def noise_coefficients(
+        self,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Coefficients of the rolling and propulsion noise of the vehicles
+        (see :func:`get_noise_coefficient_tables`).
+
+        :returns: `a` and `b` of the rolling noise, `a` and `b` of the propulsion noise,
+            of dimensions (powertrain, size, octave)
+        :rtype: tuple
+        """
+        return get_noise_coefficient_tables(
+            self.vehicle_type,
+            tuple(str(p) for p in self.velocity.coords["powertrain"].values),
+            tuple(str(s) for s in self.velocity.coords["size"].values),
+        )
+
     def rolling_noise(self) -> np.ndarray:
         """Calculate noise from rolling friction.
         Model from CNOSSOS-EU project
@@ -131,34 +238,10 @@ class NoiseEmissionsModel:
 
         """
 
-        if self.rolling_coefficients is None:
-            return np.zeros_like(_(self.velocity))
-
-        _nz = lambda x: np.where(x < 1, 1, x)
+        a, b = self.noise_coefficients()[:2]
+        velocity = _(self.velocity.values)
 
-        array = np.repeat(
-            np.log10(_nz(_(self.velocity) / 70), where=(_(self.velocity) > 0)),
-            8,
-            axis=-1,
-        )
-
-        if "size" in self.rolling_coefficients.dims:
-            coefficients = self.rolling_coefficients.sel(
-                coefficient="a",
-                size=[MAP_SIZES[s] for s in self.velocity.coords["size"].values],
-            )
-            constants = self.rolling_coefficients.sel(
-                coefficient="b",
-                size=[MAP_SIZES[s] for s in self.velocity.coords["size"].values],
-            )
-
-        else:
-            coefficients = self.rolling_coefficients.sel(coefficient="a")
-            constants = self.rolling_coefficients.sel(coefficient="b")
-
-        array = array * coefficients.T.values + constants.T.values
-
-        return array
+        return np.log10(np.where(velocity > 70, velocity / 70, 1)) * a + b
 
     def propulsion_noise(self) -> np.ndarray:
         """Calculate noise from propulsion engine and gearbox.
@@ -175,54 +258,10 @@ class NoiseEmissionsModel:
 
         """
 
-        if self.propulsion_coefficients is None:
-            return np.zeros_like(_(self.velocity))
-
-        _nz = lambda x: np.where(x < 1, 1, x)
-
-        array = np.repeat(
-            np.log10(_nz((_(self.velocity) - 70) / 70), where=(_(self.velocity) > 0)),
-            8,
-            axis=-1,
-        )
-
-        coefficients = self.propulsion_coefficients.sel(coefficient="a")
-        constants = self.propulsion_coefficients.sel(coefficient="b")
-
-        if "size" in coefficients.dims:
-            a = coefficients.sel(
-                powertrain=[MAP_PWT[p] for p in self.velocity.powertrain.values],
-                size=[MAP_SIZES[s] for s in self.velocity.coords["size"].values],
-            )
-            b = constants.sel(
-                powertrain=[MAP_PWT[p] for p in self.velocity.powertrain.values],
-                size=[MAP_SIZES[s] for s in self.velocity.coords["size"].values],
-            )
-
-        else:
-            a = coefficients.sel(
-                powertrain=[MAP_PWT[p] for p in self.velocity.powertrain.values],
-            )
-            b = constants.sel(
-                powertrain=[MAP_PWT[p] for p in self.velocity.powertrain.values],
-            )
-
-        correction = np.where(a.powertrain == "BEV", 1, 0)
+        a, b = self.noise_coefficients()[2:]
+        velocity = _(self.velocity.values)
 
-        correction = _(correction) * np.array((0, 1.7, 4.2, 15, 15, 15, 13.8, 0))
-
-        if "size" in coefficients.dims:
-            a = a.values.transpose(1, 2, 0)
-            b = b.values.transpose(1, 2, 0)
-        else:
-            a = a.T.values[:, None, :]
-            b = b.T.values[:, None, :]
-
-        array = array * a + b
-
-        array = array - correction[:, None, :]
-
-        return array
+        return np.log10(np.where(velocity > 140, (velocity - 70) / 70, 1)) * a + b
 
     def get_sound_power_per_compartment(self) -> np.ndarray:
         """
@@ -236,43 +275,79 @@ class NoiseEmissionsModel:
         :rtype: numpy.ndarray
         """
 
-        # rolling noise, in dB, for each second of the driving_cycles
-        rolling = self.rolling_noise()
-        # propulsion noise, in dB, for each second of the driving_cycles
-        propulsion = self.propulsion_noise()
-
-        # sum of rolling and propulsion noise sources
-
-        total_noise = np.where(
-            _(self.velocity) > 0,
-            np.log10((10 ** (rolling / 10))) + np.log10((10 ** (propulsion / 10))),
-            0,
-        )
-
-        # convert dBs to Watts (or J/s)
-        sound_power = (10**-12) * (10 ** (total_noise / 10))
-
-        # If the driving_cycles selected is one of the driving_cycles for
-        # which carculator_utils has specifications,
-        # we use the driving_cycles "official" road section types to
-        # compartmentalize emissions.
-        # If the driving_cycles selected is instead specified by the
-        # user (passed directly as an array), we used
-        # speed levels to compartmentalize emissions.
-
-        distance = (self.velocity / 3600).sum(axis=0)
-
-        urban_noise = np.where(_(self.velocity) <= 50, sound_power, 0).sum(axis=0) / _(
-            distance
+        # The sound power of a moving vehicle is
+        # 10^-12 * 10^((rolling noise + propulsion noise) / 100) W,
+        # with noise levels of the form a * log10(speed term) + b, for each octave.
+        # Below 70 km/h, the speed terms are null: the sound power is
+        # constant, and speed bins only need to count seconds. Above,
+        # the speed-dependent factor 10^((a * log10(speed term)) / 100)
+        # is calculated once per speed value, summed per speed bin,
+        # and multiplied by the constant 10^-12 * 10^(b / 100) afterwards.
+        a_rolling, b_rolling, a_propulsion, b_propulsion = self.noise_coefficients()
+
+        # constant sound power of a moving vehicle, per octave
+        constant = (10**-12) * 10 ** ((b_rolling + b_propulsion) / 100)
+
+        # speed of each vehicle, with vehicles as columns
+        shape = self.velocity.shape[1:]
+
+        def columns(arr):
+            return np.broadcast_to(arr, self.velocity.shape).reshape(len(arr), -1)
+
+        velocity = columns(self.driving_cycle.speed)
+        moving = columns(self.driving_cycle.moving)
+
+        # speed-dependent factor, minus 1, for each speed above 70 km/h,
+        # of dimensions (speed, powertrain, size, octave)
+        second, column = np.nonzero(velocity > 70)
+        speeds, speed_index = np.unique(velocity[second, column], return_inverse=True)
+        speeds = speeds[:, None, None, None]
+        factors = (
+            10
+            ** (
+                (
+                    a_rolling * np.log10(speeds / 70)
+                    + a_propulsion
+                    * np.log10(np.where(speeds > 140, (speeds - 70) / 70, 1))
+                )
+                / 100
+            )
+            - 1
         )
+        # row of the factors of each second above 70 km/h
+        powertrain, size = np.unravel_index(column, shape)[-2:]
+        row = np.ravel_multi_index((speed_index, powertrain, size), factors.shape[:-1])
+        factors = factors.reshape(-1, 8)
+
+        distance = self.driving_cycle.distance
+
+        sums = []
+        for in_bin in map(columns, self.driving_cycle.masks):
+            # idle seconds have a sound power of 10^-12 W
+            stopped = (in_bin & ~moving).sum(axis=0)
+
+            # sum of the speed-dependent factor over the seconds of the bin,
+            # which is 1 below 70 km/h
+            factor = np.zeros((velocity.shape[1], 8))
+            factor += _((in_bin & moving).sum(axis=0))
+
+            # number of seconds of each vehicle for each row of factors
+            fast_in_bin = in_bin[second, column]
+            seconds = sparse.csr_matrix(
+                (
+                    np.ones(fast_in_bin.sum()),
+                    (column[fast_in_bin], row[fast_in_bin]),
+                ),
+                shape=(velocity.shape[1], len(factors)),
+            )
+            factor += seconds @ factors
 
-        suburban_noise = np.where(
-            (_(self.velocity) > 50) & (_(self.velocity) <= 80), sound_power, 0
-        ).sum(axis=0) / _(distance)
+            factor = factor.reshape(shape + (8,))
+            stopped = stopped.reshape(shape)
+            sums.append((factor * constant + _(stopped) * 10**-12) / _(distance))
 
-        rural_noise = np.where(_(self.velocity) > 80, sound_power, 0).sum(axis=0) / _(
-            distance
-        )
+        urban_noise, suburban_noise, rural_noise = sums
+        urban_noise += self.idle_seconds * 10**-12 / _(distance)
 
         res = np.concatenate(
             (
@@ -8,6 +8,7 @@ from typing import Union
 import numpy as np
 import xarray as xr
 
+from .driving_cycles import DrivingCycle
 from .hot_emissions import get_driving_cycle_compartments
 
 
@@ -48,14 +49,26 @@ class ParticulatesEmissionsModel:
     :param velocity: Driving cycle. Pandas Series of second-by-second speeds (km/h) or name (str)
         of cycle e.g., "Urban delivery", "Regional delivery", "Long haul".
     :param cycle_name: name of the driving_cycles. Str.
+    :param driving_cycle: summary of the driving cycle of `velocity`, as computed
+        by :class:`EnergyConsumptionModel`. Analysed from `velocity` if None.
 
 
     """
 
-    def __init__(self, velocity: xr.DataArray, mass: xr.DataArray) -> None:
+    def __init__(
+        self,
+        velocity: xr.DataArray,
+        mass: xr.DataArray,
+        driving_cycle: DrivingCycle = None,
+    ) -> None:
         self.mass = mass.values / 1000  # in tons
         self.velocity = velocity / 1000 * 3600  # in km/h
-        self.distance = velocity.sum(dim="second") / 1000
+        self.driving_cycle = (
+            DrivingCycle.from_velocity(velocity)
+            if driving_cycle is None
+            else driving_cycle
+        )
+        self.distance = self.driving_cycle.distance
 
     def get_abrasion_emissions(self) -> np.ndarray:
         (
@@ -79,15 +92,7 @@ class ParticulatesEmissionsModel:
         road_pm10, road_pm25 = self.get_road_wear_emissions()
         dust_pm10, dust_pm25 = self.get_resuspended_road_dust()
 
-        urban_share = self.velocity.where(self.velocity < 50, 0).sum(
-            dim="second"
-        ) / self.velocity.sum(dim="second")
-        suburban_share = self.velocity.where(
-            (self.velocity > 50) & (self.velocity <= 80), 0
-        ).sum(dim="second") / self.velocity.sum(dim="second")
-        rural_share = self.velocity.where(self.velocity > 80, 0).sum(
-            dim="second"
-        ) / self.velocity.sum(dim="second")
+        urban_share, suburban_share, rural_share = self.driving_cycle.shares
 
         tire_wear = (tire_pm10_urban + tire_pm25_urban) * urban_share.T
         tire_wear += (tire_pm10_rural + tire_pm25_rural) * suburban_share.T
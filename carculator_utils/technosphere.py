@@ -0,0 +1,612 @@
+"""
+technosphere.py contains SparseTechnosphere, a sparse replacement for the dense
+(iterations x products x activities x years) technosphere matrix used by
+:class:`carculator_utils.inventory.Inventory`.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+
+class SparseTechnosphere:
+    """
+    Sparse technosphere matrix of shape (iterations, products, activities, years).
+
+    The background exchanges are identical for every iteration and every year.
+    They are stored once, as a sparse base matrix. Exchanges written afterwards
+    (vehicles, fuel and electricity markets, etc.) are stored in an overlay
+    which holds one value per iteration and per year for each written
+    (product, activity) pair. Memory therefore scales with the number of
+    non-zero exchanges, not with the square of the number of activities.
+
+    The object supports NumPy indexing (slices, integers, lists, `np.ix_`,
+    augmented assignments), so that code written against the former dense
+    array keeps working.
+
+    :ivar shape: shape of the equivalent dense array
+    :vartype shape: tuple
+    :ivar dtype: floating-point type of the exchanges
+    :vartype dtype: numpy.dtype
+
+    """
+
+    # maximum number of LU factorizations kept in memory
+    max_factorizations = 16
+    # maximum number of activities by which a matrix can differ
+    # from a reference for `solve` to reuse its factorization
+    max_update_rank = 64
+
+    def __init__(
+        self,
+        base: sparse.spmatrix,
+        iterations: int,
+        years: int,
+        dtype: Union[str, np.dtype] = "float64",
+    ) -> None:
+        """
+        :param base: square sparse matrix with the background exchanges
+        :param iterations: number of iterations (length of the `value` dimension)
+        :param years: number of years in the scope
+        :param dtype: floating-point type of the exchanges, "float64" or "float32"
+        """
+        if base.shape[0] != base.shape[1]:
+            raise ValueError("The technosphere matrix must be square.")
+
+        self.dtype = np.dtype(dtype)
+
+        self._base = sparse.csr_matrix(base, dtype=self.dtype)
+        self._base.sum_duplicates()
+        self.shape = (iterations, base.shape[0], base.shape[1], years)
+
+        # overlay: sorted (row * n + column) keys,
+        # and the slot of each key in `self._values`
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._slots = np.zeros(0, dtype=np.int64)
+        self._values = np.zeros((0, iterations, years), dtype=self.dtype)
+        self._size = 0
+
+        # LU factorizations, per (iteration, year)
+        self._factorizations = {}
+        # hash of the base matrix, computed on demand
+        self._base_digest = None
+        # if a list, the overlay keys of each assignment are appended to it,
+        # with the values they had before, see :meth:`write`
+        self.journal = None
+
+        self._axes = [
+            np.arange(dim).reshape([-1 if i == a else 1 for i in range(4)])
+            for a, dim in enumerate(self.shape)
+        ]
+
+    def share(self, directory: Union[str, Path]) -> dict:
+        """
+        Write the matrix to `.npy` files, so that other processes
+        can memory-map it with :meth:`attach` instead of receiving a copy.
+
+        :param directory: directory where the files are written
+        :return: handle to pass to :meth:`attach`
+        """
+        directory = Path(directory)
+        arrays = {
+            "data": self._base.data,
+            "indices": self._base.indices,
+            "indptr": self._base.indptr,
+            "keys": self._keys,
+            "slots": self._slots,
+            "values": self._values[: self._size],
+        }
+        for name, arr in arrays.items():
+            np.save(directory / f"{name}.npy", arr)
+
+        return {"directory": str(directory), "shape": self.shape}
+
+    @classmethod
+    def attach(cls, handle: dict) -> "SparseTechnosphere":
+        """
+        Memory-map, read-only, a matrix written by :meth:`share`.
+
+        :param handle: handle returned by :meth:`share`
+        :return: a SparseTechnosphere backed by the memory-mapped files
+        """
+        directory = Path(handle["directory"])
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r")
+            for name in ("data", "indices", "indptr", "keys", "slots", "values")
+        }
+        iterations, rows, cols, years = handle["shape"]
+
+        technosphere = cls.__new__(cls)
+        technosphere._base = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(rows, cols),
+            copy=False,
+        )
+        technosphere.shape = tuple(handle["shape"])
+        technosphere.dtype = arrays["values"].dtype
+        technosphere._keys = arrays["keys"]
+        technosphere._slots = arrays["slots"]
+        technosphere._values = arrays["values"]
+        technosphere._size = arrays["values"].shape[0]
+        technosphere._factorizations = {}
+        technosphere._base_digest = None
+        technosphere.journal = None
+        technosphere._axes = [
+            np.arange(dim).reshape([-1 if i == a else 1 for i in range(4)])
+            for a, dim in enumerate(technosphere.shape)
+        ]
+
+        return technosphere
+
+    @property
+    def ndim(self) -> int:
+        return 4
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(shape={self.shape}, "
+            f"base non-zeros={self._base.nnz}, overlay entries={self._size})"
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the base matrix and the overlay, in bytes."""
+        return (
+            self._base.data.nbytes
+            + self._base.indices.nbytes
+            + self._base.indptr.nbytes
+            + self._values.nbytes
+            + self._keys.nbytes
+            + self._slots.nbytes
+        )
+
+    def _locate(self, key) -> tuple:
+        """
+        Return the iteration, row, column and year coordinates
+        of the elements selected by `key`, following NumPy indexing rules.
+        """
+        return tuple(np.broadcast_to(axis, self.shape)[key] for axis in self._axes)
+
+    def _find(self, keys: np.ndarray) -> np.ndarray:
+        """Return the overlay slot of each key, or -1 if the key is not stored."""
+        if self._keys.size == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+
+        pos = np.clip(np.searchsorted(self._keys, keys), 0, self._keys.size - 1)
+        return np.where(self._keys[pos] == keys, self._slots[pos], -1)
+
+    def _base_values(self, keys: np.ndarray) -> np.ndarray:
+        if keys.size == 0:
+            return np.zeros(0, dtype=self.dtype)
+        n = self.shape[2]
+        return np.asarray(self._base[keys // n, keys % n], dtype=self.dtype).ravel()
+
+    def _allocate(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Add unique `keys` to the overlay, initialized with the base values.
+        :return: the slots of the new keys
+        """
+        slots = np.arange(self._size, self._size + keys.size)
+
+        if slots.size and slots[-1] >= self._values.shape[0]:
+            capacity = max(2 * self._values.shape[0], slots[-1] + 1, 64)
+            values = np.zeros((capacity, *self._values.shape[1:]), dtype=self.dtype)
+            values[: self._size] = self._values[: self._size]
+            self._values = values
+
+        self._values[slots] = self._base_values(keys)[:, None, None]
+        self._size += keys.size
+
+        keys = np.concatenate((self._keys, keys))
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._slots = np.concatenate((self._slots, slots))[order]
+
+        return slots
+
+    def __getitem__(self, key) -> Union[np.ndarray, float]:
+        # fast path for a 2D (products x activities) slice
+        if (
+            isinstance(key, tuple)
+            and len(key) == 4
+            and isinstance(key[0], (int, np.integer))
+            and all(isinstance(k, slice) and k == slice(None) for k in key[1:3])
+            and isinstance(key[3], (int, np.integer))
+        ):
+            return self.to_sparse(key[0], key[3]).toarray()
+
+        iteration, row, col, year = self._locate(key)
+        shape = row.shape
+
+        if row.size == 0:
+            return np.zeros(shape, dtype=self.dtype)
+
+        keys, inverse = np.unique(
+            (row.astype(np.int64) * self.shape[2] + col).ravel(), return_inverse=True
+        )
+        inverse = inverse.ravel()
+
+        out = self._base_values(keys)[inverse]
+        slots = self._find(keys)[inverse]
+        mask = slots >= 0
+        out[mask] = self._values[
+            slots[mask], iteration.ravel()[mask], year.ravel()[mask]
+        ]
+
+        return out.reshape(shape)[()]
+
+    def __setitem__(self, key, value) -> None:
+        iteration, row, col, year = self._locate(key)
+
+        if row.size == 0:
+            return
+
+        self._factorizations.clear()
+
+        value = np.asarray(value, dtype=self.dtype)
+        # NumPy strips leading unit dimensions of the value being assigned
+        while value.ndim > row.ndim and value.shape[0] == 1:
+            value = value[0]
+        value = np.broadcast_to(value, row.shape)
+
+        keys, inverse = np.unique(
+            (row.astype(np.int64) * self.shape[2] + col).ravel(), return_inverse=True
+        )
+        slots = self._find(keys)
+        missing = slots < 0
+        if missing.any():
+            slots[missing] = self._allocate(keys[missing])
+
+        if self.journal is not None:
+            self.journal.append((keys, self._values[slots]))
+
+        self._values[slots[inverse.ravel()], iteration.ravel(), year.ravel()] = (
+            value.ravel()
+        )
+
+    def write(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Set the exchanges of the overlay `keys`, e.g. back to
+        the values recorded in :attr:`journal`.
+
+        :param keys: unique keys (row * number of activities + column)
+        :param values: array of shape (len(keys), iterations, years)
+        """
+        if keys.size == 0:
+            return
+
+        self._factorizations.clear()
+
+        slots = self._find(keys)
+        missing = slots < 0
+        if missing.any():
+            slots[missing] = self._allocate(keys[missing])
+
+        self._values[slots] = values
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.toarray().astype(dtype or self.dtype, copy=False)
+
+    def toarray(self) -> np.ndarray:
+        """
+        Return the equivalent dense array.
+        Beware: this allocates iterations x products x activities x years values.
+        """
+        arr = np.zeros(self.shape, dtype=self.dtype)
+        for i in range(self.shape[0]):
+            for y in range(self.shape[-1]):
+                arr[i, ..., y] = self.to_sparse(i, y).toarray()
+        return arr
+
+    def to_sparse(self, iteration: int = 0, year: int = 0) -> sparse.csr_matrix:
+        """
+        Return the products x activities matrix for a given iteration and year.
+
+        :param iteration: index along the `value` dimension
+        :param year: index along the `year` dimension
+        :return: a sparse CSR matrix
+        """
+        n = self.shape[2]
+        base = self._base.tocoo()
+        base_keys = base.row.astype(np.int64) * n + base.col
+
+        # overlay entries supersede base entries
+        keep = self._find(base_keys) < 0
+        values = self._values[self._slots, iteration, year]
+
+        matrix = sparse.csr_matrix(
+            (
+                np.concatenate((base.data[keep], values)),
+                (
+                    np.concatenate((base.row[keep], self._keys // n)),
+                    np.concatenate((base.col[keep], self._keys % n)),
+                ),
+            ),
+            shape=self.shape[1:3],
+        )
+        matrix.eliminate_zeros()
+
+        return matrix
+
+    def fingerprint(
+        self,
+        iteration: int = 0,
+        year: int = 0,
+        exclude: Union[None, list, np.ndarray] = None,
+    ) -> str:
+        """
+        Return a hash of the content of the products x activities matrix
+        for a given iteration and year. The base matrix is hashed once,
+        so that only the overlay is hashed for each iteration and year.
+
+        :param iteration: index along the `value` dimension
+        :param year: index along the `year` dimension
+        :param exclude: activity indices left out of the hash
+        :return: hexadecimal digest
+        """
+        if self._base_digest is None:
+            digest = hashlib.blake2b(str(self._base.shape).encode(), digest_size=16)
+            for arr in (self._base.indptr, self._base.indices, self._base.data):
+                digest.update(np.ascontiguousarray(arr).tobytes())
+            self._base_digest = digest.digest()
+
+        keys, slots = self._keys, self._slots
+        if exclude is not None:
+            mask = ~np.isin(keys % self.shape[2], exclude)
+            keys, slots = keys[mask], slots[mask]
+
+        digest = hashlib.blake2b(self._base_digest, digest_size=16)
+        digest.update(np.ascontiguousarray(keys).tobytes())
+        digest.update(
+            np.ascontiguousarray(
+                self._values[slots, iteration % self.shape[0], year % self.shape[-1]]
+            ).tobytes()
+        )
+
+        return digest.hexdigest()
+
+    def snapshot(self) -> tuple:
+        """
+        Return a copy of the current exchanges, to be passed to :meth:`restore`.
+        The base matrix structure is shared, only its values are copied.
+        """
+        return (
+            self._keys.copy(),
+            self._slots.copy(),
+            self._values[: self._size].copy(),
+            self._base.data.copy(),
+        )
+
+    def restore(self, snapshot: tuple) -> None:
+        """
+        Revert the matrix to the state returned by :meth:`snapshot`.
+        Exchanges written since then are discarded.
+
+        :param snapshot: object returned by :meth:`snapshot`
+        """
+        keys, slots, values, base_data = snapshot
+
+        self._keys = keys.copy()
+        self._slots = slots.copy()
+        self._values = values.copy()
+        self._size = values.shape[0]
+        self._base.data = base_data.copy()
+        self._base_digest = None
+        self._factorizations.clear()
+
+    def unique_iterations(
+        self, year: int = 0, exclude: Union[None, list, np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group the iterations that share the same products x activities
+        matrix for a given year, so that they can share one factorization.
+
+        :param year: index along the `year` dimension
+        :param exclude: activity indices ignored in the comparison
+        :return: one representative iteration per group,
+        and the group of each iteration
+        """
+        n = self.shape[2]
+        slots = self._slots
+        if exclude is not None:
+            slots = slots[~np.isin(self._keys % n, exclude)]
+
+        _, index, inverse = np.unique(
+            self._values[slots, :, year % self.shape[-1]].T,
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+
+        return index, inverse.ravel()
+
+    def nonzero_rows(self, cols: Union[list, np.ndarray]) -> np.ndarray:
+        """
+        Return the indices of the products with a non-zero exchange
+        with any of the activities `cols`, in any iteration or year.
+
+        :param cols: activity indices
+        :return: sorted array of product indices
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        n = self.shape[2]
+
+        base_rows = sparse.csc_matrix(self._base)[:, cols].nonzero()[0]
+
+        in_cols = np.isin(self._keys % n, cols)
+        nonzero = np.any(self._values[self._slots[in_cols]] != 0, axis=(1, 2))
+        overlay_rows = self._keys[in_cols][nonzero] // n
+
+        return np.union1d(base_rows, overlay_rows)
+
+    def scale(
+        self,
+        rows: Union[None, list, np.ndarray],
+        cols: Union[list, np.ndarray],
+        factor: Union[float, np.ndarray],
+    ) -> None:
+        """
+        Multiply in place the exchanges of the activities `cols`.
+        Equivalent to ``A[np.ix_(iterations, rows, cols)] *= factor``,
+        but only the non-zero exchanges are visited.
+
+        :param rows: product indices to scale. All products if None.
+        :param cols: activity indices to scale
+        :param factor: scaling factor, broadcastable to (iterations, len(cols), years)
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        if cols.size == 0:
+            return
+
+        n = self.shape[2]
+        factor = np.broadcast_to(
+            np.asarray(factor, dtype=self.dtype),
+            (self.shape[0], cols.size, self.shape[-1]),
+        )
+
+        position = np.full(n, -1, dtype=np.int64)
+        position[cols] = np.arange(cols.size)
+
+        base = sparse.csc_matrix(self._base)[:, cols].tocoo()
+        keys = np.union1d(
+            base.row.astype(np.int64) * n + cols[base.col],
+            self._keys[position[self._keys % n] >= 0],
+        )
+
+        if rows is not None:
+            keys = keys[np.isin(keys // n, rows)]
+
+        slots = self._find(keys)
+        missing = slots < 0
+        if missing.any():
+            slots[missing] = self._allocate(keys[missing])
+
+        self._values[slots] *= factor[:, position[keys % n], :].transpose(1, 0, 2)
+        self._factorizations.clear()
+
+    def nan_to_num(self) -> None:
+        """Replace NaN by zeros and infinite values by large finite numbers, in place."""
+        self._base.data = np.nan_to_num(self._base.data)
+        self._base_digest = None
+        self._values[: self._size] = np.nan_to_num(self._values[: self._size])
+        self._factorizations.clear()
+
+    def factorize(self, iteration: int = 0, year: int = 0):
+        """
+        Return the LU factorization of the products x activities matrix
+        for a given iteration and year. The factorization is computed once
+        and reused until the matrix is modified.
+
+        :param iteration: index along the `value` dimension
+        :param year: index along the `year` dimension
+        :return: a :class:`scipy.sparse.linalg.SuperLU` object
+        """
+        key = (iteration % self.shape[0], year % self.shape[-1])
+
+        if key in self._factorizations:
+            # keep the most recently used factorizations last,
+            # so that a reference used for every solve is not evicted
+            self._factorizations[key] = self._factorizations.pop(key)
+        else:
+            if len(self._factorizations) >= self.max_factorizations:
+                # evict the least recently used factorization
+                del self._factorizations[next(iter(self._factorizations))]
+            self._factorizations[key] = splu(self.to_sparse(*key).tocsc())
+
+        return self._factorizations[key]
+
+    def changed_activities(
+        self,
+        iteration: int,
+        reference: int = 0,
+        year: int = 0,
+        exclude: Union[None, list, np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Return the activities whose exchanges differ between two iterations.
+
+        :param iteration: index along the `value` dimension
+        :param reference: index along the `value` dimension to compare with
+        :param year: index along the `year` dimension
+        :param exclude: activity indices ignored in the comparison
+        :return: sorted array of activity indices
+        """
+        n = self.shape[2]
+        year %= self.shape[-1]
+
+        changed = (
+            self._values[self._slots, iteration % self.shape[0], year]
+            != self._values[self._slots, reference % self.shape[0], year]
+        )
+        cols = np.unique(self._keys[changed] % n)
+
+        if exclude is not None:
+            cols = cols[~np.isin(cols, exclude)]
+
+        return cols
+
+    def solve(
+        self,
+        demand: np.ndarray,
+        iteration: int = 0,
+        year: int = 0,
+        reference: Union[None, int] = None,
+        exclude: Union[None, list, np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Solve the system for one or several demand vectors.
+
+        With a `reference` iteration, the factorization of the reference is
+        reused if the two matrices differ by at most `max_update_rank`
+        activities: the difference is a low-rank update, solved for with
+        the Woodbury identity instead of a new factorization.
+
+        :param demand: array of shape (products,) or (products, number of demands)
+        :param iteration: index along the `value` dimension
+        :param year: index along the `year` dimension
+        :param reference: index along the `value` dimension
+        whose factorization may be reused
+        :param exclude: activity indices left out of the update,
+        which do not supply any of the products demanded
+        :return: supply array, of the same shape as `demand`
+        """
+        demand = np.asarray(demand, dtype=self.dtype)
+        key = (iteration % self.shape[0], year % self.shape[-1])
+
+        if reference is None or key in self._factorizations:
+            return self.factorize(*key).solve(demand)
+
+        cols = self.changed_activities(iteration, reference, year, exclude=exclude)
+
+        if cols.size > self.max_update_rank:
+            return self.factorize(*key).solve(demand)
+
+        factorization = self.factorize(reference, year)
+        supply = factorization.solve(demand)
+
+        if cols.size == 0:
+            return supply
+
+        # A = A_ref + D @ E.T, where D holds the differences of the
+        # columns `cols` and E selects them
+        n = self.shape[2]
+        keys = self._keys[np.isin(self._keys % n, cols)]
+        slots = self._find(keys)
+        differences = np.zeros((self.shape[1], cols.size), dtype=self.dtype)
+        differences[keys // n, np.searchsorted(cols, keys % n)] = (
+            self._values[slots, key[0], key[1]]
+            - self._values[slots, reference % self.shape[0], key[1]]
+        )
+
+        # A^-1 = A_ref^-1 - A_ref^-1 D (I + E.T A_ref^-1 D)^-1 E.T A_ref^-1
+        correction = factorization.solve(differences)
+        capacitance = np.eye(cols.size, dtype=self.dtype) + correction[cols]
+
+        return supply - correction @ np.linalg.solve(capacitance, supply[cols])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from carculator_utils.accumulator import ResultsAccumulator
+
+QUANTILES = [0.05, 0.5, 0.95]
+
+
+def make_results(iterations=2000):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(3, 4, iterations))
+    data[0] = rng.lognormal(size=(4, iterations))
+    return xr.DataArray(
+        data,
+        coords=[["a", "b", "c"], np.arange(4), np.arange(iterations)],
+        dims=["impact_category", "year", "value"],
+    )
+
+
+def test_summary_matches_full_results():
+    results = make_results()
+    accumulator = ResultsAccumulator(QUANTILES)
+    for start in range(0, results.sizes["value"], 7):
+        accumulator.update(results.isel(value=slice(start, start + 7)))
+
+    summary = accumulator.to_dataset()
+
+    assert summary.attrs["iterations"] == results.sizes["value"]
+    assert np.allclose(summary["mean"], results.mean("value"))
+    assert np.allclose(summary["std"], results.std("value"))
+    assert np.allclose(summary["min"], results.min("value"))
+    assert np.allclose(summary["max"], results.max("value"))
+
+    # quantile sketches are approximate
+    error = abs(summary["quantiles"] - results.quantile(QUANTILES, "value"))
+    assert (error <= 0.05 * (results.max("value") - results.min("value"))).all()
+
+
+def test_few_samples_give_exact_quantiles():
+    results = make_results(3)
+    accumulator = ResultsAccumulator(QUANTILES)
+    accumulator.update(results)
+
+    assert np.allclose(
+        accumulator.to_dataset()["quantiles"], results.quantile(QUANTILES, "value")
+    )
+
+
+def test_invalid_quantiles():
+    with pytest.raises(ValueError):
+        ResultsAccumulator([0, 0.5])
+
+
+def test_large_batches():
+    rng = np.random.default_rng(1)
+    data = rng.lognormal(size=(5000, 200))
+    accumulator = ResultsAccumulator(QUANTILES, size=64)
+    for start in range(0, len(data), 1000):
+        accumulator.update(
+            xr.DataArray(data[start : start + 1000], dims=["value", "x"])
+        )
+
+    quantiles = accumulator.to_dataset()["quantiles"].values
+    ranks = (data[None] < quantiles[:, None]).mean(axis=1)
+    assert np.abs(ranks - np.array(QUANTILES)[:, None]).max() < 0.03
+
+    # the sketch does not keep the samples
+    assert sum(level.shape[1] for level in accumulator._levels) < 4 * 64
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import carculator_utils.vehicle_input_parameters as vip
+from carculator_utils.array import fill_xarray_from_input_parameters
+
+DEFAULT = Path(__file__, "..").resolve() / "fixtures" / "default_test.json"
+EXTRA = Path(__file__, "..").resolve() / "fixtures" / "extra_test.json"
+
+SIZES = ["Large", "Medium", "Mini", "Small"]
+POWERTRAINS = ["BEV", "FCEV", "HEV-p", "ICEV-d", "ICEV-p"]
+YEARS = [2000, 2010, 2020, 2030, 2040, 2050]
+
+
+def fill_with_loop(input_parameters, array):
+    """Label-based assignment, one parameter after the other."""
+    scope = {dim: array.coords[dim].values.tolist() for dim in array.dims}
+
+    for param in input_parameters:
+        metadata = input_parameters.metadata[param]
+        labels = {
+            dim: [v for v in np.atleast_1d(metadata[key]) if v in scope[dim]]
+            for dim, key in (("size", "sizes"), ("powertrain", "powertrain"))
+        }
+        labels["year"] = [
+            y for y in np.atleast_1d(metadata["year"]) if y in scope["year"]
+        ]
+
+        if all(labels.values()):
+            array.loc[dict(parameter=metadata["name"], **labels)] = (
+                input_parameters.values[param]
+            )
+
+    return array
+
+
+def make_parameters(count):
+    rng = np.random.default_rng(0)
+    parameters = {}
+    for i in range(count):
+        amount = float(rng.random())
+        parameters[f"{i}-param"] = {
+            "name": f"parameter {i % (count // 4)}",
+            "sizes": sorted(rng.choice(SIZES, rng.integers(1, 4), replace=False)),
+            "powertrain": sorted(
+                rng.choice(POWERTRAINS, rng.integers(1, 4), replace=False)
+            ),
+            "year": int(rng.choice(YEARS)),
+            "kind": "distribution",
+            "uncertainty_type": 4,
+            "amount": amount,
+            "minimum": amount * 0.9,
+            "maximum": amount * 1.1,
+        }
+    return vip.VehicleInputParameters(parameters, [])
+
+
+@pytest.mark.parametrize("stochastic", [False, True])
+def test_fill_matches_label_assignment(stochastic):
+    parameters = make_parameters(400)
+    if stochastic:
+        parameters.stochastic(5)
+    else:
+        parameters.static()
+
+    _, array = fill_xarray_from_input_parameters(parameters)
+    expected = fill_with_loop(parameters, array.copy(data=np.zeros_like(array)))
+
+    assert (array.values == expected.values).all()
+
+    # in a scope, with the sensitivity layout
+    parameters.static()
+    scope = {"size": ["Mini", "Large"], "powertrain": ["ICEV-d"], "year": [2020]}
+    _, array = fill_xarray_from_input_parameters(
+        parameters, sensitivity=True, scope=dict(scope)
+    )
+    expected = fill_with_loop(parameters, array.copy(data=np.zeros_like(array)))
+    # each column differs from the reference by one parameter, increased by 10%
+    for param in parameters.input_parameters:
+        expected.loc[dict(parameter=param, value=param)] *= 1.1
+
+    assert (array.values == expected.values).all()
+
+
+def test_fill_from_fixtures():
+    parameters = vip.VehicleInputParameters(DEFAULT, EXTRA)
+    parameters.static()
+
+    _, array = fill_xarray_from_input_parameters(parameters)
+    expected = fill_with_loop(parameters, array.copy(data=np.zeros_like(array)))
+
+    assert (array.values == expected.values).all()
@@ -0,0 +1,39 @@
+import pytest
+
+from carculator_utils import DATA_DIR, assets
+
+FUEL_SPECS = DATA_DIR / "fuel" / "fuel_specs.yaml"
+LOSSES = DATA_DIR / "electricity" / "cumulative_electricity_losses.csv"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "_cache_dir", None)
+    assets.clear_caches()
+    assets.set_cache_dir(tmp_path)
+    yield tmp_path
+    assets.clear_caches()
+
+
+def test_files_are_parsed_once():
+    assert assets.load_yaml(FUEL_SPECS) is assets.load_yaml(FUEL_SPECS)
+    assert assets.read_csv(LOSSES) is assets.read_csv(LOSSES)
+
+    array = assets.load_array(LOSSES)
+    assert not array.flags.writeable
+
+
+def test_binary_cache(cache_dir):
+    specs = assets.load_yaml(FUEL_SPECS)
+    rows = assets.read_csv(LOSSES)
+
+    cached = list(assets.get_cache_dir().iterdir())
+    assert assets.get_cache_dir().parent == cache_dir
+    assert len(cached) == 2
+    assert all(f.suffix == ".pickle" for f in cached)
+
+    # a new process would read the cached files
+    assets.clear_caches()
+    assert assets.load_yaml(FUEL_SPECS) == specs
+    assert assets.read_csv(LOSSES) == rows
+    assert len(list(assets.get_cache_dir().iterdir())) == 2
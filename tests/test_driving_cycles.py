@@ -0,0 +1,56 @@
+import shutil
+
+import numpy as np
+import xarray as xr
+
+from carculator_utils import DATA_DIR
+from carculator_utils.driving_cycles import (
+    DrivingCycle,
+    get_standard_driving_cycle_and_gradient,
+    load_table,
+    read_table,
+)
+
+
+def test_tables_are_read_once():
+    cycle, gradient = get_standard_driving_cycle_and_gradient(
+        "car", ["Medium", "Large"], "WLTC"
+    )
+    table = load_table(DATA_DIR / "driving_cycles" / "car.csv")
+
+    assert load_table(DATA_DIR / "driving_cycles" / "car.csv") is table
+    assert not table.flags.writeable
+    assert cycle.shape[1] == gradient.shape[1] == 2
+    assert cycle.flags.writeable
+
+
+def test_tables_are_loaded_from_npy(tmp_path):
+    filepath = tmp_path / "car.csv"
+    shutil.copy(DATA_DIR / "driving_cycles" / "car.csv", filepath)
+    np.save(tmp_path / "car.npy", read_table(filepath))
+
+    table = load_table(filepath)
+
+    assert isinstance(table, np.memmap)
+    assert np.array_equal(
+        table, load_table(DATA_DIR / "driving_cycles" / "car.csv"), equal_nan=True
+    )
+
+
+def test_driving_cycle_summary():
+    cycle, _ = get_standard_driving_cycle_and_gradient("car", ["Medium"], "NEDC")
+    velocity = np.nan_to_num(cycle) * 1000 / 3600
+    summary = DrivingCycle(velocity[:, None, None, None, :], idle_seconds=2)
+
+    urban, suburban, rural = summary.masks
+    assert (urban ^ suburban ^ rural).all()
+    assert np.isclose(sum(summary.shares), 1).all()
+    assert np.isclose(summary.distance, 11.0, rtol=0.01).all()
+    assert summary.acceleration[0] == summary.acceleration[-1] == 0
+
+    # idle seconds are read from the energy array
+    values = np.broadcast_to(summary.velocity, (len(summary), 2, 3, 4, 1))
+    velocity = xr.DataArray(values, attrs={"idle seconds": 2})
+    cycle = DrivingCycle.from_velocity(velocity[:10])
+    assert cycle.idle_seconds == 2
+    assert np.allclose(cycle.distance, summary.speed[:10].sum(axis=0) / 3600)
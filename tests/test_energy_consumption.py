@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from carculator_utils.energy_consumption import (
+    ENERGY_CHANNELS,
+    ENERGY_CHANNELS_KJ,
+    PER_METRE_CHANNELS,
+    EnergyConsumptionModel,
+    get_efficiency_tables,
+    interpolate_efficiency,
+)
+
+
+def test_cycle_is_trimmed_to_driving_seconds():
+    cycle = np.concatenate((np.zeros(5), np.full(10, 30.0), np.zeros(20)))
+    ecm = EnergyConsumptionModel("car", ["Medium"], ["ICEV-d"], cycle, None)
+
+    # deceleration to a stop, then one idle second
+    assert len(ecm.velocity) == 17
+    assert ecm.idle_seconds == 18
+    assert ecm.driving_cycle.idle_seconds == 18
+    assert ecm.acceleration[15].item() < 0
+    assert ecm.acceleration[-1].item() == 0
+
+
+def test_interpolate_efficiency():
+    fuels, grid, tables = get_efficiency_tables("car")
+    load = np.random.default_rng(0).random((50, len(fuels)))
+    rows = np.arange(len(fuels))
+
+    expected = np.stack(
+        [np.interp(load[:, i], grid, tables["engine"][i]) for i in rows], axis=1
+    )
+
+    assert np.allclose(
+        interpolate_efficiency(load, grid, tables["engine"], rows),
+        np.clip(expected, 0, 1),
+    )
+
+
+def test_engine_load_is_consistent_with_efficiencies():
+    cycle = np.concatenate((np.zeros(3), np.linspace(5, 90, 40), np.zeros(3)))
+    ecm = EnergyConsumptionModel("car", ["Medium"], ["ICEV-d", "BEV"], cycle, None)
+
+    motive_energy = np.random.default_rng(0).random((len(ecm.velocity), 1, 1, 2, 1))
+    motive_energy *= 1000
+    engine_power = np.array([60.0, 80.0]).reshape(1, 2, 1, 1)
+    efficiency = np.full((1, 1, 2, 1), 0.3)
+
+    load, engine, transmission = ecm.solve_engine_load(
+        motive_energy, engine_power, efficiency, efficiency, tolerance=1e-9
+    )
+
+    # L = min(E v / (P efficiency(L)), 1) while driving
+    driving = ((ecm.velocity > 0) & (ecm.driving_time > 0)).squeeze()
+    expected = np.minimum(
+        (motive_energy / (engine_power.T * 1000) * ecm.velocity)[driving]
+        / (engine * transmission)[driving],
+        1,
+    )
+
+    assert np.allclose(load[driving], expected, atol=1e-8)
+    assert (load[:3] == 0.05).all()
+    assert ecm.solver_iterations.max() > 0
+
+
+def test_energy_channels_are_selectable(tmp_path):
+    cycle = np.concatenate((np.zeros(3), np.linspace(5, 90, 40), np.zeros(3)))
+    ecm = EnergyConsumptionModel("car", ["Medium"], ["ICEV-d", "BEV"], cycle, None)
+
+    parameters = {
+        "driving_mass": 1500.0,
+        "rr_coef": 0.01,
+        "drag_coef": 0.3,
+        "frontal_area": 2.2,
+        "electric_motor_power": np.array([0.0, 80.0]),
+        "engine_power": np.array([60.0, 80.0]),
+        "recuperation_efficiency": 0.6,
+        "aux_power": 300.0,
+        "battery_charge_eff": 0.9,
+        "battery_discharge_eff": 0.9,
+    }
+    # of shape (size, powertrain, year, value)
+    parameters = {
+        key: np.broadcast_to(np.reshape(val, (1, -1, 1, 1)), (1, 2, 1, 1))
+        for key, val in parameters.items()
+    }
+
+    energy = ecm.motive_energy_per_km(**parameters)
+    totals = ecm.energy_totals
+    channels = ["recuperated energy", "velocity"]
+    selection = ecm.motive_energy_per_km(**parameters, channels=channels)
+
+    assert list(energy.parameter.values) == ENERGY_CHANNELS
+    assert PER_METRE_CHANNELS < ENERGY_CHANNELS_KJ < set(ENERGY_CHANNELS)
+    assert "velocity" not in ENERGY_CHANNELS_KJ
+    assert list(selection.parameter.values) == channels
+    assert np.array_equal(selection, energy.sel(parameter=channels))
+    assert np.allclose(ecm.energy_totals, totals.sel(parameter=channels))
+
+    with pytest.raises(ValueError):
+        ecm.motive_energy_per_km(**parameters, channels=["fuel"])
+
+    # attributes can be serialized
+    energy.to_netcdf(tmp_path / "energy.nc")
+
+
+def test_cycle_energy_totals():
+    # the vehicle models are implemented in the downstream packages
+    carculator = pytest.importorskip("carculator")
+
+    parameters = carculator.CarInputParameters()
+    parameters.static()
+    _, array = carculator.fill_xarray_from_input_parameters(
+        parameters,
+        scope={
+            "powertrain": ["ICEV-d", "BEV", "FCEV"],
+            "size": ["Medium"],
+            "year": [2020],
+        },
+    )
+    vm = carculator.CarModel(array, cycle="WLTC")
+    vm.set_all()
+
+    # kJ/km, and kJ over the cycle
+    ttw_energy = vm.array.sel(
+        parameter="TtW energy", powertrain=["ICEV-d", "BEV", "FCEV"]
+    )
+    auxiliary_energy = vm.energy.sel(
+        parameter="auxiliary energy", powertrain=["ICEV-d", "BEV", "FCEV"]
+    ).sum(dim="second")
+
+    assert np.allclose(ttw_energy.values.ravel(), [2248.2, 472.4, 1049.1], rtol=1e-3)
+    assert np.allclose(
+        auxiliary_energy.values.ravel(), [1804.6, 1089.4, 613.6], rtol=1e-3
+    )
@@ -0,0 +1,86 @@
+import numpy as np
+import xarray as xr
+
+from carculator_utils import hot_emissions
+from carculator_utils.driving_cycles import get_standard_driving_cycle_and_gradient
+
+POWERTRAINS = ["ICEV-d", "ICEV-p", "HEV-p", "BEV"]
+SIZES = ["Small", "Medium"]
+YEARS = [2000, 2020]
+
+
+def make_model(cycle="WLTC", order=None):
+    rng = np.random.default_rng(0)
+    dc, _ = get_standard_driving_cycle_and_gradient("car", SIZES, cycle)
+    velocity = np.nan_to_num(dc) * 1000 / 3600
+
+    shape = (len(dc), 2, len(YEARS), len(POWERTRAINS), len(SIZES))
+    coords = {
+        "second": np.arange(len(dc)),
+        "value": np.arange(2),
+        "year": YEARS,
+        "powertrain": POWERTRAINS,
+        "size": SIZES,
+    }
+    velocity = xr.DataArray(
+        np.broadcast_to(velocity[:, None, None, None, :], shape).copy(),
+        coords=coords,
+        dims=list(coords),
+        attrs={"idle seconds": 0},
+    )
+    energy = velocity.copy(data=rng.random(shape) * 50 * (velocity.values > 0))
+
+    if order is not None:
+        velocity = velocity.copy(data=velocity.values[order])
+        energy = energy.copy(data=energy.values[order])
+
+    dims = ["size", "powertrain", "year", "value"]
+    km = xr.DataArray(
+        rng.uniform(1e5, 1e6, (len(SIZES), len(POWERTRAINS), len(YEARS), 2)),
+        coords={d: coords[d] for d in dims},
+        dims=dims,
+    )
+
+    model = hot_emissions.HotEmissionsModel(
+        powertrains=np.array(POWERTRAINS),
+        sizes=np.array(SIZES),
+        velocity=velocity,
+        cycle_name=cycle,
+        vehicle_type="car",
+    )
+    return model, dict(
+        euro_class=[3, 6],
+        lifetime_km=km,
+        energy_consumption=energy,
+        yearly_km=km / 10,
+    )
+
+
+def test_emissions_are_summed_per_speed_bin():
+    model, kwargs = make_model()
+    expected = model.get_hot_emissions(**kwargs)
+
+    assert np.isfinite(expected.values).all()
+    assert (expected.values >= 0).all()
+
+    # cold start and soak emissions are on the first and last seconds:
+    # other seconds can be shuffled
+    seconds = kwargs["energy_consumption"].sizes["second"]
+    order = np.r_[0, np.random.default_rng(1).permutation(seconds - 2) + 1, -1]
+    model, kwargs = make_model(order=order)
+    result = model.get_hot_emissions(**kwargs)
+
+    assert np.allclose(result.values, expected.values, rtol=1e-12, atol=0)
+
+
+def test_emission_factor_tables_are_built_once():
+    args = ("car", (3, 6.2), tuple(POWERTRAINS), tuple(SIZES))
+    tables = hot_emissions.get_emission_factor_tables(*args)
+
+    assert hot_emissions.get_emission_factor_tables(*args) is tables
+    assert tables["hot"].shape == (2, len(POWERTRAINS), len(SIZES), 41)
+    assert not tables["hot"].flags.writeable
+
+    # degradation factors of CO, HC and NOx are at least 1
+    assert (tables["degradation"] >= 1).all()
+    assert (tables["degradation"][:, POWERTRAINS.index("BEV")] == 1).all()
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+from carculator_utils.impact_cache import ImpactCache
+
+
+def test_load_and_store(tmp_path):
+    cache = ImpactCache(tmp_path)
+    key = cache.key("static", "recipe", "midpoint", 2020, "abc")
+
+    assert cache.load(key, np.array([1, 2])) is None
+
+    cache.store(key, np.array([2, 5]), np.array([[1.0, 2.0], [3.0, 4.0]]))
+    cache.store(key, np.array([1]), np.array([[5.0], [6.0]]))
+    # the entry is appended to, and merged when loaded
+    assert len(list(tmp_path.glob(f"{key}*.npz"))) == 2
+
+    assert np.array_equal(cache.load(key, np.array([1, 5])), [[5.0, 2.0], [6.0, 4.0]])
+    assert cache.load(key, np.array([1, 3])) is None
+    assert len(list(tmp_path.glob(f"{key}*.npz"))) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ImpactCache(tmp_path)
+    rows, impacts = np.arange(100), np.ones((10, 100))
+
+    for k, key in enumerate(["a", "b", "c"]):
+        cache.store(key, rows, impacts)
+        (path,) = tmp_path.glob(f"{key}*.npz")
+        os.utime(path, (k, k))
+
+    cache.load("a", rows)
+    cache.max_size = 2 * path.stat().st_size
+    cache.evict()
+
+    assert cache.load("b", rows) is None
+    assert cache.load("a", rows) is not None
+    assert cache.load("c", rows) is not None
+
+
+def test_in_memory_cache():
+    cache = ImpactCache(max_size=100)
+
+    cache.store("a", np.array([1]), np.ones((10, 1)))
+    assert np.array_equal(cache.load("a", np.array([1])), np.ones((10, 1)))
+
+    cache.store("b", np.array([1]), np.ones((10, 1)))
+    assert cache.load("a", np.array([1])) is None
+
+
+def test_size_is_tracked(tmp_path):
+    rows, impacts = np.arange(100), np.ones((10, 100))
+
+    cache = ImpactCache(tmp_path)
+    cache.store("a", rows, impacts)
+    path = next(tmp_path.glob("a*.npz"))
+    os.utime(path, (0, 0))
+    size = path.stat().st_size
+    # the size is tracked as entries are stored
+    cache.max_size = 2.5 * size
+    cache.store("b", rows, impacts)
+    assert cache._size == 2 * size
+
+    # and read from the directory when the cache is created
+    cache = ImpactCache(tmp_path, max_size=2.5 * size)
+    assert cache._size == 2 * size
+
+    cache.store("c", rows, impacts)
+    assert cache._size == 2 * size
+    assert cache.load("a", rows) is None
+    assert cache.load("c", rows) is not None
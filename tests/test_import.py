@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+# heavy dependencies that must not be imported with the package
+HEAVY = ("bw2io", "xlsxwriter", "xarray", "pandas", "scipy")
+
+
+def run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_package_import_is_lazy():
+    process = run(
+        f"import sys, carculator_utils; print([m for m in {HEAVY} if m in sys.modules])"
+    )
+    assert process.stdout.strip() == "[]"
+
+
+def test_export_dependencies_are_deferred():
+    process = run(
+        "import sys; from carculator_utils import Inventory, VehicleInputParameters;"
+        "print('bw2io' in sys.modules, 'xlsxwriter' in sys.modules)"
+    )
+    assert process.stdout.strip() == "False False"
+
+
+def test_public_names_are_resolved():
+    import carculator_utils
+
+    for name in carculator_utils.__all__:
+        assert getattr(carculator_utils, name).__name__ == name
+        assert name in dir(carculator_utils)
+
+    with pytest.raises(AttributeError):
+        carculator_utils.CarModel
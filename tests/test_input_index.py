@@ -0,0 +1,22 @@
+from carculator_utils.inventory import InputIndex
+
+
+def test_find_is_invalidated_when_inputs_change():
+    inputs = InputIndex(
+        {
+            ("transport, passenger car, BEV, Small", "CH", "kilometer", "t"): 1,
+            ("Passenger car, BEV, Small", "CH", "unit", "p"): 2,
+            ("market for diesel", "CH", "kilogram", "diesel"): 0,
+        }
+    )
+
+    assert inputs.find(("BEV",)) == [1, 2]
+    assert inputs.find(("BEV",), ("transport",)) == [2]
+
+    key = ("transport, passenger car, BEV, Small", "CH", "kilometer", "t")
+    del inputs[key]
+    inputs[(key[0], key[1], "passenger kilometer", key[3])] = 1
+    inputs[("transport, passenger car, BEV, Large", "CH", "kilometer", "t")] = 3
+
+    assert inputs.find(("BEV",)) == [1, 2, 3]
+    assert inputs.find(("market",)) == [0]
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+# the vehicle models and inventories are implemented in the downstream packages
+carculator = pytest.importorskip("carculator")
+
+SCOPE = {"powertrain": ["ICEV-d", "BEV"], "size": ["Medium"], "year": [2020]}
+
+
+def make_array():
+    parameters = carculator.CarInputParameters()
+    parameters.static()
+    _, array = carculator.fill_xarray_from_input_parameters(
+        parameters, scope=dict(SCOPE)
+    )
+    return array
+
+
+def test_batch_matches_separate_inventories():
+    array = make_array()
+
+    results = carculator.InventoryCar.batch(
+        carculator.CarModel,
+        array,
+        countries=["CH", "FR"],
+        model_kwargs={"cycle": "WLTC"},
+    )
+
+    for country in ("CH", "FR"):
+        vm = carculator.CarModel(array.copy(), country=country, cycle="WLTC")
+        vm.set_all()
+        expected = carculator.InventoryCar(vm).calculate_impacts()
+
+        assert np.allclose(
+            results.sel(country=country, scenario="SSP2-NPi").values,
+            expected.values,
+            rtol=1e-9,
+            atol=0,
+        )
+
+    assert not np.allclose(
+        results.sel(country="CH").values, results.sel(country="FR").values
+    )
+
+
+def test_stream_in_chunks():
+    parameters = carculator.CarInputParameters()
+    # sampled values are the static ones, so that every chunk
+    # can be compared with a static run
+    for data in parameters.data.values():
+        if data.get("kind") == "distribution":
+            data.update(uncertainty_type=1, loc=data["amount"])
+            data.pop("minimum", None)
+            data.pop("maximum", None)
+
+    updates = []
+
+    class Inventory(carculator.InventoryCar):
+        def update(self, vm):
+            updates.append(len(vm.array.value))
+            super().update(vm)
+
+    chunks = list(
+        Inventory.stream(
+            carculator.CarModel,
+            parameters,
+            iterations=5,
+            chunk_size=2,
+            scope=SCOPE,
+            model_kwargs={"cycle": "WLTC"},
+        )
+    )
+
+    assert [len(c.value) for c in chunks] == [2, 2, 1]
+    assert np.concatenate([c.value.values for c in chunks]).tolist() == list(range(5))
+    # the inventory of the first chunk is updated for the next ones
+    assert updates == [2, 1]
+
+    vm = carculator.CarModel(make_array(), cycle="WLTC")
+    vm.set_all()
+    expected = carculator.InventoryCar(vm).calculate_impacts()
+
+    for chunk in chunks:
+        assert np.allclose(chunk.values, expected.values, rtol=1e-6, atol=0)
+
+
+def test_update_calls_again_the_tracked_methods(tmp_path):
+    vm = carculator.CarModel(make_array(), cycle="WLTC")
+    vm.set_all()
+    inventory = carculator.InventoryCar(vm, cache_dir=tmp_path)
+    cache = inventory.cache
+
+    called = []
+    call_again = inventory._call_again
+
+    def spy(calls):
+        called.extend(c[0] for c in calls)
+        call_again(calls)
+
+    inventory._call_again = spy
+
+    for parameter, value in (
+        ("battery lifetime kilometers", 100000),
+        ("kilometers per year", 8000),
+    ):
+        array = make_array()
+        array.loc[dict(parameter=parameter)] = value
+        vm = carculator.CarModel(array, cycle="WLTC")
+        vm.set_all()
+
+        called.clear()
+        inventory.update(vm)
+        assert "add_battery" in called
+
+        expected = carculator.InventoryCar(vm)
+        assert np.allclose(inventory.A.toarray(), expected.A.toarray(), equal_nan=True)
+        assert np.allclose(
+            inventory.calculate_impacts().values,
+            expected.calculate_impacts().values,
+            rtol=1e-9,
+        )
+
+    # the inventory is rebuilt when the country changes, and keeps its cache
+    vm = carculator.CarModel(make_array(), cycle="WLTC", country="FR")
+    vm.set_all()
+    inventory.update(vm)
+    assert inventory.cache is cache
+    assert inventory.cache.directory == tmp_path
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from carculator_utils.driving_cycles import get_standard_driving_cycle_and_gradient
+from carculator_utils.noise_emissions import (
+    NoiseEmissionsModel,
+    get_noise_coefficient_tables,
+)
+
+
+def per_second_sound_power(model):
+    """Sound power summed over each second, per speed bin."""
+    velocity = model.velocity.values[..., None]
+    noise = model.rolling_noise() + model.propulsion_noise()
+    power = np.where(velocity > 0, 10**-12 * 10 ** (noise / 100), 10**-12)
+    distance = velocity.sum(axis=0) / 3600
+
+    bins = (velocity <= 50, (velocity > 50) & (velocity <= 80), velocity > 80)
+    res = np.concatenate(
+        [np.where(b, power, 0).sum(axis=0) / distance for b in bins], axis=-1
+    )
+    return res.transpose(3, 2, -1, 1, 0)
+
+
+@pytest.mark.parametrize(
+    "vehicle_type, sizes, cycle",
+    [
+        ("car", ["Small", "Large"], "WLTC"),
+        ("truck", ["3.5t", "40t"], "Long haul"),
+        ("two-wheeler", ["Scooter 4-11kW"], "Two wheeler cycle"),
+    ],
+)
+def test_sound_power_matches_per_second_sums(vehicle_type, sizes, cycle):
+    dc, _ = get_standard_driving_cycle_and_gradient(vehicle_type, sizes, cycle)
+    velocity = np.nan_to_num(dc) * 1000 / 3600
+    # a few seconds above 140 km/h, where propulsion noise increases
+    velocity[10:20] = 160 / 3.6
+
+    powertrains = ["ICEV-d", "BEV"]
+    shape = (len(dc), 1, 1, len(powertrains), len(sizes))
+    velocity = xr.DataArray(
+        np.broadcast_to(velocity[:, None, None, None, :], shape).copy(),
+        coords={
+            "second": np.arange(len(dc)),
+            "value": [0],
+            "year": [2020],
+            "powertrain": powertrains,
+            "size": sizes,
+        },
+    )
+
+    model = NoiseEmissionsModel(velocity, vehicle_type=vehicle_type)
+
+    assert np.allclose(
+        model.get_sound_power_per_compartment(),
+        per_second_sound_power(model),
+        rtol=1e-10,
+        atol=0,
+    )
+
+
+def test_coefficient_tables_are_built_once():
+    args = ("car", ("ICEV-d", "BEV"), ("Small", "Large"))
+    tables = get_noise_coefficient_tables(*args)
+
+    assert get_noise_coefficient_tables(*args) is tables
+    assert all(t.shape == (2, 2, 8) and not t.flags.writeable for t in tables)
+
+    # electric vehicles are quieter at low speed
+    assert (tables[3][1] <= tables[3][0]).all()
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import carculator_utils.vehicle_input_parameters as vip
+from carculator_utils.array import (
+    fill_xarray_from_input_parameters,
+    get_precision,
+    set_precision,
+)
+from carculator_utils.technosphere import SparseTechnosphere
+
+DEFAULT = Path(__file__, "..").resolve() / "fixtures" / "default_test.json"
+EXTRA = Path(__file__, "..").resolve() / "fixtures" / "extra_test.json"
+
+ITERATIONS, SIZE, YEARS, CATEGORIES = 4, 200, 2, 5
+
+# documented in `set_precision`
+TOLERANCE = 0.005
+
+
+@pytest.fixture
+def precision():
+    yield set_precision
+    set_precision(None)
+
+
+def test_set_precision(precision):
+    assert get_precision() is None
+    assert get_precision("float64") == np.float64
+
+    precision("float32")
+    assert get_precision("float64") == np.float32
+
+    with pytest.raises(ValueError):
+        precision("int32")
+
+
+def test_parameters_array_follows_precision(precision):
+    parameters = vip.VehicleInputParameters(DEFAULT, EXTRA)
+    parameters.static()
+
+    _, default = fill_xarray_from_input_parameters(parameters)
+    precision("float64")
+    _, array = fill_xarray_from_input_parameters(parameters)
+
+    assert default.dtype == np.float32
+    assert array.dtype == np.float64
+    assert np.allclose(array, default)
+
+
+def test_float32_impacts_within_tolerance():
+    rng = np.random.default_rng(0)
+    base = -sparse.random(SIZE, SIZE, density=0.02, random_state=1, format="csr")
+    base = base / (abs(base).sum(axis=0).max() * 1.5) + sparse.identity(SIZE)
+    characterization = rng.random((CATEGORIES, SIZE))
+    demand = np.eye(SIZE)[:, :10]
+    exchanges = -rng.random((ITERATIONS, 10, 10, YEARS)) * 0.05
+
+    impacts = {}
+    for dtype in ("float64", "float32"):
+        A = SparseTechnosphere(base, ITERATIONS, YEARS, dtype=dtype)
+        A[:, :10, 10:20] = exchanges
+        supply = A.solve(demand.astype(dtype), 2, 1)
+        impacts[dtype] = characterization.astype(dtype) @ supply
+
+        assert A.dtype == dtype
+        assert supply.dtype == dtype
+
+    error = np.abs(impacts["float32"] - impacts["float64"]).max(axis=1)
+    assert (error <= TOLERANCE * np.abs(impacts["float64"]).max(axis=1)).all()
+
+
+def test_float32_pipeline_within_tolerance(precision):
+    carculator = pytest.importorskip("carculator")
+    scope = {"powertrain": ["ICEV-d", "BEV"], "size": ["Medium"], "year": [2020]}
+
+    impacts = {}
+    for dtype in ("float64", "float32"):
+        precision(dtype)
+        parameters = carculator.CarInputParameters()
+        parameters.static()
+        _, array = carculator.fill_xarray_from_input_parameters(
+            parameters, scope=dict(scope)
+        )
+        vm = carculator.CarModel(array, cycle="WLTC")
+        vm.set_all()
+        impacts[dtype] = carculator.InventoryCar(vm).calculate_impacts()
+
+        assert vm.array.dtype == impacts[dtype].dtype == dtype
+
+    reference = impacts["float64"].values.reshape(len(impacts["float64"]), -1)
+    error = np.abs(impacts["float32"].values.reshape(reference.shape) - reference)
+    assert (error.max(axis=1) <= TOLERANCE * np.abs(reference).max(axis=1)).all()
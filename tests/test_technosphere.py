@@ -0,0 +1,198 @@
+import numpy as np
+from scipy import sparse
+
+from carculator_utils import inventory
+from carculator_utils.technosphere import SparseTechnosphere
+
+ITERATIONS, SIZE, YEARS = 3, 12, 2
+
+
+def make_matrices():
+    base = sparse.random(SIZE, SIZE, density=0.2, random_state=1, format="csr")
+    base += sparse.identity(SIZE)
+    dense = np.repeat(
+        np.resize(base.toarray(), (ITERATIONS, SIZE, SIZE))[..., None],
+        YEARS,
+        axis=-1,
+    )
+    return SparseTechnosphere(base, ITERATIONS, YEARS), dense
+
+
+def test_setitem_follows_numpy_indexing():
+    A, dense = make_matrices()
+    values = np.random.default_rng(0).random((ITERATIONS, 3, YEARS))
+
+    for arr in (A, dense):
+        arr[:, [2], [3, 4, 5]] = values
+        arr[:, [1, 2, 3], [1, 2, 3]] = 7
+        arr[np.ix_(np.arange(ITERATIONS), [4, 5], [6, 7])] = 3
+        arr[:, 5, [8, 9], 1] = 2.5
+        arr[np.ix_(np.arange(ITERATIONS), [1, 2], [3, 4, 5])] *= 2
+
+    assert np.allclose(A.toarray(), dense)
+    assert np.allclose(np.asarray(A), dense)
+
+
+def test_getitem_follows_numpy_indexing():
+    A, dense = make_matrices()
+    A[:, [2], [3, 4, 5]] = dense[:, [2], [3, 4, 5]] = -1
+
+    for key in [
+        (slice(None), [2], [3, 4, 5]),
+        np.ix_(np.arange(ITERATIONS), [1, 4], [2, 6, 7]),
+        (0, Ellipsis, 1),
+        (0, slice(None), slice(None), 1),
+        (slice(None), [1, 2], [1, 2]),
+        (1, 3, 4, 0),
+    ]:
+        assert np.allclose(A[key], dense[key])
+
+
+def test_scale_and_nonzero_rows():
+    A, dense = make_matrices()
+    factor = np.random.default_rng(0).random((ITERATIONS, 3, YEARS))
+
+    A.scale(None, [3, 4, 5], factor)
+    dense[:, :, [3, 4, 5]] *= factor[:, None]
+
+    A.scale([0, 1, 2], [3, 4, 5], 0.5)
+    dense[np.ix_(np.arange(ITERATIONS), [0, 1, 2], [3, 4, 5])] *= 0.5
+
+    assert np.allclose(A.toarray(), dense)
+    assert np.array_equal(
+        A.nonzero_rows([3, 4]),
+        np.nonzero(dense[:, :, [3, 4]].any(axis=(0, 2, 3)))[0],
+    )
+
+
+def test_to_sparse():
+    A, dense = make_matrices()
+    A[1, 2, 3, 1] = dense[1, 2, 3, 1] = 5
+
+    assert sparse.issparse(A.to_sparse(1, 1))
+    assert np.allclose(A.to_sparse(1, 1).toarray(), dense[1, ..., 1])
+    assert np.allclose(A.to_sparse(0, 1).toarray(), dense[0, ..., 1])
+
+
+def test_solve_reuses_factorization_until_modified():
+    A, dense = make_matrices()
+    demand = np.eye(SIZE)[:, [0, 3, 5]]
+
+    assert np.allclose(A.solve(demand, 0, 1), np.linalg.solve(dense[0, ..., 1], demand))
+    assert A.factorize(0, 1) is A.factorize(0, 1)
+
+    A[:, 2, 3] = dense[:, 2, 3] = -0.5
+    assert np.allclose(A.solve(demand, 0, 1), np.linalg.solve(dense[0, ..., 1], demand))
+
+
+def test_solve_reuses_reference_factorization():
+    A, dense = make_matrices()
+    demand = np.eye(SIZE)[:, [0, 3, 5]]
+
+    # iteration 1 differs from iteration 0 by two activities, iteration 2 by all
+    A[1, [2, 4], 3, :] = dense[1, [2, 4], 3, :] = -0.3
+    A[1, 6, 7, :] = dense[1, 6, 7, :] = 0.2
+    A[2, :, :, 1] = dense[2, ..., 1] = dense[2, ..., 1] * 1.1
+
+    assert list(A.changed_activities(1, 0, year=1)) == [3, 7]
+    assert list(A.changed_activities(1, 0, year=1, exclude=[7])) == [3]
+
+    A.max_update_rank = 2
+    for iteration in range(ITERATIONS):
+        supply = A.solve(demand, iteration, 1, reference=0)
+        assert np.allclose(supply, np.linalg.solve(dense[iteration, ..., 1], demand))
+
+    # iteration 1 is solved with the factorization of iteration 0
+    assert (1, 1) not in A._factorizations
+    assert (2, 1) in A._factorizations
+
+
+def test_least_recently_used_factorizations_are_evicted():
+    A, _ = make_matrices()
+    A.max_factorizations = 2
+
+    reference = A.factorize(0, 0)
+    A.factorize(1, 0)
+    A.factorize(0, 0)
+    A.factorize(2, 0)
+
+    assert list(A._factorizations) == [(0, 0), (2, 0)]
+    assert A.factorize(0, 0) is reference
+
+
+def test_workers_factorize_the_reference_once(tmp_path):
+    A, dense = make_matrices()
+    A[1, [2, 4], 3, :] = dense[1, [2, 4], 3, :] = -0.3
+    A[2, 6, 7, :] = dense[2, 6, 7, :] = 0.2
+    characterization = np.random.default_rng(0).random((YEARS, 4, SIZE))
+    np.save(tmp_path / "B.npy", characterization)
+    rows = [0, 3, 5]
+
+    # as done by the initializer of each worker process
+    inventory.attach_matrices(A.share(tmp_path), str(tmp_path / "B.npy"))
+    attached = inventory._attached["technosphere"]
+
+    for iterations in ([1], [0, 2]):
+        impacts = inventory.characterize_supply(iterations, 1, rows, reference=0)
+        for iteration, arr in zip(iterations, impacts):
+            supply = np.linalg.solve(dense[iteration, ..., 1], np.eye(SIZE)[:, rows])
+            assert np.allclose(arr, characterization[1] @ supply)
+
+    assert list(attached._factorizations) == [(0, 1)]
+    inventory._attached.clear()
+
+
+def test_unique_iterations():
+    A, _ = make_matrices()
+    A[:, 2, 3] = 0.5
+    A[[0, 2], 4, 5] = -1
+    A[:, 6, 7] = np.arange(ITERATIONS)[:, None]
+
+    index, inverse = A.unique_iterations(0)
+    assert len(index) == 3
+    index, inverse = A.unique_iterations(0, exclude=[7])
+    assert len(index) == 2
+    assert inverse[0] == inverse[2] != inverse[1]
+
+
+def test_share_and_attach(tmp_path):
+    A, dense = make_matrices()
+    A[:, 2, 3] = dense[:, 2, 3] = -0.5
+    demand = np.eye(SIZE)[:, [0, 3, 5]]
+
+    B = SparseTechnosphere.attach(A.share(tmp_path))
+
+    assert np.array_equal(B.toarray(), A.toarray())
+    assert np.array_equal(B.solve(demand, 1, 1), A.solve(demand, 1, 1))
+
+
+def test_snapshot_and_restore():
+    A, dense = make_matrices()
+    A[:, 2, 3] = dense[:, 2, 3] = -0.5
+    snapshot = A.snapshot()
+    fingerprint = A.fingerprint(1, 1)
+
+    A[:, 4, 5] = 2
+    A.scale(None, [3], 3)
+    assert A.fingerprint(1, 1) != fingerprint
+
+    A.restore(snapshot)
+    assert np.array_equal(A.toarray(), dense)
+    assert A.fingerprint(1, 1) == fingerprint
+
+
+def test_journal_and_write():
+    A, dense = make_matrices()
+    A.journal = []
+
+    A[:, 2, [3, 4]] = 5
+    A[:, 2, 3] *= 2
+
+    keys = np.unique(np.concatenate([k for k, _ in A.journal]))
+    assert keys.tolist() == [2 * SIZE + 3, 2 * SIZE + 4]
+    assert np.array_equal(A.journal[0][1][:, 0, 0], dense[0, 2, [3, 4], 0])
+    assert np.array_equal(A.journal[1][1][:, 0, 0], [5])
+
+    # revert to the values before the first assignment
+    A.write(*A.journal[0])
+    assert np.array_equal(A.toarray(), dense)